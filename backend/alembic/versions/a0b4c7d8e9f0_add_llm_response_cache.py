@@ -0,0 +1,51 @@
+"""content-addressed LLM response cache
+
+Revision ID: a0b4c7d8e9f0
+Revises: f9a3b6c7d8e9
+Create Date: 2026-02-09 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "a0b4c7d8e9f0"
+down_revision: str | None = "f9a3b6c7d8e9"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "llm_response_cache",
+        sa.Column("key", sa.String(length=64), primary_key=True),
+        sa.Column("step", sa.String(length=20), nullable=False),
+        sa.Column("prompt_version", sa.String(length=50), nullable=False),
+        sa.Column("model", sa.String(length=50), nullable=False),
+        sa.Column("response", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("hit_count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.Column(
+            "last_used_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+    )
+    op.create_index("idx_llm_response_cache_created_at", "llm_response_cache", ["created_at"])
+    op.create_index("idx_llm_response_cache_last_used_at", "llm_response_cache", ["last_used_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_llm_response_cache_last_used_at", table_name="llm_response_cache")
+    op.drop_index("idx_llm_response_cache_created_at", table_name="llm_response_cache")
+    op.drop_table("llm_response_cache")
@@ -0,0 +1,44 @@
+"""tutor_reports report_type (cohort reports)
+
+Revision ID: a4b7c1d2e3f4
+Revises: 3f5f2c9e9b71
+Create Date: 2026-01-12 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "a4b7c1d2e3f4"
+down_revision: str | None = "3f5f2c9e9b71"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tutor_reports",
+        sa.Column(
+            "report_type",
+            sa.String(length=20),
+            nullable=False,
+            server_default=sa.text("'student'"),
+        ),
+    )
+    op.alter_column("tutor_reports", "student_id", nullable=True)
+    op.create_index(
+        "idx_tutor_reports_type_subject_term",
+        "tutor_reports",
+        ["report_type", "subject_id", "term_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_tutor_reports_type_subject_term", table_name="tutor_reports")
+    op.execute("DELETE FROM tutor_reports WHERE student_id IS NULL")
+    op.alter_column("tutor_reports", "student_id", nullable=False)
+    op.drop_column("tutor_reports", "report_type")
@@ -0,0 +1,30 @@
+"""content hash on content uploads for deduplication
+
+Revision ID: b1c5d8e9f0a1
+Revises: a0b4c7d8e9f0
+Create Date: 2026-02-10 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "b1c5d8e9f0a1"
+down_revision: str | None = "a0b4c7d8e9f0"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "content_uploads", sa.Column("content_sha256", sa.String(length=64), nullable=True)
+    )
+    op.create_index("idx_content_uploads_content_sha256", "content_uploads", ["content_sha256"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_content_uploads_content_sha256", table_name="content_uploads")
+    op.drop_column("content_uploads", "content_sha256")
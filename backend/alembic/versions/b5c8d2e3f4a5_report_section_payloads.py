@@ -0,0 +1,97 @@
+"""content-addressed report section payloads
+
+Revision ID: b5c8d2e3f4a5
+Revises: a4b7c1d2e3f4
+Create Date: 2026-01-14 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import zlib
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "b5c8d2e3f4a5"
+down_revision: str | None = "a4b7c1d2e3f4"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_section_payloads",
+        sa.Column("content_hash", sa.String(length=64), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("data_compressed", sa.LargeBinary(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "tutor_report_sections",
+        sa.Column("payload_hash", sa.String(length=64), nullable=True),
+    )
+    op.create_foreign_key(
+        "tutor_report_sections_payload_hash_fkey",
+        "tutor_report_sections",
+        "report_section_payloads",
+        ["payload_hash"],
+        ["content_hash"],
+    )
+    op.create_index(
+        "idx_tutor_report_sections_payload",
+        "tutor_report_sections",
+        ["payload_hash"],
+        unique=False,
+    )
+    op.alter_column("tutor_report_sections", "content", nullable=True)
+
+
+def downgrade() -> None:
+    # Re-inline referenced payloads and the executive summaries resolved from the report.
+    bind = op.get_bind()
+    compressed = bind.execute(
+        sa.text(
+            "SELECT content_hash, data_compressed FROM report_section_payloads "
+            "WHERE data_compressed IS NOT NULL"
+        )
+    ).all()
+    for content_hash, blob in compressed:
+        bind.execute(
+            sa.text(
+                "UPDATE report_section_payloads SET data = CAST(:data AS JSONB) "
+                "WHERE content_hash = :content_hash"
+            ),
+            {"data": zlib.decompress(blob).decode("utf-8"), "content_hash": content_hash},
+        )
+    op.execute(
+        """
+        UPDATE tutor_report_sections s
+        SET content = p.content, data = p.data
+        FROM report_section_payloads p
+        WHERE s.payload_hash = p.content_hash AND s.content IS NULL
+        """
+    )
+    op.execute(
+        """
+        UPDATE tutor_report_sections s
+        SET content = r.summary, data = jsonb_build_object('metrics', r.metrics_snapshot)
+        FROM tutor_reports r
+        WHERE s.report_id = r.id AND s.content IS NULL
+        """
+    )
+    op.alter_column("tutor_report_sections", "content", nullable=False)
+    op.drop_index("idx_tutor_report_sections_payload", table_name="tutor_report_sections")
+    op.drop_constraint(
+        "tutor_report_sections_payload_hash_fkey", "tutor_report_sections", type_="foreignkey"
+    )
+    op.drop_column("tutor_report_sections", "payload_hash")
+    op.drop_table("report_section_payloads")
@@ -0,0 +1,38 @@
+"""per-page extracted text cache
+
+Revision ID: c2d6e9f0a1b2
+Revises: b1c5d8e9f0a1
+Create Date: 2026-02-11 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "c2d6e9f0a1b2"
+down_revision: str | None = "b1c5d8e9f0a1"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pdf_page_texts",
+        sa.Column("content_sha256", sa.String(length=64), primary_key=True),
+        sa.Column("extractor_version", sa.String(length=50), primary_key=True),
+        sa.Column("page_number", sa.Integer(), primary_key=True),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("pdf_page_texts")
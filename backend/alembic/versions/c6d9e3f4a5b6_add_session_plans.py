@@ -0,0 +1,70 @@
+"""precomputed next-session plans
+
+Revision ID: c6d9e3f4a5b6
+Revises: b5c8d2e3f4a5
+Create Date: 2026-01-21 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "c6d9e3f4a5b6"
+down_revision: str | None = "b5c8d2e3f4a5"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "session_plans",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("student_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("subject_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("term_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("activity_type_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("item_ids", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("candidate_count", sa.Integer(), nullable=False),
+        sa.Column("pool_generation", sa.Integer(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+        sa.Column("valid_until", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["student_id"],
+            ["students.id"],
+            name="session_plans_student_id_fkey",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["subject_id"],
+            ["subjects.id"],
+            name="session_plans_subject_id_fkey",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["term_id"],
+            ["terms.id"],
+            name="session_plans_term_id_fkey",
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["activity_type_id"],
+            ["activity_types.id"],
+            name="session_plans_activity_type_id_fkey",
+            ondelete="CASCADE",
+        ),
+        sa.UniqueConstraint(
+            "student_id",
+            "subject_id",
+            "term_id",
+            "activity_type_id",
+            name="session_plans_scope_key",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("session_plans")
@@ -0,0 +1,48 @@
+"""content pipeline stage checkpoints and unique chunk index per entry
+
+Revision ID: d3e7f0a1b2c3
+Revises: c2d6e9f0a1b2
+Create Date: 2026-02-12 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "d3e7f0a1b2c3"
+down_revision: str | None = "c2d6e9f0a1b2"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "content_pipeline_checkpoints",
+        sa.Column("content_upload_id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("stage", sa.String(length=50), primary_key=True),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column(
+            "completed_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["content_upload_id"],
+            ["content_uploads.id"],
+            name="content_pipeline_checkpoints_content_upload_id_fkey",
+            ondelete="CASCADE",
+        ),
+    )
+    op.create_unique_constraint(
+        "knowledge_chunks_entry_index_key", "knowledge_chunks", ["knowledge_entry_id", "index"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("knowledge_chunks_entry_index_key", "knowledge_chunks", type_="unique")
+    op.drop_table("content_pipeline_checkpoints")
@@ -0,0 +1,51 @@
+"""idempotency keys for response recording and session end
+
+Revision ID: d7e1f4a5b6c7
+Revises: c6d9e3f4a5b6
+Create Date: 2026-01-28 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "d7e1f4a5b6c7"
+down_revision: str | None = "c6d9e3f4a5b6"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "idempotency_keys",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("endpoint", sa.String(length=100), nullable=False),
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("request_hash", sa.String(length=64), nullable=False),
+        sa.Column("response", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name="idempotency_keys_user_id_fkey",
+            ondelete="CASCADE",
+        ),
+        sa.UniqueConstraint("user_id", "endpoint", "key", name="idempotency_keys_scope_key"),
+    )
+    op.create_index("idx_idempotency_keys_expires_at", "idempotency_keys", ["expires_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("idx_idempotency_keys_expires_at", table_name="idempotency_keys")
+    op.drop_table("idempotency_keys")
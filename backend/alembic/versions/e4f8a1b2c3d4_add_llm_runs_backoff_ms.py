@@ -0,0 +1,26 @@
+"""llm_runs backoff between attempts
+
+Revision ID: e4f8a1b2c3d4
+Revises: d3e7f0a1b2c3
+Create Date: 2026-02-13 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision: str = "e4f8a1b2c3d4"
+down_revision: str | None = "d3e7f0a1b2c3"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.add_column("llm_runs", sa.Column("backoff_ms", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("llm_runs", "backoff_ms")
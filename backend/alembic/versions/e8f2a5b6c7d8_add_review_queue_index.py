@@ -0,0 +1,28 @@
+"""index mastery states by student and next review
+
+Revision ID: e8f2a5b6c7d8
+Revises: d7e1f4a5b6c7
+Create Date: 2026-02-04 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision: str = "e8f2a5b6c7d8"
+down_revision: str | None = "d7e1f4a5b6c7"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_mastery_states_student_next_review",
+        "mastery_states",
+        ["student_id", "recommended_next_review_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_mastery_states_student_next_review", table_name="mastery_states")
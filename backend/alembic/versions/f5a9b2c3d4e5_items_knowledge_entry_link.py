@@ -0,0 +1,55 @@
+"""link items to the knowledge entry they were generated from
+
+Revision ID: f5a9b2c3d4e5
+Revises: e4f8a1b2c3d4
+Create Date: 2026-02-14 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+revision: str = "f5a9b2c3d4e5"
+down_revision: str | None = "e4f8a1b2c3d4"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "items",
+        sa.Column("knowledge_entry_id", postgresql.UUID(as_uuid=True), nullable=True),
+    )
+    op.create_foreign_key(
+        "items_knowledge_entry_id_fkey",
+        "items",
+        "knowledge_entries",
+        ["knowledge_entry_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+    op.create_index("idx_items_knowledge_entry", "items", ["knowledge_entry_id"])
+    # Existing items belong to the latest entry of their upload created before them.
+    op.execute(
+        """
+        UPDATE items
+        SET knowledge_entry_id = (
+            SELECT ke.id
+            FROM knowledge_entries ke
+            WHERE ke.content_upload_id = items.content_upload_id
+              AND ke.created_at <= items.created_at
+            ORDER BY ke.created_at DESC
+            LIMIT 1
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_items_knowledge_entry", table_name="items")
+    op.drop_constraint("items_knowledge_entry_id_fkey", "items", type_="foreignkey")
+    op.drop_column("items", "knowledge_entry_id")
@@ -0,0 +1,28 @@
+"""index activity sessions by status and start time
+
+Revision ID: f9a3b6c7d8e9
+Revises: e8f2a5b6c7d8
+Create Date: 2026-02-05 10:00:00.000000
+
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+revision: str = "f9a3b6c7d8e9"
+down_revision: str | None = "e8f2a5b6c7d8"
+branch_labels: str | None = None
+depends_on: str | None = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_activity_sessions_status_started",
+        "activity_sessions",
+        ["status", "started_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_activity_sessions_status_started", table_name="activity_sessions")
@@ -5,6 +5,37 @@ class Settings(BaseSettings):
     DATABASE_URL: str = "postgresql+psycopg2://decies:decies@db:5432/decies"
     OPENAI_API_KEY: str | None = None
     LLM_MODEL_NAME: str = "gpt-4-turbo-preview"
+    # Concurrent E2 segment / E4 chunk calls per upload (1 = sequential)
+    LLM_MAX_CONCURRENCY: int = 4
+    # Parsed responses reused across uploads/reprocessing for identical prompt inputs
+    LLM_RESPONSE_CACHE_ENABLED: bool = True
+    LLM_RESPONSE_CACHE_MAX_ENTRIES: int = 50000
+    LLM_RESPONSE_CACHE_TTL_SECONDS: int = 2592000  # 30 days
+    # E4: short chunks are packed into one request up to this estimated input size
+    LLM_E4_BATCH_ENABLED: bool = True
+    LLM_E4_BATCH_MAX_TOKENS: int = 2000
+    LLM_E4_BATCH_MAX_CHUNKS: int = 8
+    # E5: candidates are validated in concurrent shards carrying only the chunks they cite
+    LLM_E5_SHARD_MAX_ITEMS: int = 20
+    LLM_E5_SHARD_MAX_TOKENS: int = 6000
+    # Provider limits shared by all workers through Redis (async queue only; 0 disables)
+    LLM_RATE_LIMIT_ENABLED: bool = True
+    LLM_RATE_LIMIT_RPM: int = 500
+    LLM_RATE_LIMIT_TPM: int = 150000
+    LLM_RATE_LIMIT_COMPLETION_TOKENS: int = 1000  # answer size assumed before usage is known
+    LLM_RATE_LIMIT_MAX_WAIT_SECONDS: int = 300
+    # Failed calls are retried with exponential backoff + jitter, honouring Retry-After
+    LLM_MAX_ATTEMPTS: int = 3
+    LLM_RETRY_BASE_DELAY_SECONDS: float = 1.0
+    LLM_RETRY_MAX_DELAY_SECONDS: float = 60.0
+    # Consecutive transient provider errors (all workers) that open the circuit breaker;
+    # while open, upload jobs are parked and requeued after the cool-down
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 5
+    LLM_BREAKER_OPEN_SECONDS: int = 60
+
+    # PDF text extraction: page ranges of this size are read on a process pool
+    PDF_EXTRACT_MAX_WORKERS: int = 4
+    PDF_EXTRACT_PAGES_PER_TASK: int = 25
 
     # Async queue (optional)
     ASYNC_QUEUE_ENABLED: bool = False
@@ -13,6 +44,47 @@ class Settings(BaseSettings):
     RQ_JOB_TIMEOUT_SECONDS: int = 1800
     RQ_JOB_RETRY_MAX: int = 1
 
+    # Reference-data cache (microconcepts, topics, catalog, ...)
+    REFERENCE_CACHE_MAX_ENTRIES: int = 5000
+    REFERENCE_CACHE_STAMP_CHECK_SECONDS: float = 5.0
+
+    # Query budgets per service entry point: off, log (production) or raise (tests; statement
+    # counts only, time over budget is logged)
+    QUERY_BUDGET_MODE: str = "log"
+
+    # Report sections: JSON data at least this large is stored zlib-compressed (0 disables)
+    REPORT_SECTION_COMPRESS_MIN_BYTES: int = 8192
+    # Section payloads no report references are purged by the session sweep and after
+    # report deletions
+    REPORT_SECTION_PURGE_BATCH_SIZE: int = 1000
+
+    # Candidate item pools for session creation (in-process LRU + Redis when enabled)
+    ITEM_POOL_CACHE_MAX_POOLS: int = 512
+    ITEM_POOL_REDIS_TTL_SECONDS: int = 3600
+
+    # Precomputed next-session plans (built after end_session + metrics recalculation)
+    SESSION_PLAN_ENABLED: bool = True
+    SESSION_PLAN_MAX_ITEMS: int = 50
+    SESSION_PLAN_TTL_SECONDS: int = 21600
+
+    # Compiled (normalized) answer keys used to grade responses, per process
+    ANSWER_KEY_CACHE_MAX_ENTRIES: int = 10000
+
+    # Serialized items of recent sessions served by GET /sessions/{id}/items, per process
+    SESSION_ITEMS_CACHE_MAX_ENTRIES: int = 5000
+
+    # Sweeper marking in-progress sessions without recent activity as abandoned (worker;
+    # without the async queue, only when SESSION_SWEEP_IN_API opts an API process in)
+    SESSION_ABANDON_AFTER_SECONDS: int = 7200
+    SESSION_SWEEP_BATCH_SIZE: int = 500
+    SESSION_SWEEP_INTERVAL_SECONDS: int = 600
+    SESSION_SWEEP_IN_API: bool = False
+
+    # Idempotency-Key replays for response recording and session end (expired keys are
+    # purged by the session sweep)
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_PURGE_BATCH_SIZE: int = 1000
+
     # Auth
     JWT_SECRET: str = "changethis"  # Should be changed in .env
     JWT_EXPIRES_SECONDS: int = 3600  # 1 hour
@@ -31,6 +31,7 @@ from app.models import (  # noqa: E402, F401, I001
     grade,
     item,
     knowledge,
+    llm_cache,
     llm_run,
     metric,
     microconcept,
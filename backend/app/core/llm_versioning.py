@@ -3,4 +3,5 @@ LLM_ENGINE_VERSION = "V1"
 PROMPT_VERSION_E2_STRUCTURE = "E2-V1"
 PROMPT_VERSION_E3_MAP = "E3-V1"
 PROMPT_VERSION_E4_ITEMS = "E4-V1"
-PROMPT_VERSION_E5_VALIDATE = "E5-V1"
+PROMPT_VERSION_E4_ITEMS_BATCH = "E4B-V1"
+PROMPT_VERSION_E5_VALIDATE = "E5-V2"
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import functools
+import logging
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    max_statements: int
+    max_seconds: float
+
+
+# Budgets per service entry point. Statement counts are per call and include nested
+# entry points (e.g. report generation recalculates metrics and recommendations). Time
+# budgets depend on the database host and are only ever logged.
+QUERY_BUDGETS: dict[str, QueryBudget] = {
+    "reports.generate_student_report": QueryBudget(max_statements=150, max_seconds=5.0),
+    "reports.generate_cohort_report": QueryBudget(max_statements=20, max_seconds=5.0),
+    "recommendations.generate": QueryBudget(max_statements=100, max_seconds=5.0),
+    "metrics.recalculate": QueryBudget(max_statements=60, max_seconds=5.0),
+    "activity.create_session": QueryBudget(max_statements=30, max_seconds=2.0),
+    # Replay lookup, context, event insert and key insert; an expired key adds its delete
+    # and a concurrent retry winning the key a second lookup.
+    "activity.record_response": QueryBudget(max_statements=6, max_seconds=0.1),
+    "activity.record_responses_batch": QueryBudget(max_statements=10, max_seconds=1.0),
+    "session_plans.build": QueryBudget(max_statements=30, max_seconds=2.0),
+}
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+@dataclass
+class QueryStats:
+    name: str
+    statements: int = 0
+    seconds: float = 0.0
+
+
+_active_stats: ContextVar[tuple[QueryStats, ...]] = ContextVar("query_budget_stats", default=())
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_stats.get():
+        conn.info.setdefault("query_budget_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    active = _active_stats.get()
+    started = conn.info.get("query_budget_started")
+    if not active or not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    for stats in active:
+        stats.statements += 1
+        stats.seconds += elapsed
+
+
+class query_budget:
+    """
+    Count SQL statements (and time spent in them) while the block runs and compare them to
+    the budget registered for ``name`` in ``QUERY_BUDGETS``, or to explicit limits.
+
+    Usable as a context manager or as a decorator. Violations are logged; with
+    ``QUERY_BUDGET_MODE=raise`` (the test suite) too many statements raise
+    ``QueryBudgetExceeded``, while time over budget is still only logged so a slow database
+    does not fail unrelated requests.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_statements: int | None = None,
+        max_seconds: float | None = None,
+    ) -> None:
+        budget = QUERY_BUDGETS.get(name)
+        self.name = name
+        self.max_statements = (
+            max_statements
+            if max_statements is not None
+            else getattr(budget, "max_statements", None)
+        )
+        self.max_seconds = (
+            max_seconds if max_seconds is not None else getattr(budget, "max_seconds", None)
+        )
+        self.stats = QueryStats(name=name)
+        self._token = None
+
+    def __enter__(self) -> QueryStats:
+        self.stats = QueryStats(name=self.name)
+        self._token = _active_stats.set((*_active_stats.get(), self.stats))
+        return self.stats
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _active_stats.reset(self._token)
+        self._token = None
+        if exc_type is None:
+            self._check()
+
+    def __call__(self, func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with query_budget(
+                self.name, max_statements=self.max_statements, max_seconds=self.max_seconds
+            ):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    def _check(self) -> None:
+        mode = (settings.QUERY_BUDGET_MODE or "off").lower()
+        if mode == "off":
+            return
+
+        stats = self.stats
+        violations: list[str] = []
+        if self.max_statements is not None and stats.statements > self.max_statements:
+            violations.append(f"{stats.statements} statements > {self.max_statements}")
+        too_many_statements = bool(violations)
+        if self.max_seconds is not None and stats.seconds > self.max_seconds:
+            violations.append(f"{stats.seconds:.3f}s in SQL > {self.max_seconds}s")
+        if not violations:
+            return
+
+        message = f"Query budget exceeded for {self.name}: {'; '.join(violations)}"
+        if mode == "raise" and too_many_statements:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import uuid
+from datetime import timedelta
 
 import redis
 from rq import Queue, Retry
 
 from app.core.config import settings
 
+SESSION_SWEEP_JOB_PREFIX = "decies-session-sweep-"
+# Id of the pending sweep run; keeps a single one scheduled across workers
+SESSION_SWEEP_LOCK_KEY = "decies:session_sweep:pending"
+
 
 def is_async_queue_enabled() -> bool:
     return bool(settings.ASYNC_QUEUE_ENABLED)
@@ -24,14 +29,22 @@ def _get_queue() -> Queue:
     )
 
 
-def enqueue_upload_processing(*, upload_id: uuid.UUID) -> str:
+def enqueue_upload_processing(*, upload_id: uuid.UUID, delay_seconds: float | None = None) -> str:
+    """Enqueue the pipeline for an upload, after ``delay_seconds`` (needs the RQ scheduler)."""
     queue = _get_queue()
-    job = queue.enqueue(
-        "app.tasks.process_upload_job",
-        str(upload_id),
-        retry=Retry(max=int(settings.RQ_JOB_RETRY_MAX)),
-        job_timeout=int(settings.RQ_JOB_TIMEOUT_SECONDS),
-    )
+    kwargs = {
+        "retry": Retry(max=int(settings.RQ_JOB_RETRY_MAX)),
+        "job_timeout": int(settings.RQ_JOB_TIMEOUT_SECONDS),
+    }
+    if delay_seconds:
+        job = queue.enqueue_in(
+            timedelta(seconds=delay_seconds),
+            "app.tasks.process_upload_job",
+            str(upload_id),
+            **kwargs,
+        )
+    else:
+        job = queue.enqueue("app.tasks.process_upload_job", str(upload_id), **kwargs)
     return str(job.id)
 
 
@@ -51,3 +64,45 @@ def enqueue_recalculate_metrics(
         job_timeout=int(settings.RQ_JOB_TIMEOUT_SECONDS),
     )
     return str(job.id)
+
+
+def schedule_session_sweep(*, delay_seconds: int) -> str | None:
+    """
+    Schedule the abandoned-session sweep; the worker must run with its scheduler enabled.
+
+    Every run gets a fresh job id: a finished job's hash expires after its result TTL and
+    would take a pending job scheduled under the same id with it. ``SESSION_SWEEP_LOCK_KEY``
+    holds the pending run's id, so however many workers (re)schedule the sweep only one run
+    is pending. Returns the new job id, or None when a run is already pending.
+    """
+    connection = _get_redis_connection()
+    job_id = f"{SESSION_SWEEP_JOB_PREFIX}{uuid.uuid4().hex}"
+    # The lock outlives the run it stands for, so a lost job does not block the cycle forever.
+    lock_ttl = int(delay_seconds) + int(settings.RQ_JOB_TIMEOUT_SECONDS)
+    if not connection.set(SESSION_SWEEP_LOCK_KEY, job_id, nx=True, ex=lock_ttl):
+        return None
+    queue = Queue(
+        name=settings.RQ_QUEUE_NAME,
+        connection=connection,
+        default_timeout=int(settings.RQ_JOB_TIMEOUT_SECONDS),
+    )
+    queue.enqueue_in(
+        timedelta(seconds=delay_seconds),
+        "app.tasks.sweep_abandoned_sessions_job",
+        job_id=job_id,
+        job_timeout=int(settings.RQ_JOB_TIMEOUT_SECONDS),
+    )
+    return job_id
+
+
+def release_session_sweep(job_id: str) -> None:
+    """Drop the pending-run lock if ``job_id`` (the run now executing) still holds it."""
+    connection = _get_redis_connection()
+
+    def _release(pipe) -> None:
+        held = pipe.get(SESSION_SWEEP_LOCK_KEY)
+        pipe.multi()
+        if held is not None and held.decode() == job_id:
+            pipe.delete(SESSION_SWEEP_LOCK_KEY)
+
+    connection.transaction(_release, SESSION_SWEEP_LOCK_KEY)
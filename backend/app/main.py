@@ -3,6 +3,8 @@ DECIES Platform - FastAPI Main Application
 Sprint 0 - Día 1: Health endpoint only
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from redis.exceptions import RedisError
@@ -14,7 +16,7 @@ from sqlalchemy.orm import Session
 from app.api.v1 import auth, events
 from app.core.config import settings
 from app.core.db import get_db
-from app.core.queue import _get_redis_connection
+from app.core.queue import _get_redis_connection, is_async_queue_enabled
 from app.routers import (
     activity,
     admin,
@@ -27,10 +29,25 @@ from app.routers import (
     reports,
 )
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    stop_sweeper = None
+    # Fallback for deployments without a worker; the jobs module is only loaded then.
+    if settings.SESSION_SWEEP_IN_API and not is_async_queue_enabled():
+        from app.tasks import start_in_process_sweeper
+
+        stop_sweeper = start_in_process_sweeper()
+    yield
+    if stop_sweeper is not None:
+        stop_sweeper.set()
+
+
 app = FastAPI(
     title="DECIES API",
     description="Sistema de analisis y recomendaciones pedagogicas adaptativas",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 app.include_router(auth.router, prefix="/api/v1")
@@ -52,6 +69,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 
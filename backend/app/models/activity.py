@@ -5,12 +5,14 @@ from sqlalchemy import (
     Boolean,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
+    UniqueConstraint,
     text,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.db import Base
@@ -30,6 +32,7 @@ class ActivityType(Base):
 
 class ActivitySession(Base):
     __tablename__ = "activity_sessions"
+    __table_args__ = (Index("idx_activity_sessions_status_started", "status", "started_at"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     student_id: Mapped[uuid.UUID] = mapped_column(
@@ -149,3 +152,53 @@ class LearningEvent(Base):
     created_at: Mapped[datetime | None] = mapped_column(
         DateTime, server_default=text("CURRENT_TIMESTAMP"), nullable=True
     )
+
+
+class SessionPlan(Base):
+    """
+    Next-session item order precomputed for a student/subject/term/activity type.
+
+    ``item_ids`` holds the head of the full adaptive ordering; a session of ``n`` items is
+    its first ``n`` ids. ``pool_generation`` is the item pool generation the plan was built
+    from and ``valid_until`` the time it must be recomputed by (TTL or next review due).
+    """
+
+    __tablename__ = "session_plans"
+    __table_args__ = (
+        UniqueConstraint(
+            "student_id",
+            "subject_id",
+            "term_id",
+            "activity_type_id",
+            name="session_plans_scope_key",
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    student_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("students.id", name="session_plans_student_id_fkey", ondelete="CASCADE"),
+        nullable=False,
+    )
+    subject_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("subjects.id", name="session_plans_subject_id_fkey", ondelete="CASCADE"),
+        nullable=False,
+    )
+    term_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("terms.id", name="session_plans_term_id_fkey", ondelete="CASCADE"),
+        nullable=False,
+    )
+    activity_type_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey(
+            "activity_types.id", name="session_plans_activity_type_id_fkey", ondelete="CASCADE"
+        ),
+        nullable=False,
+    )
+    item_ids: Mapped[list[str]] = mapped_column(JSONB, nullable=False)
+    candidate_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    pool_generation: Mapped[int] = mapped_column(Integer, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    valid_until: Mapped[datetime] = mapped_column(DateTime, nullable=False)
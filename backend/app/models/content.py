@@ -2,8 +2,8 @@ import uuid
 from datetime import datetime
 from enum import Enum as PyEnum
 
-from sqlalchemy import DateTime, Enum, ForeignKey, Integer, String, Text, text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DateTime, Enum, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.db import Base
@@ -16,6 +16,7 @@ class ContentUploadType(str, PyEnum):
 
 class ContentUpload(Base):
     __tablename__ = "content_uploads"
+    __table_args__ = (Index("idx_content_uploads_content_sha256", "content_sha256"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     tutor_id: Mapped[uuid.UUID] = mapped_column(
@@ -49,6 +50,7 @@ class ContentUpload(Base):
     storage_uri: Mapped[str] = mapped_column(String, nullable=False)
     file_name: Mapped[str] = mapped_column(String, nullable=False)
     mime_type: Mapped[str] = mapped_column(String, nullable=False)
+    content_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
     page_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
     processing_status: Mapped[str | None] = mapped_column(String(20), nullable=True)
     processing_job_id: Mapped[str | None] = mapped_column(String(128), nullable=True)
@@ -57,3 +59,38 @@ class ContentUpload(Base):
     created_at: Mapped[datetime | None] = mapped_column(
         DateTime, server_default=text("CURRENT_TIMESTAMP"), nullable=True
     )
+
+
+class PdfPageText(Base):
+    """Extracted text of one page of a file, by content hash and extractor version."""
+
+    __tablename__ = "pdf_page_texts"
+
+    content_sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    extractor_version: Mapped[str] = mapped_column(String(50), primary_key=True)
+    page_number: Mapped[int] = mapped_column(Integer, primary_key=True)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime | None] = mapped_column(
+        DateTime, server_default=text("CURRENT_TIMESTAMP"), nullable=True
+    )
+
+
+class ContentPipelineCheckpoint(Base):
+    """A completed stage of the content pipeline for an upload, with what resuming needs."""
+
+    __tablename__ = "content_pipeline_checkpoints"
+
+    content_upload_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey(
+            "content_uploads.id",
+            name="content_pipeline_checkpoints_content_upload_id_fkey",
+            ondelete="CASCADE",
+        ),
+        primary_key=True,
+    )
+    stage: Mapped[str] = mapped_column(String(50), primary_key=True)
+    payload: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    completed_at: Mapped[datetime | None] = mapped_column(
+        DateTime, server_default=text("CURRENT_TIMESTAMP"), nullable=True
+    )
@@ -2,7 +2,7 @@ import enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Integer, String, Text, text
+from sqlalchemy import Boolean, DateTime, Enum, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -18,6 +18,7 @@ class ItemType(str, enum.Enum):
 
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (Index("idx_items_knowledge_entry", "knowledge_entry_id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     content_upload_id: Mapped[uuid.UUID] = mapped_column(
@@ -30,6 +31,14 @@ class Item(Base):
         ForeignKey("microconcepts.id", name="items_microconcept_id_fkey"),
         nullable=True,
     )
+    # Pipeline run that generated the item (a reprocess retires the previous run's items)
+    knowledge_entry_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey(
+            "knowledge_entries.id", name="items_knowledge_entry_id_fkey", ondelete="SET NULL"
+        ),
+        nullable=True,
+    )
     type: Mapped[ItemType] = mapped_column(
         Enum(ItemType, name="item_type", create_type=False), nullable=False
     )
@@ -74,8 +74,11 @@ class LLMRun(Base):
     prompt_tokens: Mapped[int] = mapped_column(Integer, default=0)
     completion_tokens: Mapped[int] = mapped_column(Integer, default=0)
     total_cost: Mapped[float] = mapped_column(default=0.0)
-    status: Mapped[str] = mapped_column(String(20), default="success")  # success, failed
+    # success, failed, cached or circuit_open (not attempted: provider circuit breaker open)
+    status: Mapped[str] = mapped_column(String(20), default="success")
     error_message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Delay before the next attempt of a failed call (backoff / Retry-After)
+    backoff_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime | None] = mapped_column(
         DateTime, server_default=text("CURRENT_TIMESTAMP"), nullable=True
     )
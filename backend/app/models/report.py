@@ -1,8 +1,10 @@
+import json
 import uuid
+import zlib
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, LargeBinary, String, Text, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -18,10 +20,11 @@ class TutorReport(Base):
         ForeignKey("tutors.id", name="tutor_reports_tutor_id_fkey", ondelete="CASCADE"),
         nullable=False,
     )
-    student_id: Mapped[uuid.UUID] = mapped_column(
+    # NULL for cohort (class-level) reports.
+    student_id: Mapped[uuid.UUID | None] = mapped_column(
         UUID(as_uuid=True),
         ForeignKey("students.id", name="tutor_reports_student_id_fkey", ondelete="CASCADE"),
-        nullable=False,
+        nullable=True,
     )
     subject_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -34,6 +37,13 @@ class TutorReport(Base):
         nullable=False,
     )
 
+    report_type: Mapped[str] = mapped_column(
+        String(20),
+        server_default=text("'student'"),
+        default="student",
+        nullable=False,
+    )  # student, cohort
+
     engine_version: Mapped[str] = mapped_column(
         String,
         server_default=text("'V1'"),
@@ -64,8 +74,29 @@ class TutorReport(Base):
     )
 
 
+class ReportSectionPayload(Base):
+    """Content-addressed section body shared by every section with identical content/data."""
+
+    __tablename__ = "report_section_payloads"
+
+    content_hash: Mapped[str] = mapped_column(String(64), primary_key=True)  # sha256 hex
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    data: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    # zlib-compressed JSON of ``data`` when it is large; ``data`` is NULL then.
+    data_compressed: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, server_default=text("CURRENT_TIMESTAMP"), nullable=False
+    )
+
+    def decoded_data(self) -> dict[str, Any] | None:
+        if self.data_compressed is not None:
+            return json.loads(zlib.decompress(self.data_compressed))
+        return self.data
+
+
 class TutorReportSection(Base):
     __tablename__ = "tutor_report_sections"
+    __table_args__ = (Index("idx_tutor_report_sections_payload", "payload_hash"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     report_id: Mapped[uuid.UUID] = mapped_column(
@@ -80,7 +111,49 @@ class TutorReportSection(Base):
     order_index: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     section_type: Mapped[str] = mapped_column(String(50), nullable=False)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
-    content: Mapped[str] = mapped_column(Text, nullable=False)
-    data: Mapped[dict[str, Any] | None] = mapped_column(JSONB, nullable=True)
+    # Inline body (legacy rows and in-place overrides). New sections reference a shared
+    # payload instead; the executive summary stores nothing and reuses the report's
+    # summary and metrics_snapshot.
+    content_inline: Mapped[str | None] = mapped_column("content", Text, nullable=True)
+    data_inline: Mapped[dict[str, Any] | None] = mapped_column("data", JSONB, nullable=True)
+    payload_hash: Mapped[str | None] = mapped_column(
+        String(64),
+        ForeignKey(
+            "report_section_payloads.content_hash",
+            name="tutor_report_sections_payload_hash_fkey",
+        ),
+        nullable=True,
+    )
 
     report: Mapped["TutorReport"] = relationship("TutorReport", back_populates="sections")
+    payload: Mapped[ReportSectionPayload | None] = relationship(
+        "ReportSectionPayload", lazy="selectin"
+    )
+
+    @property
+    def content(self) -> str:
+        if self.content_inline is not None:
+            return self.content_inline
+        if self.payload is not None:
+            return self.payload.content
+        if self.section_type == "executive_summary" and self.report is not None:
+            return self.report.summary
+        return ""
+
+    @content.setter
+    def content(self, value: str) -> None:
+        self.content_inline = value
+
+    @property
+    def data(self) -> dict[str, Any] | None:
+        if self.data_inline is not None:
+            return self.data_inline
+        if self.payload is not None:
+            return self.payload.decoded_data()
+        if self.section_type == "executive_summary" and self.report is not None:
+            return {"metrics": self.report.metrics_snapshot}
+        return None
+
+    @data.setter
+    def data(self, value: dict[str, Any] | None) -> None:
+        self.data_inline = value
@@ -0,0 +1,73 @@
+import logging
+import multiprocessing
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+import pypdf
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Stamped on cached page texts: bump when extraction changes its output.
+PDF_EXTRACTOR_VERSION = f"pypdf-{pypdf.__version__}/1"
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> list[str]:
+    # Runs in a worker process: each one parses the file on its own.
+    reader = pypdf.PdfReader(file_path)
+    return [reader.pages[idx].extract_text() or "" for idx in range(start, stop)]
+
+
+def iter_pdf_pages(
+    file_path: str,
+    *,
+    max_workers: int | None = None,
+    pages_per_task: int | None = None,
+) -> Iterator[str]:
+    """
+    Yield the text of each page of a PDF, in page order.
+
+    Pages are split into ranges of ``PDF_EXTRACT_PAGES_PER_TASK`` extracted on a pool of
+    ``PDF_EXTRACT_MAX_WORKERS`` processes; a range is yielded as soon as it and the ranges
+    before it are done, so callers can work on the first pages while the rest are read.
+    Small files (a single range) are read in this process. Pool processes are spawned, not
+    forked: the caller (API process or RQ worker) may hold threads, locks and DB connections
+    a fork would copy.
+    """
+    max_workers = int(max_workers or settings.PDF_EXTRACT_MAX_WORKERS)
+    pages_per_task = max(1, int(pages_per_task or settings.PDF_EXTRACT_PAGES_PER_TASK))
+    try:
+        reader = pypdf.PdfReader(file_path)
+        page_count = len(reader.pages)
+        ranges = [
+            (start, min(start + pages_per_task, page_count))
+            for start in range(0, page_count, pages_per_task)
+        ]
+
+        if max_workers <= 1 or len(ranges) <= 1:
+            for page in reader.pages:
+                yield page.extract_text() or ""
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers, len(ranges)),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            futures = [
+                pool.submit(_extract_page_range, file_path, start, stop) for start, stop in ranges
+            ]
+            try:
+                for future in futures:
+                    yield from future.result()
+            finally:
+                # Stopped early (or failed): don't parse ranges nobody will read.
+                for future in futures:
+                    future.cancel()
+    except Exception as e:
+        logger.error(f"Error reading PDF {file_path}: {e}")
+        raise
+
+
+def extract_text_from_pdf(file_path: str) -> str:
+    return "".join(f"{page}\n" for page in iter_pdf_pages(file_path))
@@ -1,10 +1,18 @@
+import itertools
+import json
 import logging
 import os
 import re
+import time
 import uuid
-
-import pypdf
-from sqlalchemy import or_
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+from pydantic import BaseModel
+from sqlalchemy import exists, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
@@ -13,6 +21,7 @@ from app.core.llm_versioning import (
     PROMPT_VERSION_E2_STRUCTURE,
     PROMPT_VERSION_E3_MAP,
     PROMPT_VERSION_E4_ITEMS,
+    PROMPT_VERSION_E4_ITEMS_BATCH,
     PROMPT_VERSION_E5_VALIDATE,
 )
 from app.models.content import ContentUpload
@@ -20,65 +29,130 @@ from app.models.item import Item, ItemType
 from app.models.knowledge import KnowledgeChunk, KnowledgeEntry
 from app.models.llm_run import LLMRun, LLMRunStep
 from app.models.microconcept import MicroConcept
-from app.services.llm_service import LLMService
+from app.pipelines.extraction import iter_pdf_pages
+from app.services.item_pool import item_pool_index
+from app.services.llm_cache import llm_response_cache
+from app.services.llm_rate_limiter import LLMRateLimitTimeout
+from app.services.llm_retry import (
+    LLMCircuitOpenError,
+    is_transient_error,
+    llm_circuit_breaker,
+    retry_delay_seconds,
+)
+from app.services.llm_service import (
+    E3MapResult,
+    E5Quality,
+    E5ValidationResult,
+    ItemResult,
+    LLMResponseError,
+    LLMService,
+    StructureResult,
+    estimate_tokens,
+)
+from app.services.page_text_cache import page_text_cache
+from app.services.pipeline_checkpoints import pipeline_checkpoints
+from app.services.storage import StorageService
 
 logger = logging.getLogger(__name__)
 
 E2_SEGMENT_MAX_CHARS = 18_000
 E2_SEGMENT_MIN_CHARS = 8_000
 E2_SEGMENT_MAX_COUNT = 12
-LLM_MAX_ATTEMPTS = 2
 
 E2_QUALITY_MIN_COVERAGE = 0.6
 E5_QUALITY_MIN_KEEP_RATIO = 0.7
 
+# Stages checkpointed per upload; E4 is checkpointed per chunk ("e4:<chunk index>").
+PIPELINE_STAGE_EXTRACTED = "extracted"
+PIPELINE_STAGE_E2 = "e2"
+PIPELINE_STAGE_E3 = "e3"
+PIPELINE_STAGE_E5 = "e5"
+E4_CHECKPOINT_CHUNKS = 32
 
-def _segment_raw_text(text: str) -> list[str]:
-    cleaned = (text or "").strip()
-    if not cleaned:
-        return []
-    if len(cleaned) <= E2_SEGMENT_MAX_CHARS:
-        return [cleaned]
 
-    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", cleaned) if p.strip()]
-    if not paragraphs:
-        paragraphs = [cleaned]
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
 
-    segments: list[str] = []
-    current: list[str] = []
-    current_len = 0
 
-    def _flush() -> None:
-        nonlocal current, current_len
-        if current:
-            segments.append("\n\n".join(current).strip())
-            current = []
-            current_len = 0
+def _iter_paragraphs(pages: Iterable[str]) -> Iterator[str]:
+    """
+    Stripped paragraphs of the extracted text (each page followed by a newline), split on
+    blank lines. A break may straddle two pages, so the trailing whitespace of a page is
+    carried over and split again together with the next one.
+    """
+    open_parts: list[str] = []
+    carry = ""
+    for page in pages:
+        pieces = _PARAGRAPH_BREAK.split(f"{carry}{page}\n")
+        if len(pieces) > 1:
+            paragraph = "".join([*open_parts, pieces[0]]).strip()
+            if paragraph:
+                yield paragraph
+            for piece in pieces[1:-1]:
+                if piece.strip():
+                    yield piece.strip()
+            open_parts = []
+        last = pieces[-1]
+        body = last.rstrip()
+        open_parts.append(body)
+        carry = last[len(body) :]
+    paragraph = "".join(open_parts).strip()
+    if paragraph:
+        yield paragraph
+
+
+def _iter_segments(pages: Iterable[str]) -> Iterator[str]:
+    """
+    E2 segments of the extracted text, produced while pages are still being read.
 
+    Text up to ``E2_SEGMENT_MAX_CHARS`` is a single segment. Longer text is packed paragraph
+    by paragraph into segments of at least ``E2_SEGMENT_MIN_CHARS`` that stay under the max
+    (oversized paragraphs are cut), up to ``E2_SEGMENT_MAX_COUNT`` segments.
+    """
+    pages = iter(pages)
+    head: list[str] = []
+    head_len = 0
+    for page in pages:
+        head.append(page)
+        head_len += len(page) + 1
+        if head_len > E2_SEGMENT_MAX_CHARS and (
+            len("".join(f"{p}\n" for p in head).strip()) > E2_SEGMENT_MAX_CHARS
+        ):
+            break
+    else:
+        cleaned = "".join(f"{p}\n" for p in head).strip()
+        if cleaned:
+            yield cleaned
+        return
+
+    segments = _pack_paragraphs(_iter_paragraphs(itertools.chain(head, pages)))
+    yield from itertools.islice((s for s in segments if s), E2_SEGMENT_MAX_COUNT)
+
+
+def _pack_paragraphs(paragraphs: Iterable[str]) -> Iterator[str]:
+    current: list[str] = []
+    current_len = 0
     for paragraph in paragraphs:
         paragraph_len = len(paragraph) + 2
-        if (
-            current
-            and current_len + paragraph_len > E2_SEGMENT_MAX_CHARS
-            and current_len >= E2_SEGMENT_MIN_CHARS
+        if current and (
+            paragraph_len > E2_SEGMENT_MAX_CHARS
+            or (
+                current_len + paragraph_len > E2_SEGMENT_MAX_CHARS
+                and current_len >= E2_SEGMENT_MIN_CHARS
+            )
         ):
-            _flush()
+            yield "\n\n".join(current).strip()
+            current, current_len = [], 0
 
         if paragraph_len > E2_SEGMENT_MAX_CHARS:
-            _flush()
             for i in range(0, len(paragraph), E2_SEGMENT_MAX_CHARS):
-                segments.append(paragraph[i : i + E2_SEGMENT_MAX_CHARS].strip())
+                yield paragraph[i : i + E2_SEGMENT_MAX_CHARS].strip()
             continue
 
         current.append(paragraph)
         current_len += paragraph_len
 
-    _flush()
-
-    if len(segments) > E2_SEGMENT_MAX_COUNT:
-        segments = segments[:E2_SEGMENT_MAX_COUNT]
-
-    return [s for s in segments if s]
+    if current:
+        yield "\n\n".join(current).strip()
 
 
 def _compute_e2_quality(*, raw_text: str, chunks: list[str], llm_quality: dict | None) -> dict:
@@ -136,6 +210,7 @@ def _log_llm_attempt(
     engine_version: str,
     status: str,
     error_message: str | None = None,
+    backoff_ms: int | None = None,
     knowledge_entry_id: uuid.UUID | None = None,
     knowledge_chunk_id: uuid.UUID | None = None,
     subfolder: str | None = None,
@@ -149,6 +224,7 @@ def _log_llm_attempt(
         prompt_version=prompt_version,
         engine_version=engine_version,
         error_message=error_message,
+        backoff_ms=backoff_ms,
         content_upload_id=upload_id,
         knowledge_entry_id=knowledge_entry_id,
         knowledge_chunk_id=knowledge_chunk_id,
@@ -156,7 +232,73 @@ def _log_llm_attempt(
     db.add(run)
 
 
-def _call_with_retries(
+@dataclass(frozen=True)
+class _LLMCall:
+    fn: Callable[[], Any]
+    subfolder: str | None = None
+    knowledge_entry_id: uuid.UUID | None = None
+    knowledge_chunk_id: uuid.UUID | None = None
+    # Prompt input the response depends on, and the model to rebuild a cached response with
+    cache_input: Any = None
+    result_type: type[BaseModel] | None = None
+
+
+class _LLMAttempt(NamedTuple):
+    attempt: int
+    status: str  # success, failed or circuit_open
+    error_message: str | None = None
+    backoff_ms: int | None = None  # waited after this attempt before the next one
+
+
+@dataclass
+class _LLMOutcome:
+    result: Any = None
+    error: Exception | None = None
+    cached: bool = False
+    # Logged by the caller's thread
+    attempts: list[_LLMAttempt] = field(default_factory=list)
+
+
+def _attempt_with_retries(fn: Callable[[], Any]) -> _LLMOutcome:
+    """
+    Up to ``LLM_MAX_ATTEMPTS`` attempts. Transient provider errors are backed off and feed
+    the shared circuit breaker; while it is open no attempt is made and the outcome carries
+    ``LLMCircuitOpenError``. Other errors (bad responses) are retried right away, except a
+    rate limiter timeout (the limiter already waited as long as it may) and
+    ``LLMResponseError``, which the caller handles without another attempt.
+    """
+    outcome = _LLMOutcome()
+    max_attempts = max(1, int(settings.LLM_MAX_ATTEMPTS))
+    for attempt in range(1, max_attempts + 1):
+        retry_in = llm_circuit_breaker.open_for()
+        if retry_in:
+            outcome.error = LLMCircuitOpenError(retry_in)
+            outcome.attempts.append(_LLMAttempt(attempt, "circuit_open", str(outcome.error)))
+            break
+        try:
+            outcome.result = fn()
+        except Exception as exc:  # noqa: BLE001
+            transient = is_transient_error(exc)
+            if transient:
+                llm_circuit_breaker.record_failure()
+            delay = retry_delay_seconds(attempt, exc) if transient and attempt < max_attempts else 0
+            outcome.error = exc
+            outcome.attempts.append(
+                _LLMAttempt(attempt, "failed", str(exc), int(delay * 1000) if delay else None)
+            )
+            if isinstance(exc, (LLMRateLimitTimeout, LLMResponseError)):
+                break
+            if delay:
+                time.sleep(delay)
+            continue
+        llm_circuit_breaker.record_success()
+        outcome.error = None
+        outcome.attempts.append(_LLMAttempt(attempt, "success"))
+        break
+    return outcome
+
+
+def _call_many_with_retries(
     db: Session,
     *,
     upload_id: uuid.UUID,
@@ -164,119 +306,516 @@ def _call_with_retries(
     model: str,
     prompt_version: str,
     engine_version: str,
-    subfolder: str | None,
-    knowledge_entry_id: uuid.UUID | None,
-    knowledge_chunk_id: uuid.UUID | None,
-    fn,
-):
-    last_exc: Exception | None = None
-    for attempt in range(1, LLM_MAX_ATTEMPTS + 1):
-        try:
-            result = fn()
+    calls: Iterable[_LLMCall],
+) -> list[_LLMOutcome]:
+    """
+    Run independent LLM calls on up to ``LLM_MAX_CONCURRENCY`` threads.
+
+    Calls with a ``cache_input`` are answered from the LLM response cache when an identical
+    prompt was run before, and successful responses are stored for the next time.
+
+    ``calls`` may be a generator: each call is dispatched as soon as it is produced, so
+    producing the next one (e.g. reading more pages) overlaps with the running calls, and
+    cache lookups happen call by call instead of in one query.
+
+    Outcomes come back in the order of ``calls``. The session is not shared with the
+    threads: every attempt is logged here afterwards, call by call, in that same order.
+
+    A call stopped by the open circuit breaker raises ``LLMCircuitOpenError`` once the
+    attempts are logged and committed, so the job can be parked and resumed later.
+    """
+    streamed = not isinstance(calls, Sequence)
+
+    def cache_key(call: _LLMCall) -> str | None:
+        if not settings.LLM_RESPONSE_CACHE_ENABLED:
+            return None
+        if call.cache_input is None or call.result_type is None:
+            return None
+        return llm_response_cache.key(
+            step=step.value,
+            prompt_version=prompt_version,
+            model=model,
+            payload=call.cache_input,
+        )
+
+    hits: dict[str, Any] = {}
+    max_workers = max(1, int(settings.LLM_MAX_CONCURRENCY))
+    if not streamed:
+        hits = llm_response_cache.get_many(db, [key for key in map(cache_key, calls) if key])
+        max_workers = min(max_workers, max(1, len(calls)))
+
+    dispatched: list[tuple[_LLMCall, str | None, _LLMOutcome | Future[_LLMOutcome]]] = []
+    pool = (
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm")
+        if max_workers > 1
+        else None
+    )
+    try:
+        for call in calls:
+            key = cache_key(call)
+            if streamed and key:
+                hits.update(llm_response_cache.get_many(db, [key]))
+            if key in hits:
+                outcome = _LLMOutcome(
+                    result=call.result_type.model_validate(hits[key]), cached=True
+                )
+                dispatched.append((call, key, outcome))
+            elif pool is None:
+                dispatched.append((call, key, _attempt_with_retries(call.fn)))
+            else:
+                dispatched.append((call, key, pool.submit(_attempt_with_retries, call.fn)))
+        calls = [call for call, _key, _outcome in dispatched]
+        outcomes = [
+            outcome.result() if isinstance(outcome, Future) else outcome
+            for _call, _key, outcome in dispatched
+        ]
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    llm_response_cache.put_many(
+        db,
+        {
+            key: outcome.result.model_dump(mode="json")
+            for (_call, key, _pending), outcome in zip(dispatched, outcomes, strict=True)
+            if key and not outcome.cached and outcome.error is None
+        },
+        step=step.value,
+        prompt_version=prompt_version,
+        model=model,
+    )
+
+    for call, outcome in zip(calls, outcomes, strict=True):
+        if outcome.cached:
             _log_llm_attempt(
                 db,
                 upload_id=upload_id,
                 step=step,
                 model=model,
-                attempt=attempt,
+                attempt=1,
                 prompt_version=prompt_version,
                 engine_version=engine_version,
-                status="success",
-                subfolder=subfolder,
-                knowledge_entry_id=knowledge_entry_id,
-                knowledge_chunk_id=knowledge_chunk_id,
+                status="cached",
+                subfolder=call.subfolder,
+                knowledge_entry_id=call.knowledge_entry_id,
+                knowledge_chunk_id=call.knowledge_chunk_id,
             )
-            return result
-        except Exception as exc:  # noqa: BLE001
-            last_exc = exc
+            continue
+        for logged in outcome.attempts:
             _log_llm_attempt(
                 db,
                 upload_id=upload_id,
                 step=step,
                 model=model,
-                attempt=attempt,
+                attempt=logged.attempt,
                 prompt_version=prompt_version,
                 engine_version=engine_version,
-                status="failed",
-                error_message=str(exc),
+                status=logged.status,
+                error_message=logged.error_message,
+                backoff_ms=logged.backoff_ms,
+                subfolder=call.subfolder,
+                knowledge_entry_id=call.knowledge_entry_id,
+                knowledge_chunk_id=call.knowledge_chunk_id,
+            )
+
+    circuit_open = [o.error for o in outcomes if isinstance(o.error, LLMCircuitOpenError)]
+    if circuit_open:
+        # Every stage commits its own results with its checkpoint: only the logged runs
+        # are pending here.
+        db.commit()
+        raise max(circuit_open, key=lambda error: error.retry_in)
+    return outcomes
+
+
+def _call_with_retries(
+    db: Session,
+    *,
+    upload_id: uuid.UUID,
+    step: LLMRunStep,
+    model: str,
+    prompt_version: str,
+    engine_version: str,
+    subfolder: str | None,
+    knowledge_entry_id: uuid.UUID | None,
+    knowledge_chunk_id: uuid.UUID | None,
+    fn,
+    cache_input: Any = None,
+    result_type: type[BaseModel] | None = None,
+):
+    (outcome,) = _call_many_with_retries(
+        db,
+        upload_id=upload_id,
+        step=step,
+        model=model,
+        prompt_version=prompt_version,
+        engine_version=engine_version,
+        calls=[
+            _LLMCall(
+                fn=fn,
                 subfolder=subfolder,
                 knowledge_entry_id=knowledge_entry_id,
                 knowledge_chunk_id=knowledge_chunk_id,
+                cache_input=cache_input,
+                result_type=result_type,
             )
-    assert last_exc is not None
-    raise last_exc
+        ],
+    )
+    if outcome.error is not None:
+        raise outcome.error
+    return outcome.result
 
 
-def extract_text_from_pdf(file_path: str) -> str:
-    text = ""
-    try:
-        reader = pypdf.PdfReader(file_path)
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-    except Exception as e:
-        logger.error(f"Error reading PDF {file_path}: {e}")
-        raise
-    return text
+def _pack_e4_batches(chunks: list[KnowledgeChunk]) -> list[list[KnowledgeChunk]]:
+    """
+    Group consecutive chunks whose estimated tokens fit ``LLM_E4_BATCH_MAX_TOKENS``, at most
+    ``LLM_E4_BATCH_MAX_CHUNKS`` per group. A chunk over the budget stays on its own.
+    """
+    if not settings.LLM_E4_BATCH_ENABLED:
+        return [[chunk] for chunk in chunks]
+
+    budget = int(settings.LLM_E4_BATCH_MAX_TOKENS)
+    max_chunks = max(1, int(settings.LLM_E4_BATCH_MAX_CHUNKS))
+    batches: list[list[KnowledgeChunk]] = []
+    current: list[KnowledgeChunk] = []
+    current_tokens = 0
+    for chunk in chunks:
+        tokens = estimate_tokens(chunk.content)
+        if current and (current_tokens + tokens > budget or len(current) >= max_chunks):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(chunk)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _load_chunks(db: Session, entry_id: uuid.UUID) -> list[KnowledgeChunk]:
+    """Chunks of an entry in order; also refreshes the ones expired by a checkpoint commit."""
+    return (
+        db.query(KnowledgeChunk)
+        .filter(KnowledgeChunk.knowledge_entry_id == entry_id)
+        .order_by(KnowledgeChunk.index.asc())
+        .all()
+    )
 
 
-def process_content_upload(db: Session, upload_id: uuid.UUID):
+def _e4_stage(chunk_index: int) -> str:
+    return f"e4:{chunk_index}"
+
+
+def _generate_e4_items(
+    db: Session,
+    *,
+    upload_id: uuid.UUID,
+    entry_id: uuid.UUID,
+    chunks: list[KnowledgeChunk],
+    llm_service: LLMService,
+) -> dict[int, _LLMOutcome]:
+    """E4 outcome per chunk index."""
+    # Short chunks go out together; the chunks of a batch that fails (an invalid response
+    # falls back at once) or that got no items are requested below one by one, like chunks
+    # too large to share a request.
+    e4_by_chunk: dict[int, _LLMOutcome] = {}
+    batches = [b for b in _pack_e4_batches(chunks) if len(b) > 1]
+    batch_payloads = [
+        [{"chunk_index": chunk.index, "content": chunk.content} for chunk in batch]
+        for batch in batches
+    ]
+    batch_outcomes = _call_many_with_retries(
+        db,
+        upload_id=upload_id,
+        step=LLMRunStep.E4_ITEMS,
+        model=settings.LLM_MODEL_NAME,
+        prompt_version=PROMPT_VERSION_E4_ITEMS_BATCH,
+        engine_version=LLM_ENGINE_VERSION,
+        calls=[
+            _LLMCall(
+                fn=lambda p=payload: llm_service.generate_items_e4_batch(p, quantity=2),
+                subfolder="chunks:" + ",".join(str(c["chunk_index"]) for c in payload),
+                knowledge_entry_id=entry_id,
+                cache_input={"chunks": payload, "quantity": 2},
+                result_type=ItemResult,
+            )
+            for payload in batch_payloads
+        ],
+    )
+    for batch, batch_outcome in zip(batches, batch_outcomes, strict=True):
+        if batch_outcome.error is not None:
+            logger.warning(
+                f"E4 batch of chunks {[c.index for c in batch]} failed "
+                f"({batch_outcome.error}); falling back to per-chunk requests"
+            )
+            continue
+        for chunk in batch:
+            items = [
+                item
+                for item in batch_outcome.result.items
+                if item.get("source_chunk_index") == chunk.index
+            ]
+            if items:
+                e4_by_chunk[chunk.index] = _LLMOutcome(result=ItemResult(items=items))
+            else:
+                logger.warning(f"E4 batch returned no items for chunk {chunk.index}")
+
+    single_chunks = [chunk for chunk in chunks if chunk.index not in e4_by_chunk]
+    single_outcomes = _call_many_with_retries(
+        db,
+        upload_id=upload_id,
+        step=LLMRunStep.E4_ITEMS,
+        model=settings.LLM_MODEL_NAME,
+        prompt_version=PROMPT_VERSION_E4_ITEMS,
+        engine_version=LLM_ENGINE_VERSION,
+        calls=[
+            _LLMCall(
+                fn=lambda c=chunk.content: llm_service.generate_items_e4(c, quantity=2),
+                subfolder=str(chunk.id),
+                knowledge_entry_id=entry_id,
+                knowledge_chunk_id=chunk.id,
+                cache_input={"chunk_text": chunk.content, "quantity": 2},
+                result_type=ItemResult,
+            )
+            for chunk in single_chunks
+        ],
+    )
+    for chunk, e4_outcome in zip(single_chunks, single_outcomes, strict=True):
+        e4_by_chunk[chunk.index] = e4_outcome
+    return e4_by_chunk
+
+
+def _shard_e5_candidates(
+    candidate_items: list[dict], chunks: list[KnowledgeChunk]
+) -> list[list[int]]:
     """
-    Orchestrates the LLM pipeline (E2 + E3 + E4) for a given upload.
+    Consecutive candidate indexes per E5 request, at most ``LLM_E5_SHARD_MAX_ITEMS`` each and
+    within ``LLM_E5_SHARD_MAX_TOKENS`` estimated for the items plus the chunks they cite.
     """
-    logger.info(f"Starting processing for upload {upload_id}")
+    content_by_index = {chunk.index: chunk.content for chunk in chunks}
+    max_items = max(1, int(settings.LLM_E5_SHARD_MAX_ITEMS))
+    budget = int(settings.LLM_E5_SHARD_MAX_TOKENS)
+    shards: list[list[int]] = []
+    current: list[int] = []
+    current_chunks: set[int] = set()
+    current_tokens = 0
+    for idx, candidate in enumerate(candidate_items):
+        chunk_index = candidate.get("source_chunk_index")
+        chunk_tokens = estimate_tokens(content_by_index.get(chunk_index, ""))
+        item_tokens = estimate_tokens(json.dumps(candidate, ensure_ascii=False))
+        if chunk_index in current_chunks:
+            chunk_tokens = 0
+        if current and (
+            len(current) >= max_items or current_tokens + item_tokens + chunk_tokens > budget
+        ):
+            shards.append(current)
+            current, current_chunks, current_tokens = [], set(), 0
+            chunk_tokens = estimate_tokens(content_by_index.get(chunk_index, ""))
+        current.append(idx)
+        current_chunks.add(chunk_index)
+        current_tokens += item_tokens + chunk_tokens
+    if current:
+        shards.append(current)
+    return shards
+
+
+def _e5_shard_input(
+    shard: list[int], candidate_items: list[dict], chunks: list[KnowledgeChunk]
+) -> dict:
+    """Items of a shard (indexed from 0 within it) and only the chunks they cite."""
+    items = [candidate_items[idx] for idx in shard]
+    cited = {item.get("source_chunk_index") for item in items}
+    return {
+        "items": items,
+        "chunks_from_e2": [
+            {"chunk_index": chunk.index, "chunk_type": "chunk", "content": chunk.content}
+            for chunk in chunks
+            if chunk.index in cited
+        ],
+    }
 
-    # 1. Fetch Upload
-    upload = db.query(ContentUpload).filter(ContentUpload.id == upload_id).first()
-    if not upload:
-        raise ValueError("Upload not found")
 
-    default_microconcept = (
-        db.query(MicroConcept)
+def _merge_e5_shards(
+    shards: list[list[int]], results: list[E5ValidationResult]
+) -> E5ValidationResult:
+    """One result over all candidates: shard-local indexes are mapped back to global ones."""
+    validated_items = []
+    kept = fixed = dropped = 0
+    notes: list[str] = []
+    for shard, result in zip(shards, results, strict=True):
+        for validated in result.validated_items:
+            if 0 <= validated.index < len(shard):
+                validated_items.append(
+                    validated.model_copy(update={"index": shard[validated.index]})
+                )
+        kept += result.quality.kept
+        fixed += result.quality.fixed
+        dropped += result.quality.dropped
+        notes.extend(result.quality.notes)
+    return E5ValidationResult(
+        validated_items=validated_items,
+        quality=E5Quality(kept=kept, fixed=fixed, dropped=dropped, notes=notes),
+    )
+
+
+def _match_microconcepts(
+    db: Session, referenced_ids: set[uuid.UUID], microconcepts: list[MicroConcept]
+) -> dict[uuid.UUID, uuid.UUID] | None:
+    """
+    Map microconcept ids of another upload onto ``microconcepts``: ids already in the
+    catalog map to themselves, others by code and then by name. ``None`` when any of them
+    has no counterpart, i.e. the catalogs are not compatible.
+    """
+    target_ids = {mc.id for mc in microconcepts}
+    mapping = {mc_id: mc_id for mc_id in referenced_ids & target_ids}
+    foreign_ids = referenced_ids - target_ids
+    if not foreign_ids:
+        return mapping
+
+    by_code = {mc.code: mc.id for mc in microconcepts if mc.code}
+    by_name = {mc.name.casefold(): mc.id for mc in microconcepts}
+    foreign = db.query(MicroConcept).filter(MicroConcept.id.in_(foreign_ids)).all()
+    if len(foreign) != len(foreign_ids):
+        return None
+    for mc in foreign:
+        target_id = (by_code.get(mc.code) if mc.code else None) or by_name.get(mc.name.casefold())
+        if target_id is None:
+            return None
+        mapping[mc.id] = target_id
+    return mapping
+
+
+def _clone_identical_upload(
+    db: Session, upload: ContentUpload, microconcepts: list[MicroConcept]
+) -> bool:
+    """
+    Reuse the knowledge entry, chunks and items of an already processed copy of the file.
+
+    The source is the latest entry of an upload with the same ``content_sha256`` whose
+    processing succeeded. Returns ``False`` (run the pipeline) when there is none, its
+    microconcepts cannot be matched into this upload's catalog or the upload already has a
+    knowledge entry of its own (it is being reprocessed on purpose).
+    """
+    if not upload.content_sha256:
+        return False
+    if db.query(exists().where(KnowledgeEntry.content_upload_id == upload.id)).scalar():
+        return False
+
+    source = (
+        db.query(KnowledgeEntry, ContentUpload.page_count)
+        .join(ContentUpload, KnowledgeEntry.content_upload_id == ContentUpload.id)
         .filter(
-            MicroConcept.subject_id == upload.subject_id,
-            MicroConcept.term_id == upload.term_id,
-            MicroConcept.active.is_(True),
+            ContentUpload.content_sha256 == upload.content_sha256,
+            ContentUpload.id != upload.id,
+            ContentUpload.processing_status == "succeeded",
         )
-        .order_by(MicroConcept.created_at.asc())
+        .order_by(KnowledgeEntry.created_at.desc())
         .first()
     )
-    if not default_microconcept:
-        default_microconcept = MicroConcept(
-            id=uuid.uuid4(),
-            subject_id=upload.subject_id,
-            term_id=upload.term_id,
-            topic_id=None,
-            code=None,
-            name="General",
-            description="Microconcepto genérico (auto)",
-            active=True,
+    if source is None:
+        return False
+    source_entry, source_page_count = source
+
+    source_chunks = (
+        db.query(KnowledgeChunk)
+        .filter(KnowledgeChunk.knowledge_entry_id == source_entry.id)
+        .order_by(KnowledgeChunk.index.asc())
+        .all()
+    )
+    source_items = db.query(Item).filter(Item.knowledge_entry_id == source_entry.id).all()
+
+    referenced_ids = {c.microconcept_id for c in source_chunks if c.microconcept_id}
+    referenced_ids |= {i.microconcept_id for i in source_items if i.microconcept_id}
+    microconcept_map = _match_microconcepts(db, referenced_ids, microconcepts)
+    if microconcept_map is None:
+        logger.info(
+            f"Upload {upload.id}: identical upload {source_entry.content_upload_id} found "
+            "but its microconcepts do not match this catalog; running the pipeline"
         )
-        db.add(default_microconcept)
-        db.flush()
+        return False
 
-    microconcepts = (
-        db.query(MicroConcept)
-        .filter(
-            MicroConcept.subject_id == upload.subject_id,
-            MicroConcept.active.is_(True),
-            or_(MicroConcept.term_id == upload.term_id, MicroConcept.term_id.is_(None)),
+    entry_id = uuid.uuid4()
+    db.execute(
+        insert(KnowledgeEntry).values(
+            id=entry_id,
+            content_upload_id=upload.id,
+            summary=source_entry.summary,
+            structure_json={
+                **(source_entry.structure_json or {}),
+                "cloned_from_upload_id": str(source_entry.content_upload_id),
+            },
         )
-        .order_by(MicroConcept.created_at.asc())
-        .all()
     )
-    microconcept_ids = {mc.id for mc in microconcepts}
+    if source_chunks:
+        db.execute(
+            insert(KnowledgeChunk).values(
+                [
+                    {
+                        "knowledge_entry_id": entry_id,
+                        "microconcept_id": microconcept_map.get(chunk.microconcept_id),
+                        "content": chunk.content,
+                        "index": chunk.index,
+                    }
+                    for chunk in source_chunks
+                ]
+            )
+        )
+    if source_items:
+        db.execute(
+            insert(Item).values(
+                [
+                    {
+                        "content_upload_id": upload.id,
+                        "knowledge_entry_id": entry_id,
+                        "microconcept_id": microconcept_map.get(item.microconcept_id),
+                        "type": item.type,
+                        "stem": item.stem,
+                        "options": item.options,
+                        "correct_answer": item.correct_answer,
+                        "explanation": item.explanation,
+                        "difficulty": item.difficulty,
+                        "source_chunk_index": item.source_chunk_index,
+                        "validation_status": item.validation_status,
+                        "validation_reason": item.validation_reason,
+                        "is_active": item.is_active,
+                    }
+                    for item in source_items
+                ]
+            )
+        )
+    upload.page_count = source_page_count
+    db.commit()
+    item_pool_index.invalidate(subject_id=upload.subject_id, term_id=upload.term_id)
+    logger.info(
+        f"Upload {upload.id}: cloned {len(source_chunks)} chunks and {len(source_items)} items "
+        f"from identical upload {source_entry.content_upload_id}"
+    )
+    return True
 
-    # Translate relative path to absolute if needed
-    # (Assuming StorageService behaves consistently, here we need absolute file path to open)
-    # The DB path is like "uploads/xyz.pdf".
-    # In Docker: /app/storage/uploads/xyz.pdf
-    # Locally: e:\...\backend\storage\uploads\xyz.pdf
-    # We'll use a helper or assume default root.
 
-    # Better: Use StorageService to get full path if method existed, or construct it.
-    # For now, simplistic approach:
-    base_path = "storage"  # Relative to backend/ workdir
-    file_path = os.path.join(base_path, upload.storage_uri)
+def _retire_previous_runs(db: Session, upload_id: uuid.UUID, entry_id: uuid.UUID) -> None:
+    """
+    Deactivate the items of earlier runs of the upload (sessions may reference them) and
+    delete their knowledge entries with their chunks. Runs in the E5 transaction, so a
+    reprocess that fails before E5 leaves the previous results in place.
+    """
+    db.query(Item).filter(
+        Item.content_upload_id == upload_id,
+        Item.is_active.is_(True),
+        or_(Item.knowledge_entry_id.is_(None), Item.knowledge_entry_id != entry_id),
+    ).update({Item.is_active: False}, synchronize_session=False)
+    db.query(KnowledgeEntry).filter(
+        KnowledgeEntry.content_upload_id == upload_id, KnowledgeEntry.id != entry_id
+    ).delete(synchronize_session=False)
+
+
+def _extract_and_structure(
+    db: Session, upload: ContentUpload, llm_service: LLMService
+) -> tuple[KnowledgeEntry, dict] | None:
+    """
+    Extraction and E2 of an upload: the knowledge entry, its chunks and the E2 checkpoint are
+    committed together. Returns the entry and its E2 quality, or None when there is no text.
+    """
+    # The DB path is like "uploads/xyz.pdf", relative to the storage root (backend/ workdir).
+    file_path = os.path.join(StorageService.STORAGE_ROOT, upload.storage_uri)
 
     if not os.path.exists(file_path):
         # Fallback for absolute path (legacy) or full path check
@@ -285,38 +824,62 @@ def process_content_upload(db: Session, upload_id: uuid.UUID):
         else:
             raise FileNotFoundError(f"File not found at {file_path}")
 
-    # 2. Extract Text
-    raw_text = extract_text_from_pdf(file_path)
-    if not raw_text.strip():
-        logger.warning("Empty text extracted")
-        return
+    # 2. Extract text page by page; E2 segments are sent out while later pages are read.
+    # A file already read by this extractor (reprocessing, same file elsewhere) is not
+    # parsed again.
+    pages: list[str] = []
+    cached_pages = page_text_cache.get(db, upload.content_sha256) if upload.content_sha256 else None
+
+    def _read_pages() -> Iterator[str]:
+        source = cached_pages if cached_pages is not None else iter_pdf_pages(file_path)
+        for page in source:
+            pages.append(page)
+            yield page
 
-    llm_service = LLMService()
+    page_stream = _read_pages()
 
     # 3. E2: Structure (segmented if raw_text is large)
     logger.info("Running E2: Structure")
     try:
-        segments = _segment_raw_text(raw_text)
-        if not segments:
-            logger.warning("No segments produced from raw_text")
-            return
-
-        segment_results = []
-        for idx, segment in enumerate(segments):
-            segment_results.append(
-                _call_with_retries(
-                    db,
-                    upload_id=upload.id,
-                    step=LLMRunStep.E2_STRUCTURE,
-                    model=settings.LLM_MODEL_NAME,
-                    prompt_version=PROMPT_VERSION_E2_STRUCTURE,
-                    engine_version=LLM_ENGINE_VERSION,
-                    subfolder=f"segment:{idx}",
-                    knowledge_entry_id=None,
-                    knowledge_chunk_id=None,
+        segment_outcomes = _call_many_with_retries(
+            db,
+            upload_id=upload.id,
+            step=LLMRunStep.E2_STRUCTURE,
+            model=settings.LLM_MODEL_NAME,
+            prompt_version=PROMPT_VERSION_E2_STRUCTURE,
+            engine_version=LLM_ENGINE_VERSION,
+            calls=(
+                _LLMCall(
                     fn=lambda s=segment: llm_service.generate_structure_e2(s),
+                    subfolder=f"segment:{idx}",
+                    cache_input=segment,
+                    result_type=StructureResult,
                 )
-            )
+                for idx, segment in enumerate(_iter_segments(page_stream))
+            ),
+        )
+        for _page in page_stream:  # pages after the last segment
+            pass
+        if cached_pages is None and upload.content_sha256:
+            page_text_cache.put(db, upload.content_sha256, pages)
+        raw_text = "".join(f"{page}\n" for page in pages)
+        upload.page_count = len(pages)
+        pipeline_checkpoints.mark(
+            db, upload.id, PIPELINE_STAGE_EXTRACTED, {"page_count": len(pages)}
+        )
+        if not raw_text.strip():
+            logger.warning("Empty text extracted")
+            db.commit()
+            return None
+        if not segment_outcomes:
+            logger.warning("No segments produced from raw_text")
+            db.commit()
+            return None
+
+        for outcome in segment_outcomes:
+            if outcome.error is not None:
+                raise outcome.error
+        segment_results = [outcome.result for outcome in segment_outcomes]
 
         merged_summary = "\n\n".join(
             r.summary.strip() for r in segment_results if r.summary
@@ -335,7 +898,7 @@ def process_content_upload(db: Session, upload_id: uuid.UUID):
             content_upload_id=upload.id,
             summary=merged_summary,
             structure_json={
-                "segments_count": len(segments),
+                "segments_count": len(segment_outcomes),
                 "chunks_count": len(merged_chunks),
                 "quality": e2_quality,
             },
@@ -343,24 +906,127 @@ def process_content_upload(db: Session, upload_id: uuid.UUID):
         db.add(entry)
         db.flush()
 
-        chunks: list[KnowledgeChunk] = []
-        for i, chunk_text in enumerate(merged_chunks):
-            chunk = KnowledgeChunk(knowledge_entry_id=entry.id, content=chunk_text, index=i)
-            db.add(chunk)
-            chunks.append(chunk)
-
-        db.flush()
+        if merged_chunks:
+            db.execute(
+                insert(KnowledgeChunk)
+                .values(
+                    [
+                        {"knowledge_entry_id": entry.id, "content": chunk_text, "index": i}
+                        for i, chunk_text in enumerate(merged_chunks)
+                    ]
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[KnowledgeChunk.knowledge_entry_id, KnowledgeChunk.index]
+                )
+            )
+        pipeline_checkpoints.mark(
+            db,
+            upload.id,
+            PIPELINE_STAGE_E2,
+            {"knowledge_entry_id": str(entry.id), "quality": e2_quality},
+        )
+        db.commit()
 
     except Exception as e:
         logger.error(f"E2 failed: {e}")
         db.commit()
         raise
 
+    return entry, e2_quality
+
+
+def process_content_upload(db: Session, upload_id: uuid.UUID):
+    """
+    Orchestrates the LLM pipeline (E2 + E3 + E4) for a given upload.
+    """
+    logger.info(f"Starting processing for upload {upload_id}")
+
+    # 1. Fetch Upload
+    upload = db.query(ContentUpload).filter(ContentUpload.id == upload_id).first()
+    if not upload:
+        raise ValueError("Upload not found")
+
+    default_microconcept = (
+        db.query(MicroConcept)
+        .filter(
+            MicroConcept.subject_id == upload.subject_id,
+            MicroConcept.term_id == upload.term_id,
+            MicroConcept.active.is_(True),
+        )
+        .order_by(MicroConcept.created_at.asc())
+        .first()
+    )
+    if not default_microconcept:
+        default_microconcept = MicroConcept(
+            id=uuid.uuid4(),
+            subject_id=upload.subject_id,
+            term_id=upload.term_id,
+            topic_id=None,
+            code=None,
+            name="General",
+            description="Microconcepto genérico (auto)",
+            active=True,
+        )
+        db.add(default_microconcept)
+        db.flush()
+
+    microconcepts = (
+        db.query(MicroConcept)
+        .filter(
+            MicroConcept.subject_id == upload.subject_id,
+            MicroConcept.active.is_(True),
+            or_(MicroConcept.term_id == upload.term_id, MicroConcept.term_id.is_(None)),
+        )
+        .order_by(MicroConcept.created_at.asc())
+        .all()
+    )
+    microconcept_ids = {mc.id for mc in microconcepts}
+
+    # Stages completed by an interrupted run (worker lost, job timeout) are not run again.
+    # A finished run leaves the E5 checkpoint; processing the upload again starts over and
+    # its E5 stage replaces that run's entry and items.
+    checkpoints = pipeline_checkpoints.load(db, upload.id)
+    if PIPELINE_STAGE_E5 in checkpoints:
+        pipeline_checkpoints.clear(db, upload.id)
+        checkpoints = {}
+
+    entry = None
+    if PIPELINE_STAGE_E2 in checkpoints:
+        entry = db.get(
+            KnowledgeEntry, uuid.UUID(checkpoints[PIPELINE_STAGE_E2]["knowledge_entry_id"])
+        )
+        if entry is None:  # entry deleted since: the later checkpoints refer to its chunks
+            pipeline_checkpoints.clear(db, upload.id)
+            checkpoints = {}
+
+    # Same file already processed elsewhere: reuse its results without any LLM call.
+    if entry is None and _clone_identical_upload(db, upload, microconcepts):
+        return
+
+    llm_service = LLMService(rate_limit_key=str(upload.id))
+    if settings.LLM_RESPONSE_CACHE_ENABLED:
+        llm_response_cache.evict(db)
+
+    if entry is None:
+        structured = _extract_and_structure(db, upload, llm_service)
+        if structured is None:
+            return
+        entry, e2_quality = structured
+    else:
+        e2_quality = checkpoints[PIPELINE_STAGE_E2]["quality"]
+        logger.info(f"Upload {upload.id}: resuming from checkpoints {sorted(checkpoints)}")
+    chunks = _load_chunks(db, entry.id)
+
     if e2_quality.get("hallucination_risk") == "high":
         logger.warning(
             "E2 quality gate blocked: hallucination_risk=high; skipping item generation."
         )
+        _retire_previous_runs(db, upload.id, entry.id)
+        pipeline_checkpoints.mark(
+            db, upload.id, PIPELINE_STAGE_E5, {"skipped": "hallucination_risk"}
+        )
         db.commit()
+        item_pool_index.invalidate(subject_id=upload.subject_id, term_id=upload.term_id)
         return
 
     # 4. E3: Map chunks to microconcepts
@@ -372,114 +1038,156 @@ def process_content_upload(db: Session, upload_id: uuid.UUID):
     ]
     chunks_from_e2 = [{"chunk_type": "chunk", "content": chunk.content} for chunk in chunks]
 
-    try:
-        e3_result = _call_with_retries(
-            db,
-            upload_id=upload.id,
-            step=LLMRunStep.E3_MAP,
-            model=settings.LLM_MODEL_NAME,
-            prompt_version=PROMPT_VERSION_E3_MAP,
-            engine_version=LLM_ENGINE_VERSION,
-            subfolder=None,
-            knowledge_entry_id=entry.id,
-            knowledge_chunk_id=None,
-            fn=lambda: llm_service.map_chunks_to_microconcepts_e3(
-                microconcept_catalog=microconcept_catalog,
-                chunks_from_e2=chunks_from_e2,
-            ),
-        )
-
-        mapping_by_index = {m.chunk_index: m for m in e3_result.chunk_mappings}
-        for chunk in chunks:
-            mapping = mapping_by_index.get(chunk.index)
-            if not mapping:
-                continue
-            mapped_id = mapping.microconcept_match.microconcept_id
-            if not mapped_id:
-                continue
-            if mapping.confidence < e3_min_confidence:
-                continue
-            if mapped_id not in microconcept_ids:
-                continue
-            chunk.microconcept_id = mapped_id
-
-        db.flush()
-
-    except Exception as e:
-        logger.error(f"E3 failed: {e}")
-
-    # 5. E4: Generate candidate items (per chunk)
-    logger.info("Running E4: Items")
-    microconcept_by_id = {mc.id: mc for mc in microconcepts}
-    candidate_items: list[dict] = []
-
-    for chunk in chunks:
+    # A failed mapping is not retried on resume: chunks keep the default microconcept.
+    if PIPELINE_STAGE_E3 not in checkpoints:
         try:
-            e4_result = _call_with_retries(
+            e3_result = _call_with_retries(
                 db,
                 upload_id=upload.id,
-                step=LLMRunStep.E4_ITEMS,
+                step=LLMRunStep.E3_MAP,
                 model=settings.LLM_MODEL_NAME,
-                prompt_version=PROMPT_VERSION_E4_ITEMS,
+                prompt_version=PROMPT_VERSION_E3_MAP,
                 engine_version=LLM_ENGINE_VERSION,
-                subfolder=str(chunk.id),
+                subfolder=None,
                 knowledge_entry_id=entry.id,
-                knowledge_chunk_id=chunk.id,
-                fn=lambda c=chunk.content: llm_service.generate_items_e4(c, quantity=2),
+                knowledge_chunk_id=None,
+                fn=lambda: llm_service.map_chunks_to_microconcepts_e3(
+                    microconcept_catalog=microconcept_catalog,
+                    chunks_from_e2=chunks_from_e2,
+                ),
+                cache_input={
+                    "microconcept_catalog": microconcept_catalog,
+                    "chunks_from_e2": chunks_from_e2,
+                },
+                result_type=E3MapResult,
             )
 
-            chunk_microconcept_id = chunk.microconcept_id or default_microconcept.id
-            microconcept = microconcept_by_id.get(chunk_microconcept_id)
+            mapping_by_index = {m.chunk_index: m for m in e3_result.chunk_mappings}
+            for chunk in chunks:
+                mapping = mapping_by_index.get(chunk.index)
+                if not mapping:
+                    continue
+                mapped_id = mapping.microconcept_match.microconcept_id
+                if not mapped_id:
+                    continue
+                if mapping.confidence < e3_min_confidence:
+                    continue
+                if mapped_id not in microconcept_ids:
+                    continue
+                chunk.microconcept_id = mapped_id
+
+            db.flush()
+
+        except LLMCircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"E3 failed: {e}")
+        pipeline_checkpoints.mark(db, upload.id, PIPELINE_STAGE_E3)
+        db.commit()
+        chunks = _load_chunks(db, entry.id)
 
-            microconcept_ref = {
-                "microconcept_id": str(chunk_microconcept_id) if chunk_microconcept_id else None,
-                "microconcept_code": microconcept.code if microconcept else None,
-                "microconcept_name": microconcept.name if microconcept else None,
-            }
+    # 5. E4: Generate candidate items (per chunk)
+    logger.info("Running E4: Items")
+    microconcept_by_id = {mc.id: mc for mc in microconcepts}
 
-            for item_data in e4_result.items:
-                item_type = "mcq" if item_data["type"] == "multiple_choice" else "true_false"
-                candidate_items.append(
-                    {
-                        "item_type": item_type,
-                        "stem": item_data["stem"],
-                        "options": item_data.get("options"),
-                        "correct_answer": item_data["correct_answer"],
-                        "explanation": item_data.get("explanation"),
-                        "difficulty": 1.0,
-                        "microconcept_ref": microconcept_ref,
-                        "source_chunk_index": chunk.index,
-                    }
-                )
+    # Chunks are checkpointed with their candidate items in waves, so an interrupted run
+    # only generates the chunks it had not finished (or that failed).
+    e4_items: dict[int, list[dict]] = {
+        chunk.index: checkpoints[_e4_stage(chunk.index)]["items"]
+        for chunk in chunks
+        if _e4_stage(chunk.index) in checkpoints
+    }
+    pending_chunks = [chunk for chunk in chunks if chunk.index not in e4_items]
+    for wave_start in range(0, len(pending_chunks), E4_CHECKPOINT_CHUNKS):
+        wave = pending_chunks[wave_start : wave_start + E4_CHECKPOINT_CHUNKS]
+        e4_by_chunk = _generate_e4_items(
+            db, upload_id=upload.id, entry_id=entry.id, chunks=wave, llm_service=llm_service
+        )
+        for chunk in wave:
+            e4_outcome = e4_by_chunk[chunk.index]
+            try:
+                if e4_outcome.error is not None:
+                    raise e4_outcome.error
+                e4_result = e4_outcome.result
+
+                chunk_microconcept_id = chunk.microconcept_id or default_microconcept.id
+                microconcept = microconcept_by_id.get(chunk_microconcept_id)
+
+                microconcept_ref = {
+                    "microconcept_id": str(chunk_microconcept_id)
+                    if chunk_microconcept_id
+                    else None,
+                    "microconcept_code": microconcept.code if microconcept else None,
+                    "microconcept_name": microconcept.name if microconcept else None,
+                }
+
+                chunk_items: list[dict] = []
+                for item_data in e4_result.items:
+                    item_type = "mcq" if item_data["type"] == "multiple_choice" else "true_false"
+                    chunk_items.append(
+                        {
+                            "item_type": item_type,
+                            "stem": item_data["stem"],
+                            "options": item_data.get("options"),
+                            "correct_answer": item_data["correct_answer"],
+                            "explanation": item_data.get("explanation"),
+                            "difficulty": 1.0,
+                            "microconcept_ref": microconcept_ref,
+                            "source_chunk_index": chunk.index,
+                        }
+                    )
+
+            except Exception as e:
+                logger.error(f"E4 failed for chunk {chunk.id}: {e}")
+                continue
 
-        except Exception as e:
-            logger.error(f"E4 failed for chunk {chunk.id}: {e}")
-            continue
+            e4_items[chunk.index] = chunk_items
+            pipeline_checkpoints.mark(db, upload.id, _e4_stage(chunk.index), {"items": chunk_items})
+        db.commit()
+        chunks = _load_chunks(db, entry.id)
+
+    candidate_items = [item for chunk in chunks for item in e4_items.get(chunk.index, [])]
 
     # 6. E5: Validate/filter candidate items
     logger.info("Running E5: Validate")
 
     if not candidate_items:
+        _retire_previous_runs(db, upload.id, entry.id)
+        pipeline_checkpoints.mark(db, upload.id, PIPELINE_STAGE_E5, {"items": 0})
         db.commit()
+        item_pool_index.invalidate(subject_id=upload.subject_id, term_id=upload.term_id)
         logger.info("No candidate items generated")
         return
 
     try:
-        e5_result = _call_with_retries(
+        # Shards are validated concurrently; one still failing after its retries fails E5
+        # as a whole, like the single request did.
+        e5_shards = _shard_e5_candidates(candidate_items, chunks)
+        e5_inputs = [_e5_shard_input(shard, candidate_items, chunks) for shard in e5_shards]
+        e5_outcomes = _call_many_with_retries(
             db,
             upload_id=upload.id,
             step=LLMRunStep.E5_VALIDATE,
             model=settings.LLM_MODEL_NAME,
             prompt_version=PROMPT_VERSION_E5_VALIDATE,
             engine_version=LLM_ENGINE_VERSION,
-            subfolder=None,
-            knowledge_entry_id=entry.id,
-            knowledge_chunk_id=None,
-            fn=lambda: llm_service.validate_items_e5(
-                items=candidate_items,
-                chunks_from_e2=chunks_from_e2,
-            ),
+            calls=[
+                _LLMCall(
+                    fn=lambda i=e5_input: llm_service.validate_items_e5(
+                        items=i["items"], chunks_from_e2=i["chunks_from_e2"]
+                    ),
+                    subfolder=f"items:{shard[0]}-{shard[-1]}",
+                    knowledge_entry_id=entry.id,
+                    cache_input=e5_input,
+                    result_type=E5ValidationResult,
+                )
+                for shard, e5_input in zip(e5_shards, e5_inputs, strict=True)
+            ],
         )
+        for outcome in e5_outcomes:
+            if outcome.error is not None:
+                raise outcome.error
+        e5_result = _merge_e5_shards(e5_shards, [outcome.result for outcome in e5_outcomes])
 
         validated_by_index = {v.index: v for v in e5_result.validated_items}
         total_candidates = len(candidate_items)
@@ -556,6 +1264,7 @@ def process_content_upload(db: Session, upload_id: uuid.UUID):
 
             item = Item(
                 content_upload_id=upload.id,
+                knowledge_entry_id=entry.id,
                 microconcept_id=microconcept_id or default_microconcept.id,
                 type=itype,
                 stem=stem,
@@ -570,12 +1279,15 @@ def process_content_upload(db: Session, upload_id: uuid.UUID):
             )
             db.add(item)
 
+    except LLMCircuitOpenError:
+        raise
     except Exception as e:
         logger.error(f"E5 failed: {e}")
         for candidate in candidate_items:
             itype = ItemType.MCQ if candidate["item_type"] == "mcq" else ItemType.TRUE_FALSE
             item = Item(
                 content_upload_id=upload.id,
+                knowledge_entry_id=entry.id,
                 microconcept_id=default_microconcept.id,
                 type=itype,
                 stem=candidate["stem"],
@@ -590,5 +1302,10 @@ def process_content_upload(db: Session, upload_id: uuid.UUID):
             )
             db.add(item)
 
+    # Items, the previous run's retirement and the E5 checkpoint share a transaction: a
+    # resumed run never writes them twice and a reprocess replaces the earlier results.
+    _retire_previous_runs(db, upload.id, entry.id)
+    pipeline_checkpoints.mark(db, upload.id, PIPELINE_STAGE_E5, {"items": len(candidate_items)})
     db.commit()
+    item_pool_index.invalidate(subject_id=upload.subject_id, term_id=upload.term_id)
     logger.info("Processing complete")
@@ -1,14 +1,13 @@
-import json
 import uuid
 from datetime import datetime
-from decimal import Decimal
-from unicodedata import combining, normalize
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
 from app.core.deps import get_current_active_user, get_current_role_name, get_current_student
+from app.core.query_budget import query_budget
 from app.core.queue import enqueue_recalculate_metrics, is_async_queue_enabled
 from app.models.activity import (
     ActivitySession,
@@ -16,9 +15,8 @@ from app.models.activity import (
     ActivityType,
     LearningEvent,
 )
-from app.models.item import Item, ItemType
-from app.models.metric import MasteryState
-from app.models.microconcept import MicroConcept, MicroConceptPrerequisite
+from app.models.item import Item
+from app.models.role import Role
 from app.models.student import Student
 from app.models.subject import Subject
 from app.models.tutor import Tutor
@@ -28,358 +26,34 @@ from app.schemas.activity import (
     ActivitySessionFeedbackCreate,
     ActivitySessionResponse,
     ActivityTypeResponse,
+    LearningEventBatchCreate,
+    LearningEventBatchItemResult,
+    LearningEventBatchResponse,
     LearningEventCreate,
     LearningEventResponse,
 )
 from app.schemas.item import ItemResponse
+from app.services.answer_keys import answer_key_cache
+from app.services.idempotency import (
+    IDEMPOTENCY_HEADER,
+    IdempotencyKeyMismatch,
+    idempotency_service,
+)
+from app.services.item_pool import item_pool_index
 from app.services.metric_service import metric_service
+from app.services.reference_cache import reference_cache
+from app.services.session_items import session_items_cache
+from app.services.session_plan_service import session_plan_service
+from app.services.session_selection import (
+    MAX_ITEMS_PER_MICROCONCEPT,
+    _fetch_mastery_map,
+    _select_items_topk,
+    _select_prerequisite_microconcepts_v2,
+    item_types_for_activity,
+)
 
 router = APIRouter(prefix="/activities", tags=["activities"])
 
-MAX_ITEMS_PER_MICROCONCEPT = 2
-AT_RISK_PER_CYCLE = 2
-PREREQ_PER_CYCLE = 1
-IN_PROGRESS_PER_CYCLE = 1
-MAX_PREREQ_MICROCONCEPTS = 2
-
-
-def _to_float(value: float | Decimal | None) -> float:
-    if value is None:
-        return 0.0
-    if isinstance(value, Decimal):
-        return float(value)
-    return float(value)
-
-
-def _fetch_mastery_map(
-    db: Session, *, student_id: uuid.UUID, microconcept_ids: set[uuid.UUID]
-) -> dict[uuid.UUID, MasteryState]:
-    if not microconcept_ids:
-        return {}
-    rows = (
-        db.query(MasteryState)
-        .filter(
-            MasteryState.student_id == student_id,
-            MasteryState.microconcept_id.in_(microconcept_ids),
-        )
-        .all()
-    )
-    return {ms.microconcept_id: ms for ms in rows}
-
-
-def _adaptive_order_items_v1(
-    items: list[Item], mastery_by_microconcept: dict[uuid.UUID, MasteryState]
-) -> list[Item]:
-    at_risk: list[tuple[float, uuid.UUID, Item]] = []
-    in_progress: list[tuple[float, uuid.UUID, Item]] = []
-    dominant: list[tuple[float, uuid.UUID, Item]] = []
-    unknown: list[tuple[uuid.UUID, Item]] = []
-    no_microconcept: list[Item] = []
-
-    for item in items:
-        if not item.microconcept_id:
-            no_microconcept.append(item)
-            continue
-
-        ms = mastery_by_microconcept.get(item.microconcept_id)
-        if not ms:
-            unknown.append((item.id, item))
-            continue
-
-        score = _to_float(ms.mastery_score)
-        key = (score, item.id, item)
-        if ms.status == "at_risk":
-            at_risk.append(key)
-        elif ms.status == "in_progress":
-            in_progress.append(key)
-        elif ms.status == "dominant":
-            dominant.append(key)
-        else:
-            unknown.append((item.id, item))
-
-    at_risk.sort(key=lambda x: (x[0], x[1]))
-    in_progress.sort(key=lambda x: (x[0], x[1]))
-    dominant.sort(key=lambda x: (x[0], x[1]))
-    unknown.sort(key=lambda x: x[0])
-    no_microconcept.sort(key=lambda x: x.id)
-
-    at_risk_items = [i for (_score, _id, i) in at_risk]
-    in_progress_items = [i for (_score, _id, i) in in_progress]
-
-    # Interleave at_risk and in_progress to avoid bias towards a single bucket.
-    interleaved: list[Item] = []
-    a_idx = 0
-    p_idx = 0
-    while a_idx < len(at_risk_items) or p_idx < len(in_progress_items):
-        for _ in range(AT_RISK_PER_CYCLE):
-            if a_idx >= len(at_risk_items):
-                break
-            interleaved.append(at_risk_items[a_idx])
-            a_idx += 1
-        for _ in range(IN_PROGRESS_PER_CYCLE):
-            if p_idx >= len(in_progress_items):
-                break
-            interleaved.append(in_progress_items[p_idx])
-            p_idx += 1
-
-        # If one bucket is exhausted, keep draining the other.
-        if a_idx >= len(at_risk_items):
-            interleaved.extend(in_progress_items[p_idx:])
-            break
-        if p_idx >= len(in_progress_items):
-            interleaved.extend(at_risk_items[a_idx:])
-            break
-
-    ordered = interleaved
-    ordered.extend([i for (_score, _id, i) in dominant])
-    ordered.extend([i for (_id, i) in unknown])
-    ordered.extend(no_microconcept)
-    return ordered
-
-
-def _select_prerequisite_microconcepts_v2(
-    db: Session,
-    *,
-    student_id: uuid.UUID,
-    subject_id: uuid.UUID,
-    term_id: uuid.UUID,
-    mastery_by_microconcept: dict[uuid.UUID, MasteryState],
-    candidate_microconcept_ids: set[uuid.UUID],
-) -> list[uuid.UUID]:
-    targets = [
-        ms
-        for ms in mastery_by_microconcept.values()
-        if ms.status == "at_risk" and ms.last_practice_at is not None
-    ]
-    if not targets:
-        return []
-
-    target_ids = [ms.microconcept_id for ms in targets]
-
-    prereq_rows = (
-        db.query(
-            MicroConceptPrerequisite.microconcept_id,
-            MicroConceptPrerequisite.prerequisite_microconcept_id,
-        )
-        .join(
-            MicroConcept,
-            MicroConcept.id == MicroConceptPrerequisite.prerequisite_microconcept_id,
-        )
-        .filter(
-            MicroConceptPrerequisite.microconcept_id.in_(target_ids),
-            MicroConcept.subject_id == subject_id,
-            MicroConcept.term_id == term_id,
-            MicroConcept.active == True,  # noqa: E712
-        )
-        .all()
-    )
-    if not prereq_rows:
-        return []
-
-    prereq_ids = {
-        prereq_id
-        for (_mcid, prereq_id) in prereq_rows
-        if prereq_id in candidate_microconcept_ids and prereq_id not in target_ids
-    }
-    if not prereq_ids:
-        return []
-
-    scored: list[tuple[float, uuid.UUID]] = []
-    for prereq_id in prereq_ids:
-        ms = mastery_by_microconcept.get(prereq_id)
-        if not ms:
-            continue
-        score = _to_float(ms.mastery_score)
-        if score >= 0.8:
-            continue
-        scored.append((score, prereq_id))
-
-    scored.sort(key=lambda t: (t[0], t[1]))
-    return [prereq_id for (_score, prereq_id) in scored[:MAX_PREREQ_MICROCONCEPTS]]
-
-
-def _adaptive_order_items_v2(
-    db: Session,
-    *,
-    items: list[Item],
-    mastery_by_microconcept: dict[uuid.UUID, MasteryState],
-    student_id: uuid.UUID,
-    subject_id: uuid.UUID,
-    term_id: uuid.UUID,
-    candidate_microconcept_ids: set[uuid.UUID],
-) -> list[Item]:
-    prereq_microconcept_ids = set(
-        _select_prerequisite_microconcepts_v2(
-            db,
-            student_id=student_id,
-            subject_id=subject_id,
-            term_id=term_id,
-            mastery_by_microconcept=mastery_by_microconcept,
-            candidate_microconcept_ids=candidate_microconcept_ids,
-        )
-    )
-
-    if not prereq_microconcept_ids:
-        return _adaptive_order_items_v1(items, mastery_by_microconcept)
-
-    at_risk: list[tuple[float, uuid.UUID, Item]] = []
-    prereq: list[tuple[float, uuid.UUID, Item]] = []
-    in_progress: list[tuple[float, uuid.UUID, Item]] = []
-    dominant: list[tuple[float, uuid.UUID, Item]] = []
-    unknown: list[tuple[uuid.UUID, Item]] = []
-    no_microconcept: list[Item] = []
-
-    for item in items:
-        if not item.microconcept_id:
-            no_microconcept.append(item)
-            continue
-
-        ms = mastery_by_microconcept.get(item.microconcept_id)
-        if not ms:
-            unknown.append((item.id, item))
-            continue
-
-        score = _to_float(ms.mastery_score)
-        key = (score, item.id, item)
-        if ms.status == "at_risk":
-            at_risk.append(key)
-        elif item.microconcept_id in prereq_microconcept_ids:
-            prereq.append(key)
-        elif ms.status == "in_progress":
-            in_progress.append(key)
-        elif ms.status == "dominant":
-            dominant.append(key)
-        else:
-            unknown.append((item.id, item))
-
-    at_risk.sort(key=lambda x: (x[0], x[1]))
-    prereq.sort(key=lambda x: (x[0], x[1]))
-    in_progress.sort(key=lambda x: (x[0], x[1]))
-    dominant.sort(key=lambda x: (x[0], x[1]))
-    unknown.sort(key=lambda x: x[0])
-    no_microconcept.sort(key=lambda x: x.id)
-
-    at_risk_items = [i for (_score, _id, i) in at_risk]
-    prereq_items = [i for (_score, _id, i) in prereq]
-    in_progress_items = [i for (_score, _id, i) in in_progress]
-
-    interleaved: list[Item] = []
-    a_idx = 0
-    r_idx = 0
-    p_idx = 0
-
-    while a_idx < len(at_risk_items) or r_idx < len(prereq_items) or p_idx < len(in_progress_items):
-        for _ in range(AT_RISK_PER_CYCLE):
-            if a_idx >= len(at_risk_items):
-                break
-            interleaved.append(at_risk_items[a_idx])
-            a_idx += 1
-
-        for _ in range(PREREQ_PER_CYCLE):
-            if r_idx >= len(prereq_items):
-                break
-            interleaved.append(prereq_items[r_idx])
-            r_idx += 1
-
-        for _ in range(IN_PROGRESS_PER_CYCLE):
-            if p_idx >= len(in_progress_items):
-                break
-            interleaved.append(in_progress_items[p_idx])
-            p_idx += 1
-
-        if a_idx >= len(at_risk_items) and r_idx >= len(prereq_items):
-            interleaved.extend(in_progress_items[p_idx:])
-            break
-        if a_idx >= len(at_risk_items) and p_idx >= len(in_progress_items):
-            interleaved.extend(prereq_items[r_idx:])
-            break
-        if r_idx >= len(prereq_items) and p_idx >= len(in_progress_items):
-            interleaved.extend(at_risk_items[a_idx:])
-            break
-
-    ordered = interleaved
-    ordered.extend([i for (_score, _id, i) in dominant])
-    ordered.extend([i for (_id, i) in unknown])
-    ordered.extend(no_microconcept)
-    return ordered
-
-
-def _prioritize_due_microconcepts_for_review(
-    *,
-    ordered_items: list[Item],
-    mastery_by_microconcept: dict[uuid.UUID, MasteryState],
-    now: datetime,
-) -> list[Item]:
-    """
-    For REVIEW sessions, prioritize items belonging to microconcepts that are due for review.
-
-    A microconcept is considered due if:
-    - no mastery state exists (no practice yet), or
-    - recommended_next_review_at is null, or
-    - recommended_next_review_at <= now
-    """
-    due_microconcept_ids: set[uuid.UUID] = set()
-    for mcid, ms in mastery_by_microconcept.items():
-        if ms is None:
-            due_microconcept_ids.add(mcid)
-            continue
-        if ms.recommended_next_review_at is None or ms.recommended_next_review_at <= now:
-            due_microconcept_ids.add(mcid)
-
-    # Treat microconcepts with no mastery row as due (e.g., new items introduced).
-    for item in ordered_items:
-        if not item.microconcept_id:
-            continue
-        if item.microconcept_id not in mastery_by_microconcept:
-            due_microconcept_ids.add(item.microconcept_id)
-
-    if not due_microconcept_ids:
-        return ordered_items
-
-    due: list[Item] = []
-    not_due: list[Item] = []
-    for item in ordered_items:
-        if item.microconcept_id and item.microconcept_id in due_microconcept_ids:
-            due.append(item)
-        else:
-            not_due.append(item)
-
-    return due + not_due
-
-
-def _apply_microconcept_cap(
-    ordered_items: list[Item], *, item_count: int, max_per_microconcept: int
-) -> list[Item]:
-    selected: list[Item] = []
-    skipped_due_to_cap: list[Item] = []
-    counts: dict[uuid.UUID, int] = {}
-
-    for item in ordered_items:
-        if len(selected) >= item_count:
-            break
-
-        mcid = item.microconcept_id
-        if mcid and counts.get(mcid, 0) >= max_per_microconcept:
-            skipped_due_to_cap.append(item)
-            continue
-
-        selected.append(item)
-        if mcid:
-            counts[mcid] = counts.get(mcid, 0) + 1
-
-    if len(selected) >= item_count:
-        return selected
-
-    # Soft fallback: fill remaining ignoring the cap if we can't reach item_count.
-    for item in skipped_due_to_cap:
-        if len(selected) >= item_count:
-            break
-        if item in selected:
-            continue
-        selected.append(item)
-
-    return selected
-
 
 @router.get("/activity-types", response_model=list[ActivityTypeResponse])
 def list_activity_types(db: Session = Depends(get_db)):
@@ -391,6 +65,7 @@ def list_activity_types(db: Session = Depends(get_db)):
 
 
 @router.post("/sessions", response_model=ActivitySessionResponse)
+@query_budget("activity.create_session")
 def create_session(
     session_data: ActivitySessionCreate,
     db: Session = Depends(get_db),
@@ -428,94 +103,100 @@ def create_session(
     if not activity_type:
         raise HTTPException(status_code=404, detail="Activity type not found")
 
-    allowed_item_types: list[ItemType]
-    if activity_type.code == "MATCH":
-        allowed_item_types = [ItemType.MATCH]
-    elif activity_type.code == "CLOZE":
-        allowed_item_types = [ItemType.CLOZE]
-    else:
-        # Default: QUIZ-like items
-        allowed_item_types = [ItemType.MCQ, ItemType.TRUE_FALSE]
-
-    # Select items for this session (adaptive V1)
-    from app.models.content import ContentUpload
-
-    base_query = (
-        db.query(Item)
-        .join(ContentUpload, Item.content_upload_id == ContentUpload.id)
-        .filter(
-            Item.is_active.is_(True),
-            Item.type.in_(allowed_item_types),
-            ContentUpload.subject_id == session_data.subject_id,
-            ContentUpload.term_id == session_data.term_id,
+    now = datetime.utcnow()
+
+    # Use the plan precomputed when the previous session ended, if it is still fresh
+    selected_item_ids: list[uuid.UUID] | None = None
+    if session_data.content_upload_id is None:
+        selected_item_ids = session_plan_service.materialize(
+            db,
+            student_id=session_data.student_id,
+            subject_id=session_data.subject_id,
+            term_id=session_data.term_id,
+            activity_type_id=activity_type.id,
+            item_count=session_data.item_count,
+            now=now,
         )
-        .order_by(Item.id)
-    )
-    if session_data.content_upload_id:
-        base_query = base_query.filter(ContentUpload.id == session_data.content_upload_id)
 
-    candidate_items = base_query.all()
-    if not candidate_items:
-        raise HTTPException(status_code=404, detail="No items found for this subject/term")
+    if not selected_item_ids:
+        # Select items for this session (adaptive V2) from the cached candidate pool
+        candidate_items = item_pool_index.get_pool(
+            db,
+            subject_id=session_data.subject_id,
+            term_id=session_data.term_id,
+            item_types=item_types_for_activity(activity_type.code),
+            content_upload_id=session_data.content_upload_id,
+        )
+        if not candidate_items:
+            raise HTTPException(status_code=404, detail="No items found for this subject/term")
 
-    now = datetime.utcnow()
-    microconcept_ids = {i.microconcept_id for i in candidate_items if i.microconcept_id}
-    mastery_by_microconcept = _fetch_mastery_map(
-        db, student_id=session_data.student_id, microconcept_ids=microconcept_ids
-    )
+        microconcept_ids = {i.microconcept_id for i in candidate_items if i.microconcept_id}
+        mastery_by_microconcept = _fetch_mastery_map(
+            db, student_id=session_data.student_id, microconcept_ids=microconcept_ids
+        )
 
-    ordered_items = _adaptive_order_items_v2(
-        db,
-        items=candidate_items,
-        mastery_by_microconcept=mastery_by_microconcept,
-        student_id=session_data.student_id,
-        subject_id=session_data.subject_id,
-        term_id=session_data.term_id,
-        candidate_microconcept_ids=microconcept_ids,
-    )
-    if activity_type.code == "REVIEW":
-        ordered_items = _prioritize_due_microconcepts_for_review(
-            ordered_items=ordered_items,
+        prereq_microconcept_ids = set(
+            _select_prerequisite_microconcepts_v2(
+                db,
+                student_id=session_data.student_id,
+                subject_id=session_data.subject_id,
+                term_id=session_data.term_id,
+                mastery_by_microconcept=mastery_by_microconcept,
+                candidate_microconcept_ids=microconcept_ids,
+            )
+        )
+        selected_items = _select_items_topk(
+            candidate_items,
             mastery_by_microconcept=mastery_by_microconcept,
-            now=now,
+            prereq_microconcept_ids=prereq_microconcept_ids,
+            item_count=session_data.item_count,
+            max_per_microconcept=MAX_ITEMS_PER_MICROCONCEPT,
+            review_now=now if activity_type.code == "REVIEW" else None,
         )
-    selected_items = _apply_microconcept_cap(
-        ordered_items,
-        item_count=session_data.item_count,
-        max_per_microconcept=MAX_ITEMS_PER_MICROCONCEPT,
-    )
-    selected_items = selected_items[: session_data.item_count]
-
-    # Create session
-    session = ActivitySession(
-        id=uuid.uuid4(),
-        student_id=session_data.student_id,
-        activity_type_id=session_data.activity_type_id,
-        subject_id=session_data.subject_id,
-        term_id=session_data.term_id,
-        topic_id=session_data.topic_id,
-        started_at=now,
-        status="in_progress",
-        device_type=session_data.device_type,
+        selected_item_ids = [item.id for item in selected_items]
+
+    # Create the session and all its items: one INSERT each, no refresh afterwards
+    session_values = {
+        "id": uuid.uuid4(),
+        "student_id": session_data.student_id,
+        "activity_type_id": session_data.activity_type_id,
+        "subject_id": session_data.subject_id,
+        "term_id": session_data.term_id,
+        "topic_id": session_data.topic_id,
+        "started_at": now,
+        "ended_at": None,
+        "status": "in_progress",
+        "device_type": session_data.device_type,
+    }
+    created_at = db.scalar(
+        insert(ActivitySession).values(**session_values).returning(ActivitySession.created_at)
     )
-    db.add(session)
-    db.flush()
-
-    # Create session items
-    for idx, item in enumerate(selected_items):
-        session_item = ActivitySessionItem(
-            id=uuid.uuid4(),
-            session_id=session.id,
-            item_id=item.id,
-            order_index=idx,
-            presented_at=now if idx == 0 else None,
+    if selected_item_ids:  # .values([]) would compile to an INSERT of the id alone
+        db.execute(
+            insert(ActivitySessionItem).values(
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "session_id": session_values["id"],
+                        "item_id": item_id,
+                        "order_index": idx,
+                        "presented_at": now if idx == 0 else None,
+                    }
+                    for idx, item_id in enumerate(selected_item_ids)
+                ]
+            )
         )
-        db.add(session_item)
-
     db.commit()
-    db.refresh(session)
 
-    return session
+    subject_ref = reference_cache.get(db, "subject", session_data.subject_id)
+    session_items_cache.build(
+        db,
+        session_id=session_values["id"],
+        student_user_id=student.user_id,
+        tutor_user_id=subject_ref.tutor_id if subject_ref else None,
+    )
+
+    return ActivitySessionResponse(**session_values, created_at=created_at)
 
 
 @router.get("/sessions/{session_id}", response_model=ActivitySessionResponse)
@@ -549,122 +230,210 @@ def get_session(
 @router.get("/sessions/{session_id}/items", response_model=list[ItemResponse])
 def get_session_items(
     session_id: uuid.UUID,
+    after: int | None = Query(None, description="Return items after this order_index"),
+    limit: int | None = Query(None, ge=1, le=200),
+    if_none_match: str | None = Header(None, alias="If-None-Match"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ):
-    session = db.query(ActivitySession).filter_by(id=session_id).first()
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-
-    role_name = get_current_role_name(db, current_user)
-    if role_name == "student":
-        student = get_current_student(db=db, current_user=current_user)
-        if session.student_id != student.id:
-            raise HTTPException(status_code=403, detail="Not allowed")
-    elif role_name == "tutor":
-        subject = db.get(Subject, session.subject_id)
-        if subject and subject.tutor_id and subject.tutor_id != current_user.id:
-            raise HTTPException(status_code=403, detail="Not allowed")
-    else:
-        raise HTTPException(status_code=403, detail="Role not allowed")
-
-    items = (
-        db.query(Item)
-        .join(ActivitySessionItem, ActivitySessionItem.item_id == Item.id)
-        .filter(
-            ActivitySessionItem.session_id == session_id,
-            Item.is_active.is_(True),
-        )
-        .order_by(ActivitySessionItem.order_index.asc())
-        .all()
-    )
-    return items
-
+    """
+    Get the items of a session in order, optionally one page at a time.
 
-def _compute_match_correct(item: Item, response_normalized: str | None) -> bool:
-    if not response_normalized:
-        return False
-    if not item.options or not isinstance(item.options, dict):
-        return False
-    pairs = item.options.get("pairs")
-    if not isinstance(pairs, list):
-        return False
+    The payload is cached per session and served with an ETag; the ``X-Next-Cursor`` header
+    holds the ``after`` value of the next page when there is one.
+    """
+    cached = session_items_cache.get(db, session_id)
+    if cached is None:
+        raise HTTPException(status_code=404, detail="Session not found")
 
-    expected: dict[str, str] = {}
-    for pair in pairs:
-        if not isinstance(pair, dict):
-            continue
-        left = pair.get("left")
-        right = pair.get("right")
-        if isinstance(left, str) and isinstance(right, str):
-            expected[left] = right
+    # The session's student and the subject's tutor skip the role lookups.
+    if current_user.id not in (cached.student_user_id, cached.tutor_user_id):
+        role_name = get_current_role_name(db, current_user)
+        if role_name == "student":
+            student = get_current_student(db=db, current_user=current_user)
+            session_student_id = db.query(ActivitySession.student_id).filter_by(id=session_id)
+            if session_student_id.scalar() != student.id:
+                raise HTTPException(status_code=403, detail="Not allowed")
+        elif role_name == "tutor":
+            if cached.tutor_user_id and cached.tutor_user_id != current_user.id:
+                raise HTTPException(status_code=403, detail="Not allowed")
+        else:
+            raise HTTPException(status_code=403, detail="Role not allowed")
+
+    etag = cached.etag(after=after, limit=limit)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if if_none_match and (
+        if_none_match.strip() == "*"
+        or etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    ):
+        return Response(status_code=304, headers=headers)
+
+    body, next_cursor = cached.page(after=after, limit=limit)
+    if next_cursor is not None:
+        headers["X-Next-Cursor"] = str(next_cursor)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _grade_response(item: Item, event_data: LearningEventCreate) -> bool:
+    is_correct = answer_key_cache.grade(item, event_data.response_normalized)
+    return event_data.is_correct if is_correct is None else is_correct
+
+
+def _learning_event_values(
+    session_id: uuid.UUID, event_data: LearningEventCreate, item: Item
+) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "student_id": event_data.student_id,
+        "session_id": session_id,
+        "subject_id": event_data.subject_id,
+        "term_id": event_data.term_id,
+        "topic_id": event_data.topic_id,
+        "microconcept_id": event_data.microconcept_id or item.microconcept_id,
+        "activity_type_id": event_data.activity_type_id,
+        "item_id": event_data.item_id,
+        "timestamp_start": event_data.timestamp_start,
+        "timestamp_end": event_data.timestamp_end,
+        "duration_ms": event_data.duration_ms,
+        "attempt_number": event_data.attempt_number,
+        "response_normalized": event_data.response_normalized,
+        "is_correct": _grade_response(item, event_data),
+        "hint_used": event_data.hint_used,
+        "difficulty_at_time": event_data.difficulty_at_time,
+    }
 
-    if not expected:
-        return False
 
+def _replay_idempotent(
+    db: Session,
+    current_user: User,
+    endpoint: str,
+    idempotency_key: str | None,
+    request_hash: str,
+):
+    if not idempotency_key:
+        return None
     try:
-        submitted = json.loads(response_normalized)
-    except json.JSONDecodeError:
-        return False
-    if not isinstance(submitted, dict):
-        return False
-
-    normalized_submitted: dict[str, str] = {}
-    for key, value in submitted.items():
-        if isinstance(key, str) and isinstance(value, str):
-            normalized_submitted[key] = value
+        return idempotency_service.replay(
+            db,
+            user_id=current_user.id,
+            endpoint=endpoint,
+            key=idempotency_key,
+            request_hash=request_hash,
+        )
+    except IdempotencyKeyMismatch as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
 
-    return normalized_submitted == expected
 
+def _load_response_context(
+    db: Session, *, session_id: uuid.UUID, item_id: uuid.UUID, current_user: User
+):
+    """
+    Session owner and status, the user's role name, their student id and the item, resolved
+    in a single query. ``None`` when the session does not exist.
+    """
+    return (
+        db.query(
+            ActivitySession.student_id,
+            ActivitySession.status,
+            Role.name,
+            Student.id,
+            Item,
+        )
+        .select_from(ActivitySession)
+        .outerjoin(Role, Role.id == current_user.role_id)
+        .outerjoin(Student, (Student.user_id == current_user.id) | (Student.id == current_user.id))
+        .outerjoin(Item, Item.id == item_id)
+        .filter(ActivitySession.id == session_id)
+        .first()
+    )
 
-def _normalize_text(text: str) -> str:
-    # Normalize (case/whitespace/diacritics) for tolerant comparisons.
-    decomposed = normalize("NFKD", text)
-    without_diacritics = "".join(ch for ch in decomposed if not combining(ch))
-    collapsed = " ".join(without_diacritics.strip().split())
-    return collapsed.casefold()
 
+@router.post("/sessions/{session_id}/responses", response_model=LearningEventResponse)
+@query_budget("activity.record_response")
+def record_response(
+    session_id: uuid.UUID,
+    event_data: LearningEventCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    idempotency_key: str | None = Header(default=None, alias=IDEMPOTENCY_HEADER, max_length=255),
+):
+    """
+    Record a student response as a learning event.
 
-def _compute_cloze_correct(item: Item, response_normalized: str | None) -> bool:
-    if not response_normalized:
-        return False
+    A retry with the same ``Idempotency-Key`` returns the original event without a new write.
+    """
+    request_hash = idempotency_service.request_hash(
+        {"session_id": str(session_id), "response": event_data.model_dump(mode="json")}
+    )
+    replayed = _replay_idempotent(
+        db, current_user, "activity.record_response", idempotency_key, request_hash
+    )
+    if replayed is not None:
+        return replayed
 
-    submitted = _normalize_text(response_normalized)
-    if not submitted:
-        return False
+    context = _load_response_context(
+        db, session_id=session_id, item_id=event_data.item_id, current_user=current_user
+    )
+    if context is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    session_student_id, session_status, role_name, student_id, item = context
 
-    # Allow multiple acceptable answers stored as JSON array in correct_answer.
-    acceptable: list[str] = []
-    try:
-        parsed = json.loads(item.correct_answer)
-        if isinstance(parsed, list):
-            acceptable = [str(x) for x in parsed if isinstance(x, (str, int, float))]
-    except json.JSONDecodeError:
-        acceptable = []
+    if (role_name or "").casefold() != "student":
+        raise HTTPException(status_code=403, detail="Only students can submit responses")
+    if student_id is None:
+        raise HTTPException(status_code=404, detail="Student not found")
+    if event_data.student_id != student_id or session_student_id != student_id:
+        raise HTTPException(status_code=403, detail="Student mismatch")
 
-    if not acceptable:
-        acceptable = [item.correct_answer]
+    if session_status != "in_progress":
+        raise HTTPException(status_code=400, detail="Session is not in progress")
 
-    return any(_normalize_text(ans) == submitted for ans in acceptable if isinstance(ans, str))
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+    if not item.is_active:
+        raise HTTPException(status_code=400, detail="Item is not active")
 
+    # Insert the event and read back only its server-side created_at (no refresh).
+    values = _learning_event_values(session_id, event_data, item)
+    created_at = db.execute(
+        insert(LearningEvent).values(**values).returning(LearningEvent.created_at)
+    ).scalar_one()
 
-def _compute_quiz_correct(item: Item, response_normalized: str | None) -> bool:
-    if not response_normalized:
-        return False
-    return _normalize_text(response_normalized) == _normalize_text(item.correct_answer)
+    return idempotency_service.commit(
+        db,
+        user_id=current_user.id,
+        endpoint="activity.record_response",
+        key=idempotency_key,
+        request_hash=request_hash,
+        response=LearningEventResponse(**values, created_at=created_at).model_dump(mode="json"),
+    )
 
 
-@router.post("/sessions/{session_id}/responses", response_model=LearningEventResponse)
-def record_response(
+@router.post("/sessions/{session_id}/responses/batch", response_model=LearningEventBatchResponse)
+@query_budget("activity.record_responses_batch")
+def record_responses_batch(
     session_id: uuid.UUID,
-    event_data: LearningEventCreate,
+    batch: LearningEventBatchCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    idempotency_key: str | None = Header(default=None, alias=IDEMPOTENCY_HEADER, max_length=255),
 ):
     """
-    Record a student response as a learning event.
+    Record several student responses at once.
+
+    The session and student are validated once for the whole batch; each response is then
+    graded on its own and rejected individually (wrong student, unknown or inactive item)
+    without failing the others. Accepted events are inserted in a single statement.
     """
-    # Verify session exists
+    request_hash = idempotency_service.request_hash(
+        {"session_id": str(session_id), "batch": batch.model_dump(mode="json")}
+    )
+    replayed = _replay_idempotent(
+        db, current_user, "activity.record_responses_batch", idempotency_key, request_hash
+    )
+    if replayed is not None:
+        return replayed
+
     session = db.query(ActivitySession).filter_by(id=session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -673,53 +442,64 @@ def record_response(
     if role_name != "student":
         raise HTTPException(status_code=403, detail="Only students can submit responses")
     student = get_current_student(db=db, current_user=current_user)
-    if event_data.student_id != student.id or session.student_id != student.id:
+    if session.student_id != student.id:
         raise HTTPException(status_code=403, detail="Student mismatch")
 
     if session.status != "in_progress":
         raise HTTPException(status_code=400, detail="Session is not in progress")
 
-    # Get item to derive microconcept_id if not provided
-    item = db.query(Item).filter_by(id=event_data.item_id).first()
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    if not item.is_active:
-        raise HTTPException(status_code=400, detail="Item is not active")
+    item_ids = {event_data.item_id for event_data in batch.responses}
+    items_by_id = {item.id: item for item in db.query(Item).filter(Item.id.in_(item_ids)).all()}
+
+    results: list[LearningEventBatchItemResult] = []
+    pending: list[tuple[LearningEventBatchItemResult, dict]] = []
+    for index, event_data in enumerate(batch.responses):
+        item = items_by_id.get(event_data.item_id)
+        error = None
+        if event_data.student_id != student.id:
+            error = "Student mismatch"
+        elif not item:
+            error = "Item not found"
+        elif not item.is_active:
+            error = "Item is not active"
+        if error:
+            results.append(
+                LearningEventBatchItemResult(
+                    index=index, item_id=event_data.item_id, status="rejected", error=error
+                )
+            )
+            continue
 
-    is_correct = event_data.is_correct
-    if item.type == ItemType.MATCH:
-        is_correct = _compute_match_correct(item, event_data.response_normalized)
-    elif item.type == ItemType.CLOZE:
-        is_correct = _compute_cloze_correct(item, event_data.response_normalized)
-    elif item.type in (ItemType.MCQ, ItemType.TRUE_FALSE):
-        is_correct = _compute_quiz_correct(item, event_data.response_normalized)
-
-    # Create learning event
-    event = LearningEvent(
-        id=uuid.uuid4(),
-        student_id=event_data.student_id,
-        session_id=session_id,
-        subject_id=event_data.subject_id,
-        term_id=event_data.term_id,
-        topic_id=event_data.topic_id,
-        microconcept_id=event_data.microconcept_id or item.microconcept_id,
-        activity_type_id=event_data.activity_type_id,
-        item_id=event_data.item_id,
-        timestamp_start=event_data.timestamp_start,
-        timestamp_end=event_data.timestamp_end,
-        duration_ms=event_data.duration_ms,
-        attempt_number=event_data.attempt_number,
-        response_normalized=event_data.response_normalized,
-        is_correct=is_correct,
-        hint_used=event_data.hint_used,
-        difficulty_at_time=event_data.difficulty_at_time,
+        values = _learning_event_values(session_id, event_data, item)
+        result = LearningEventBatchItemResult(
+            index=index,
+            item_id=event_data.item_id,
+            status="recorded",
+            is_correct=values["is_correct"],
+        )
+        results.append(result)
+        pending.append((result, values))
+
+    if pending:
+        events = db.scalars(
+            insert(LearningEvent).returning(LearningEvent), [values for _r, values in pending]
+        ).all()
+        # Serialize before commit so the returned rows are not reloaded one by one.
+        events_by_id = {event.id: LearningEventResponse.model_validate(event) for event in events}
+        for result, values in pending:
+            result.event = events_by_id[values["id"]]
+
+    response = LearningEventBatchResponse(
+        recorded=len(pending), rejected=len(results) - len(pending), results=results
+    )
+    return idempotency_service.commit(
+        db,
+        user_id=current_user.id,
+        endpoint="activity.record_responses_batch",
+        key=idempotency_key,
+        request_hash=request_hash,
+        response=response.model_dump(mode="json"),
     )
-
-    db.add(event)
-    db.commit()
-    db.refresh(event)
-
-    return event
 
 
 @router.post("/sessions/{session_id}/end", response_model=ActivitySessionResponse)
@@ -727,10 +507,20 @@ def end_session(
     session_id: uuid.UUID,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    idempotency_key: str | None = Header(default=None, alias=IDEMPOTENCY_HEADER, max_length=255),
 ):
     """
     End an activity session and trigger metrics recalculation.
+
+    A retry with the same ``Idempotency-Key`` returns the ended session instead of a 400.
     """
+    request_hash = idempotency_service.request_hash({"session_id": str(session_id)})
+    replayed = _replay_idempotent(
+        db, current_user, "activity.end_session", idempotency_key, request_hash
+    )
+    if replayed is not None:
+        return replayed
+
     session = db.query(ActivitySession).filter_by(id=session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -748,8 +538,15 @@ def end_session(
     # Update session
     session.ended_at = datetime.utcnow()
     session.status = "completed"
-    db.commit()
-    db.refresh(session)
+    db.flush()
+    response = idempotency_service.commit(
+        db,
+        user_id=current_user.id,
+        endpoint="activity.end_session",
+        key=idempotency_key,
+        request_hash=request_hash,
+        response=ActivitySessionResponse.model_validate(session).model_dump(mode="json"),
+    )
 
     if is_async_queue_enabled():
         try:
@@ -762,15 +559,11 @@ def end_session(
             print(f"Queue unavailable (metrics): {e}")
     else:
         # Trigger metrics recalculation (async in production, sync for MVP)
-        try:
-            metric_service.recalculate_and_save_metrics(
-                db, session.student_id, session.subject_id, session.term_id
-            )
-        except Exception as e:
-            # Log error but don't fail the request
-            print(f"Error recalculating metrics: {e}")
+        metric_service.refresh_after_session(
+            db, session.student_id, session.subject_id, session.term_id
+        )
 
-    return session
+    return response
 
 
 @router.post("/sessions/{session_id}/feedback")
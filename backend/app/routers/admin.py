@@ -16,6 +16,7 @@ from app.schemas.admin import (
     AdminRecommendationCatalogResponse,
     AdminRecommendationCatalogUpdate,
 )
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -75,6 +76,7 @@ def update_recommendation_catalog(
 
     db.add(row)
     db.commit()
+    reference_cache.invalidate("catalog")
     db.refresh(row)
     return row
 
@@ -108,5 +110,6 @@ def update_activity_type(
 
     db.add(row)
     db.commit()
+    reference_cache.invalidate("activity_type")
     db.refresh(row)
     return row
@@ -28,6 +28,9 @@ from app.schemas.catalog import (
     TermSummary,
     TopicSummary,
 )
+from app.services.item_pool import item_pool_index
+from app.services.reference_cache import reference_cache
+from app.services.report_storage import purge_orphan_section_payloads
 
 router = APIRouter(prefix="/catalog", tags=["catalog"])
 
@@ -114,6 +117,7 @@ def update_subject(
 
     db.add(subject)
     db.commit()
+    reference_cache.invalidate("subject")
     db.refresh(subject)
     return subject
 
@@ -156,6 +160,11 @@ def delete_subject(
 
     db.delete(subject)
     db.commit()
+    if force:
+        # Commits per batch, so it runs once the subject is gone.
+        purge_orphan_section_payloads(db)
+    reference_cache.invalidate("subject", "topic", "microconcept")
+    item_pool_index.invalidate()
 
 
 @router.patch("/students/{student_id}", response_model=StudentSummary)
@@ -31,6 +31,7 @@ from app.models.user import User
 from app.pipelines.processing import process_content_upload
 from app.schemas.content import ContentUploadResponse
 from app.schemas.item import ItemActivationUpdate, ItemResponse
+from app.services.item_pool import item_pool_index
 from app.services.storage import StorageService
 
 # TODO: Auth dependency to get current user/tutor
@@ -66,7 +67,7 @@ def upload_content(
 
     # 1. Save file
     try:
-        storage_uri = StorageService.save_file(file)
+        stored = StorageService.save_file(file)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File storage failed: {str(e)}")
 
@@ -77,9 +78,10 @@ def upload_content(
         term_id=term_id,
         topic_id=topic_id,
         upload_type=upload_type,
-        storage_uri=storage_uri,
+        storage_uri=stored.uri,
         file_name=file.filename or "unknown",
         mime_type=file.content_type or "application/octet-stream",
+        content_sha256=stored.sha256,
         page_count=0,
     )
     db.add(db_content)
@@ -279,5 +281,6 @@ def set_item_active_state(
     item.is_active = payload.is_active
     db.add(item)
     db.commit()
+    item_pool_index.invalidate(subject_id=upload.subject_id, term_id=upload.term_id)
     db.refresh(item)
     return item
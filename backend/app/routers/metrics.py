@@ -1,19 +1,25 @@
 import uuid
+from datetime import datetime, time
 
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.core.db import get_db
 from app.core.deps import get_current_active_user, get_current_role_name, get_current_student
 from app.models.metric import MasteryState, MetricAggregate
 from app.models.microconcept import MicroConcept
+from app.models.student import Student
 from app.models.subject import Subject
 from app.models.user import User
 from app.schemas.metric import (
     MasteryStateSummary,
+    ReviewDueEntry,
     StudentMetricsSummary,
+    StudentReviewsDue,
 )
 from app.services.metric_service import metric_service
+from app.services.review_queue import review_queue
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
@@ -217,6 +223,51 @@ def get_student_mastery(
     return summaries
 
 
+@router.get("/subjects/{subject_id}/reviews/due-today", response_model=list[StudentReviewsDue])
+def get_class_reviews_due_today(
+    subject_id: uuid.UUID,
+    term_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    """
+    Get the microconcept reviews due by the end of today (UTC) for every student of a subject.
+    """
+    role_name = get_current_role_name(db, current_user)
+    if role_name != "tutor":
+        raise HTTPException(status_code=403, detail="Role not allowed")
+    subject = db.get(Subject, subject_id)
+    if not subject:
+        raise HTTPException(status_code=404, detail="Subject not found")
+    if subject.tutor_id and subject.tutor_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    end_of_day = datetime.combine(datetime.utcnow().date(), time.max)
+    entries = review_queue.due(
+        db,
+        student_ids=select(Student.id).where(Student.subject_id == subject_id),
+        subject_id=subject_id,
+        term_id=term_id,
+        now=end_of_day,
+    )
+
+    by_student: dict[uuid.UUID, list[ReviewDueEntry]] = {}
+    for entry in entries:
+        by_student.setdefault(entry.student_id, []).append(
+            ReviewDueEntry(
+                microconcept_id=entry.microconcept_id,
+                microconcept_name=entry.microconcept_name,
+                status=entry.status,
+                mastery_score=entry.mastery_score,
+                recommended_next_review_at=entry.recommended_next_review_at,
+            )
+        )
+    return [
+        StudentReviewsDue(student_id=student_id, reviews=reviews)
+        for student_id, reviews in by_student.items()
+    ]
+
+
 @router.post("/recalculate")
 def recalculate_metrics(
     student_id: uuid.UUID,
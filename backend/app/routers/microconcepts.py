@@ -18,6 +18,8 @@ from app.schemas.microconcept import (
     MicroConceptResponse,
     MicroConceptUpdate,
 )
+from app.services.item_pool import item_pool_index
+from app.services.reference_cache import reference_cache
 
 router = APIRouter(prefix="/microconcepts", tags=["microconcepts"])
 
@@ -123,6 +125,7 @@ def create_microconcept(
 
     db.add(microconcept)
     db.commit()
+    reference_cache.invalidate("microconcept")
     db.refresh(microconcept)
 
     return microconcept
@@ -172,6 +175,7 @@ def update_microconcept(
 
     db.add(microconcept)
     db.commit()
+    reference_cache.invalidate("microconcept")
     db.refresh(microconcept)
 
     return microconcept
@@ -332,6 +336,7 @@ def bootstrap_microconcepts_for_scope(
         )
         db.add(microconcept)
         db.commit()
+        reference_cache.invalidate("microconcept")
         db.refresh(microconcept)
         created = True
 
@@ -354,6 +359,7 @@ def bootstrap_microconcepts_for_scope(
     )
 
     db.commit()
+    item_pool_index.invalidate(subject_id=subject_id, term_id=term_id)
 
     return {
         "status": "success",
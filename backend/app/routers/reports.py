@@ -14,6 +14,7 @@ from app.models.subject import Subject
 from app.models.term import Term
 from app.models.user import User
 from app.schemas.report import TutorReportListItemResponse, TutorReportResponse
+from app.services.cohort_report_service import cohort_report_service
 from app.services.report_service import (
     fetch_feedback_entries,
     format_feedback_section_content,
@@ -179,12 +180,103 @@ def get_latest_student_report(
     return report
 
 
+@router.post(
+    "/cohort/generate",
+    response_model=TutorReportResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+def generate_cohort_report(
+    subject_id: uuid.UUID,
+    term_id: uuid.UUID,
+    tutor_id: uuid.UUID | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    role_name = get_current_role_name(db, current_user)
+    if role_name != "tutor":
+        raise HTTPException(status_code=403, detail="Role not allowed")
+
+    tutor = get_current_tutor(db=db, current_user=current_user)
+    if tutor_id and tutor_id != tutor.id:
+        raise HTTPException(status_code=403, detail="Tutor mismatch")
+    tutor_id = tutor.id
+
+    subject = db.get(Subject, subject_id)
+    if not subject:
+        raise HTTPException(status_code=404, detail="Subject not found")
+    if not db.get(Term, term_id):
+        raise HTTPException(status_code=404, detail="Term not found")
+    if subject.tutor_id and subject.tutor_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    try:
+        report = cohort_report_service.generate_cohort_report(
+            db,
+            tutor_id=tutor_id,
+            subject_id=subject_id,
+            term_id=term_id,
+        )
+    except SQLAlchemyError as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                "Database error generating cohort report. "
+                "If you just updated the repo, run migrations: `alembic upgrade head`."
+            ),
+        ) from exc
+
+    return report
+
+
+@router.get("/cohort/latest", response_model=TutorReportResponse)
+def get_latest_cohort_report(
+    subject_id: uuid.UUID,
+    term_id: uuid.UUID,
+    tutor_id: uuid.UUID | None = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+):
+    role_name = get_current_role_name(db, current_user)
+    if role_name != "tutor":
+        raise HTTPException(status_code=403, detail="Role not allowed")
+
+    tutor = get_current_tutor(db=db, current_user=current_user)
+    if tutor_id and tutor_id != tutor.id:
+        raise HTTPException(status_code=403, detail="Tutor mismatch")
+    tutor_id = tutor.id
+
+    subject = db.get(Subject, subject_id)
+    if subject and subject.tutor_id and subject.tutor_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not allowed")
+
+    try:
+        report = cohort_report_service.get_latest_cohort_report(
+            db,
+            tutor_id=tutor_id,
+            subject_id=subject_id,
+            term_id=term_id,
+        )
+    except SQLAlchemyError as exc:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                "Database error reading reports. "
+                "If you just updated the repo, run migrations: `alembic upgrade head`."
+            ),
+        ) from exc
+
+    if not report:
+        raise HTTPException(status_code=404, detail="No report found")
+    return report
+
+
 @router.get("", response_model=list[TutorReportListItemResponse])
 def list_reports(
     tutor_id: uuid.UUID | None = None,
     student_id: uuid.UUID | None = None,
     subject_id: uuid.UUID | None = None,
     term_id: uuid.UUID | None = None,
+    report_type: str | None = None,
     limit: int = 20,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
@@ -199,6 +291,8 @@ def list_reports(
     tutor_id = tutor.id
 
     query = db.query(TutorReport).filter(TutorReport.tutor_id == tutor_id)
+    if report_type:
+        query = query.filter(TutorReport.report_type == report_type)
     if student_id:
         query = query.filter(TutorReport.student_id == student_id)
     if subject_id:
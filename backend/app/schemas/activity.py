@@ -98,3 +98,22 @@ class LearningEventResponse(LearningEventBase):
 
     class Config:
         from_attributes = True
+
+
+class LearningEventBatchCreate(BaseModel):
+    responses: list[LearningEventCreate] = Field(min_length=1, max_length=200)
+
+
+class LearningEventBatchItemResult(BaseModel):
+    index: int
+    item_id: uuid.UUID
+    status: str  # recorded, rejected
+    is_correct: bool | None = None
+    event: LearningEventResponse | None = None
+    error: str | None = None
+
+
+class LearningEventBatchResponse(BaseModel):
+    recorded: int
+    rejected: int
+    results: list[LearningEventBatchItemResult]
@@ -29,6 +29,7 @@ class ContentUploadResponse(ContentUploadBase):
     storage_uri: str
     file_name: str
     mime_type: str
+    content_sha256: str | None = None
     page_count: int | None
     created_at: datetime | None = None
 
@@ -84,3 +84,20 @@ class MasteryStateSummary(BaseModel):
     last_practice_at: datetime | None
     recommended_next_review_at: datetime | None = None
     total_events: int
+
+
+class ReviewDueEntry(BaseModel):
+    """Microconcept review scheduled for a student"""
+
+    microconcept_id: uuid.UUID
+    microconcept_name: str
+    status: str
+    mastery_score: float
+    recommended_next_review_at: datetime
+
+
+class StudentReviewsDue(BaseModel):
+    """Reviews due for one student of a class"""
+
+    student_id: uuid.UUID
+    reviews: list[ReviewDueEntry]
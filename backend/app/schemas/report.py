@@ -20,9 +20,10 @@ class TutorReportSectionResponse(BaseModel):
 class TutorReportResponse(BaseModel):
     id: uuid.UUID
     tutor_id: uuid.UUID
-    student_id: uuid.UUID
+    student_id: uuid.UUID | None = None
     subject_id: uuid.UUID
     term_id: uuid.UUID
+    report_type: str = "student"
     engine_version: str
     ruleset_version: str
     summary: str
@@ -38,9 +39,10 @@ class TutorReportResponse(BaseModel):
 class TutorReportListItemResponse(BaseModel):
     id: uuid.UUID
     tutor_id: uuid.UUID
-    student_id: uuid.UUID
+    student_id: uuid.UUID | None = None
     subject_id: uuid.UUID
     term_id: uuid.UUID
+    report_type: str = "student"
     engine_version: str
     ruleset_version: str
     summary: str
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+from unicodedata import combining, normalize
+
+from app.core.config import settings
+from app.models.item import Item, ItemType
+
+
+def _normalize_text(text: str) -> str:
+    # Normalize (case/whitespace/diacritics) for tolerant comparisons.
+    decomposed = normalize("NFKD", text)
+    without_diacritics = "".join(ch for ch in decomposed if not combining(ch))
+    collapsed = " ".join(without_diacritics.strip().split())
+    return collapsed.casefold()
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """
+    Grading data of one item, normalized once.
+
+    ``source`` is the (type, correct_answer, options) the key was compiled from; a cached
+    key is only reused while the item still has the same source.
+    """
+
+    source: tuple[ItemType, str, Any]
+    accepted: frozenset[str] = frozenset()
+    pairs: dict[str, str] | None = None
+
+    @property
+    def item_type(self) -> ItemType:
+        return self.source[0]
+
+    def is_correct(self, response_normalized: str | None) -> bool:
+        if not response_normalized:
+            return False
+
+        if self.item_type == ItemType.MATCH:
+            if not self.pairs:
+                return False
+            try:
+                submitted = json.loads(response_normalized)
+            except json.JSONDecodeError:
+                return False
+            if not isinstance(submitted, dict):
+                return False
+            return {
+                key: value
+                for key, value in submitted.items()
+                if isinstance(key, str) and isinstance(value, str)
+            } == self.pairs
+
+        submitted = _normalize_text(response_normalized)
+        if self.item_type == ItemType.CLOZE and not submitted:
+            return False
+        return submitted in self.accepted
+
+
+def compile_answer_key(item: Item) -> AnswerKey:
+    source = (item.type, item.correct_answer, item.options)
+
+    if item.type == ItemType.MATCH:
+        pairs: dict[str, str] = {}
+        raw_pairs = item.options.get("pairs") if isinstance(item.options, dict) else None
+        if isinstance(raw_pairs, list):
+            for pair in raw_pairs:
+                if not isinstance(pair, dict):
+                    continue
+                left = pair.get("left")
+                right = pair.get("right")
+                if isinstance(left, str) and isinstance(right, str):
+                    pairs[left] = right
+        return AnswerKey(source=source, pairs=pairs)
+
+    if item.type == ItemType.CLOZE:
+        # Allow multiple acceptable answers stored as JSON array in correct_answer.
+        acceptable: list[str] = []
+        try:
+            parsed = json.loads(item.correct_answer)
+            if isinstance(parsed, list):
+                acceptable = [str(x) for x in parsed if isinstance(x, (str, int, float))]
+        except json.JSONDecodeError:
+            acceptable = []
+        if not acceptable:
+            acceptable = [item.correct_answer]
+        return AnswerKey(
+            source=source, accepted=frozenset(_normalize_text(ans) for ans in acceptable)
+        )
+
+    return AnswerKey(source=source, accepted=frozenset({_normalize_text(item.correct_answer)}))
+
+
+class AnswerKeyCache:
+    """Bounded in-process LRU of compiled answer keys by item id."""
+
+    def __init__(self, *, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._keys: OrderedDict[uuid.UUID, AnswerKey] = OrderedDict()
+
+    def get(self, item: Item) -> AnswerKey:
+        with self._lock:
+            cached = self._keys.get(item.id)
+            if cached is not None and cached.source == (
+                item.type,
+                item.correct_answer,
+                item.options,
+            ):
+                self._keys.move_to_end(item.id)
+                return cached
+
+        compiled = compile_answer_key(item)
+        with self._lock:
+            self._keys[item.id] = compiled
+            self._keys.move_to_end(item.id)
+            while len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+        return compiled
+
+    def grade(self, item: Item, response_normalized: str | None) -> bool | None:
+        """Whether the response is correct, or ``None`` for item types graded by the client."""
+        if item.type not in (ItemType.MATCH, ItemType.CLOZE, ItemType.MCQ, ItemType.TRUE_FALSE):
+            return None
+        return self.get(item).is_correct(response_normalized)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+
+answer_key_cache = AnswerKeyCache(max_entries=settings.ANSWER_KEY_CACHE_MAX_ENTRIES)
@@ -0,0 +1,394 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app.core.query_budget import query_budget
+from app.core.versioning import RECOMMENDATION_ENGINE_VERSION, RECOMMENDATION_RULESET_VERSION
+from app.models.grade import RealGrade
+from app.models.metric import MasteryState
+from app.models.microconcept import MicroConcept
+from app.models.recommendation import RecommendationInstance, RecommendationStatus
+from app.models.recommendation_catalog import RecommendationCatalog
+from app.models.report import TutorReport
+from app.models.student import Student
+from app.services.report_service import _to_float
+from app.services.report_storage import add_report_sections
+
+COHORT_REPORT_TYPE = "cohort"
+REVIEW_UPCOMING_DAYS = 7
+
+
+class CohortReportService:
+    """
+    Class-level report for a subject/term.
+
+    Every section is computed with grouped queries over the whole cohort instead of
+    building one student report per student.
+    """
+
+    def _cohort_student_ids(self, subject_id: uuid.UUID):
+        return select(Student.id).where(Student.subject_id == subject_id)
+
+    def _mastery_distribution(
+        self,
+        db: Session,
+        *,
+        cohort,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        now: datetime,
+    ) -> list[dict[str, Any]]:
+        rows = (
+            db.query(
+                MicroConcept.id,
+                MicroConcept.name,
+                func.count(MasteryState.id),
+                func.count(MasteryState.id).filter(MasteryState.status == "dominant"),
+                func.count(MasteryState.id).filter(MasteryState.status == "in_progress"),
+                func.count(MasteryState.id).filter(MasteryState.status == "at_risk"),
+                func.avg(MasteryState.mastery_score),
+                func.count(MasteryState.id).filter(MasteryState.recommended_next_review_at <= now),
+            )
+            .join(MasteryState, MasteryState.microconcept_id == MicroConcept.id)
+            .filter(
+                MicroConcept.subject_id == subject_id,
+                MicroConcept.term_id == term_id,
+                MasteryState.student_id.in_(cohort),
+            )
+            .group_by(MicroConcept.id, MicroConcept.name)
+            .order_by(MicroConcept.name)
+            .all()
+        )
+        return [
+            {
+                "microconcept_id": str(mc_id),
+                "name": name,
+                "students": total,
+                "dominant": dominant,
+                "in_progress": in_progress,
+                "at_risk": at_risk,
+                "avg_mastery_score": _to_float(avg_score),
+                "review_due": due,
+            }
+            for (mc_id, name, total, dominant, in_progress, at_risk, avg_score, due) in rows
+        ]
+
+    def _at_risk_heatmap(
+        self,
+        db: Session,
+        *,
+        cohort,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+    ) -> dict[str, dict[str, float | None]]:
+        rows = (
+            db.query(
+                MasteryState.microconcept_id,
+                MasteryState.student_id,
+                MasteryState.mastery_score,
+            )
+            .join(MicroConcept, MasteryState.microconcept_id == MicroConcept.id)
+            .filter(
+                MicroConcept.subject_id == subject_id,
+                MicroConcept.term_id == term_id,
+                MasteryState.student_id.in_(cohort),
+                MasteryState.status == "at_risk",
+            )
+            .all()
+        )
+        heatmap: dict[str, dict[str, float | None]] = {}
+        for mc_id, student_id, score in rows:
+            heatmap.setdefault(str(mc_id), {})[str(student_id)] = _to_float(score)
+        return heatmap
+
+    def _review_counts_by_student(
+        self,
+        db: Session,
+        *,
+        cohort,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        now: datetime,
+    ) -> dict[str, dict[str, int]]:
+        upcoming_end = now + timedelta(days=REVIEW_UPCOMING_DAYS)
+        rows = (
+            db.query(
+                MasteryState.student_id,
+                func.count(MasteryState.id).filter(MasteryState.recommended_next_review_at <= now),
+                func.count(MasteryState.id).filter(
+                    MasteryState.recommended_next_review_at > now,
+                    MasteryState.recommended_next_review_at <= upcoming_end,
+                ),
+            )
+            .join(MicroConcept, MasteryState.microconcept_id == MicroConcept.id)
+            .filter(
+                MicroConcept.subject_id == subject_id,
+                MicroConcept.term_id == term_id,
+                MasteryState.student_id.in_(cohort),
+            )
+            .group_by(MasteryState.student_id)
+            .all()
+        )
+        return {
+            str(student_id): {"due": due, "upcoming": upcoming}
+            for (student_id, due, upcoming) in rows
+        }
+
+    def _pending_recommendations_by_category(
+        self,
+        db: Session,
+        *,
+        cohort,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+    ) -> list[dict[str, Any]]:
+        code_expr = func.coalesce(
+            RecommendationInstance.recommendation_code, RecommendationInstance.rule_id
+        )
+        rows = (
+            db.query(
+                RecommendationCatalog.category,
+                func.count(RecommendationInstance.id),
+                func.count(func.distinct(RecommendationInstance.student_id)),
+            )
+            .select_from(RecommendationInstance)
+            .outerjoin(RecommendationCatalog, RecommendationCatalog.code == code_expr)
+            .filter(
+                RecommendationInstance.student_id.in_(cohort),
+                RecommendationInstance.status == RecommendationStatus.PENDING,
+                or_(
+                    RecommendationInstance.subject_id == subject_id,
+                    RecommendationInstance.subject_id.is_(None),
+                ),
+                or_(
+                    RecommendationInstance.term_id == term_id,
+                    RecommendationInstance.term_id.is_(None),
+                ),
+            )
+            .group_by(RecommendationCatalog.category)
+            .all()
+        )
+        entries = [
+            {"category": category or "uncategorized", "pending": pending, "students": students}
+            for (category, pending, students) in rows
+        ]
+        entries.sort(key=lambda e: (-e["pending"], e["category"]))
+        return entries
+
+    def _grade_trends(
+        self,
+        db: Session,
+        *,
+        cohort,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+    ) -> list[dict[str, Any]]:
+        month = func.date_trunc("month", RealGrade.assessment_date)
+        rows = (
+            db.query(
+                month,
+                RealGrade.grading_scale,
+                func.count(RealGrade.id),
+                func.count(func.distinct(RealGrade.student_id)),
+                func.avg(RealGrade.grade_value),
+                func.min(RealGrade.grade_value),
+                func.max(RealGrade.grade_value),
+            )
+            .filter(
+                RealGrade.student_id.in_(cohort),
+                RealGrade.subject_id == subject_id,
+                RealGrade.term_id == term_id,
+            )
+            .group_by(month, RealGrade.grading_scale)
+            .order_by(month)
+            .all()
+        )
+        return [
+            {
+                "month": period.strftime("%Y-%m") if period else None,
+                "grading_scale": scale,
+                "grades": count,
+                "students": students,
+                "average": _to_float(avg_value),
+                "min": _to_float(min_value),
+                "max": _to_float(max_value),
+            }
+            for (period, scale, count, students, avg_value, min_value, max_value) in rows
+        ]
+
+    @query_budget("reports.generate_cohort_report")
+    def generate_cohort_report(
+        self,
+        db: Session,
+        *,
+        tutor_id: uuid.UUID,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+    ) -> TutorReport:
+        now = datetime.utcnow()
+        cohort = self._cohort_student_ids(subject_id)
+
+        student_count = (
+            db.query(func.count(Student.id)).filter(Student.subject_id == subject_id).scalar() or 0
+        )
+        distribution = self._mastery_distribution(
+            db, cohort=cohort, subject_id=subject_id, term_id=term_id, now=now
+        )
+        heatmap = self._at_risk_heatmap(db, cohort=cohort, subject_id=subject_id, term_id=term_id)
+        review_by_student = self._review_counts_by_student(
+            db, cohort=cohort, subject_id=subject_id, term_id=term_id, now=now
+        )
+        pending_by_category = self._pending_recommendations_by_category(
+            db, cohort=cohort, subject_id=subject_id, term_id=term_id
+        )
+        grade_trends = self._grade_trends(db, cohort=cohort, subject_id=subject_id, term_id=term_id)
+
+        at_risk_total = sum(e["at_risk"] for e in distribution)
+        students_at_risk = len({sid for cells in heatmap.values() for sid in cells})
+        review_due_total = sum(v["due"] for v in review_by_student.values())
+        review_upcoming_total = sum(v["upcoming"] for v in review_by_student.values())
+        pending_total = sum(e["pending"] for e in pending_by_category)
+
+        hotspots = sorted(
+            (e for e in distribution if e["at_risk"]),
+            key=lambda e: (-e["at_risk"], e["name"]),
+        )
+
+        executive_lines = [
+            "Resumen de clase:",
+            f"- Alumnos: {student_count}",
+            f"- Microconceptos con datos: {len(distribution)}",
+            f"- Alumnos con algún microconcepto en riesgo: {students_at_risk}",
+            (
+                f"- Revisiones: {review_due_total} vencidas, "
+                f"{review_upcoming_total} próximas ({REVIEW_UPCOMING_DAYS} días)"
+            ),
+            f"- Recomendaciones pendientes: {pending_total}",
+        ]
+        if hotspots:
+            top = ", ".join(f"{e['name']} ({e['at_risk']})" for e in hotspots[:5])
+            executive_lines.append(f"- Microconceptos críticos: {top}")
+
+        metrics_snapshot: dict[str, Any] = {
+            "students": student_count,
+            "microconcepts": len(distribution),
+            "at_risk_states": at_risk_total,
+            "students_at_risk": students_at_risk,
+            "review_schedule": {"due": review_due_total, "upcoming": review_upcoming_total},
+            "pending_recommendations": pending_total,
+        }
+
+        distribution_lines = [
+            (
+                f"- {e['name']}: {e['dominant']} dominados, {e['in_progress']} en progreso, "
+                f"{e['at_risk']} en riesgo"
+            )
+            for e in distribution
+        ]
+        heatmap_lines = [
+            f"- {e['name']}: {e['at_risk']}/{e['students']} alumnos en riesgo" for e in hotspots
+        ]
+        review_lines = [
+            f"- {e['name']}: {e['review_due']} revisiones vencidas"
+            for e in sorted(distribution, key=lambda e: (-e["review_due"], e["name"]))
+            if e["review_due"]
+        ]
+        recommendation_lines = [
+            f"- {e['category']}: {e['pending']} pendientes ({e['students']} alumnos)"
+            for e in pending_by_category
+        ]
+        grade_lines = []
+        for e in grade_trends:
+            if e["average"] is None:
+                continue
+            scale = f" ({e['grading_scale']})" if e["grading_scale"] else ""
+            grade_lines.append(
+                f"- {e['month']}: media {e['average']:.2f}{scale} — {e['grades']} calificaciones"
+            )
+
+        report = TutorReport(
+            id=uuid.uuid4(),
+            tutor_id=tutor_id,
+            student_id=None,
+            subject_id=subject_id,
+            term_id=term_id,
+            report_type=COHORT_REPORT_TYPE,
+            engine_version=RECOMMENDATION_ENGINE_VERSION,
+            ruleset_version=RECOMMENDATION_RULESET_VERSION,
+            summary="\n".join(executive_lines),
+            metrics_snapshot=metrics_snapshot,
+            window_start=None,
+            window_end=now,
+        )
+        db.add(report)
+        db.flush()
+
+        section_specs: list[tuple[str, str, str, dict[str, Any]]] = [
+            (
+                "executive_summary",
+                "Resumen de clase",
+                "\n".join(executive_lines),
+                {"metrics": metrics_snapshot},
+            ),
+            (
+                "mastery_distribution",
+                "Distribución de dominio",
+                "\n".join(distribution_lines) or "No hay estados de dominio calculados aún.",
+                {"microconcepts": distribution},
+            ),
+            (
+                "at_risk_heatmap",
+                "Mapa de riesgo",
+                "\n".join(heatmap_lines) or "No hay microconceptos en riesgo.",
+                {"cells": heatmap},
+            ),
+            (
+                "review_schedule",
+                "Revisiones pendientes",
+                "\n".join(review_lines) or "No hay revisiones vencidas.",
+                {"by_student": review_by_student},
+            ),
+            (
+                "recommendations",
+                "Recomendaciones pendientes por categoría",
+                "\n".join(recommendation_lines) or "No hay recomendaciones pendientes.",
+                {"by_category": pending_by_category},
+            ),
+            (
+                "real_grades",
+                "Evolución de calificaciones",
+                "\n".join(grade_lines) or "No hay calificaciones registradas aún.",
+                {"trends": grade_trends},
+            ),
+        ]
+        add_report_sections(db, report, section_specs)
+
+        db.commit()
+        db.refresh(report)
+        return report
+
+    def get_latest_cohort_report(
+        self,
+        db: Session,
+        *,
+        tutor_id: uuid.UUID,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+    ) -> TutorReport | None:
+        return (
+            db.query(TutorReport)
+            .filter(
+                TutorReport.tutor_id == tutor_id,
+                TutorReport.report_type == COHORT_REPORT_TYPE,
+                TutorReport.subject_id == subject_id,
+                TutorReport.term_id == term_id,
+            )
+            .order_by(TutorReport.generated_at.desc())
+            .first()
+        )
+
+
+cohort_report_service = CohortReportService()
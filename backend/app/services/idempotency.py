@@ -0,0 +1,140 @@
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+class IdempotencyKeyMismatch(ValueError):
+    pass
+
+
+class IdempotencyService:
+    """
+    Replay the stored response of a write request retried with the same ``Idempotency-Key``.
+
+    The key row is inserted in the same transaction as the request's writes, so the unique
+    index on (user, endpoint, key) lets exactly one of two concurrent retries commit.
+    Expired keys are deleted by the periodic session sweep (``purge_expired``).
+    """
+
+    def request_hash(self, payload: Any) -> str:
+        encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def replay(
+        self,
+        db: Session,
+        *,
+        user_id: uuid.UUID,
+        endpoint: str,
+        key: str,
+        request_hash: str,
+    ) -> Any | None:
+        """Stored response for the key, or ``None`` when it is unknown or expired."""
+        row = (
+            db.query(IdempotencyKey)
+            .filter(
+                IdempotencyKey.user_id == user_id,
+                IdempotencyKey.endpoint == endpoint,
+                IdempotencyKey.key == key,
+            )
+            .first()
+        )
+        if row is None:
+            return None
+        if row.expires_at <= datetime.utcnow():
+            db.delete(row)
+            db.flush()
+            return None
+        if row.request_hash != request_hash:
+            raise IdempotencyKeyMismatch(f"{endpoint}: key reused with a different request")
+        return row.response
+
+    def commit(
+        self,
+        db: Session,
+        *,
+        user_id: uuid.UUID,
+        endpoint: str,
+        key: str | None,
+        request_hash: str,
+        response: Any,
+    ) -> Any:
+        """
+        Commit the pending writes together with ``response`` under ``key`` (if given).
+
+        When a concurrent request with the same key committed first, the writes are rolled
+        back and that request's response is returned instead.
+        """
+        if key:
+            db.add(
+                IdempotencyKey(
+                    id=uuid.uuid4(),
+                    user_id=user_id,
+                    endpoint=endpoint,
+                    key=key,
+                    request_hash=request_hash,
+                    response=response,
+                    expires_at=datetime.utcnow()
+                    + timedelta(seconds=int(settings.IDEMPOTENCY_KEY_TTL_SECONDS)),
+                )
+            )
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if not key:
+                raise
+            stored = self.replay(
+                db, user_id=user_id, endpoint=endpoint, key=key, request_hash=request_hash
+            )
+            if stored is None:
+                raise
+            return stored
+        return response
+
+    def purge_expired(
+        self, db: Session, *, now: datetime | None = None, batch_size: int | None = None
+    ) -> int:
+        """Delete expired keys in batches, each committed on its own. Returns the keys deleted."""
+        now = now or datetime.utcnow()
+        batch_size = int(batch_size or settings.IDEMPOTENCY_PURGE_BATCH_SIZE)
+
+        purged = 0
+        while True:
+            batch = (
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at <= now)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            deleted = db.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.id.in_(batch)),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+            db.commit()
+
+            purged += deleted
+            if deleted < batch_size:
+                break
+
+        if purged:
+            logger.info(f"Idempotency: purged {purged} expired keys")
+        return purged
+
+
+# Singleton instance
+idempotency_service = IdempotencyService()
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import NamedTuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.queue import _get_redis_connection, is_async_queue_enabled
+from app.models.content import ContentUpload
+from app.models.item import Item, ItemType
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "decies:item_pool:"
+
+
+class PoolItem(NamedTuple):
+    """Compact candidate used by session selection instead of a full ``Item`` row."""
+
+    id: uuid.UUID
+    microconcept_id: uuid.UUID | None
+    difficulty: int
+
+
+PoolKey = tuple[uuid.UUID, uuid.UUID, ItemType, uuid.UUID | None]
+
+
+class ItemPoolIndex:
+    """
+    Active candidate items per (subject, term, item type, upload), as id-sorted tuples.
+
+    ``upload`` is ``None`` for the pool across every upload of the subject/term. Pools are
+    kept in a bounded in-process LRU and, when the async queue (Redis) is enabled, shared
+    through Redis. Each (subject, term) scope has a generation counter; ``invalidate`` bumps
+    it so every process reloads the scope on its next read.
+    """
+
+    def __init__(self, *, max_pools: int, redis_ttl_seconds: int) -> None:
+        self.max_pools = max_pools
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._lock = threading.Lock()
+        self._pools: OrderedDict[PoolKey, tuple[int, tuple[PoolItem, ...]]] = OrderedDict()
+        self._local_generations: dict[tuple[uuid.UUID, uuid.UUID], int] = {}
+        self._global_generation = 0
+
+    def _scope_generation(self, subject_id: uuid.UUID, term_id: uuid.UUID) -> int:
+        if is_async_queue_enabled():
+            try:
+                raw = _get_redis_connection().mget(
+                    [f"{REDIS_KEY_PREFIX}gen", f"{REDIS_KEY_PREFIX}gen:{subject_id}:{term_id}"]
+                )
+                return sum(int(v) for v in raw if v is not None)
+            except Exception as exc:  # pragma: no cover - depends on Redis availability
+                logger.warning(f"Item pool: could not read generation: {exc}")
+        with self._lock:
+            return self._global_generation + self._local_generations.get((subject_id, term_id), 0)
+
+    def generation(self, subject_id: uuid.UUID, term_id: uuid.UUID) -> int:
+        """Current generation of a subject/term scope; changes whenever its pools do."""
+        return self._scope_generation(subject_id, term_id)
+
+    def invalidate(
+        self, *, subject_id: uuid.UUID | None = None, term_id: uuid.UUID | None = None
+    ) -> None:
+        """Drop the pools of a subject/term scope, or every pool when no scope is given."""
+        scoped = subject_id is not None and term_id is not None
+        with self._lock:
+            if scoped:
+                scope = (subject_id, term_id)
+                self._local_generations[scope] = self._local_generations.get(scope, 0) + 1
+                for key in [k for k in self._pools if (k[0], k[1]) == scope]:
+                    del self._pools[key]
+            else:
+                self._global_generation += 1
+                self._pools.clear()
+        if not is_async_queue_enabled():
+            return
+        try:
+            gen_key = (
+                f"{REDIS_KEY_PREFIX}gen:{subject_id}:{term_id}"
+                if scoped
+                else f"{REDIS_KEY_PREFIX}gen"
+            )
+            _get_redis_connection().incr(gen_key)
+        except Exception as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"Item pool: could not publish invalidation: {exc}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pools.clear()
+
+    def _redis_key(self, key: PoolKey, generation: int) -> str:
+        subject_id, term_id, item_type, upload_id = key
+        return (
+            f"{REDIS_KEY_PREFIX}{subject_id}:{term_id}:{item_type.value}:"
+            f"{upload_id or 'all'}:{generation}"
+        )
+
+    def _load_from_redis(self, key: PoolKey, generation: int) -> tuple[PoolItem, ...] | None:
+        if not is_async_queue_enabled():
+            return None
+        try:
+            raw = _get_redis_connection().get(self._redis_key(key, generation))
+        except Exception as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"Item pool: could not read pool from Redis: {exc}")
+            return None
+        if raw is None:
+            return None
+        return tuple(
+            PoolItem(uuid.UUID(item_id), uuid.UUID(mc_id) if mc_id else None, int(difficulty))
+            for item_id, mc_id, difficulty in json.loads(raw)
+        )
+
+    def _store_in_redis(self, key: PoolKey, generation: int, pool: tuple[PoolItem, ...]) -> None:
+        if not is_async_queue_enabled():
+            return
+        payload = json.dumps(
+            [
+                [str(p.id), str(p.microconcept_id) if p.microconcept_id else None, p.difficulty]
+                for p in pool
+            ]
+        )
+        try:
+            _get_redis_connection().set(
+                self._redis_key(key, generation), payload, ex=self.redis_ttl_seconds
+            )
+        except Exception as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"Item pool: could not store pool in Redis: {exc}")
+
+    def _load_from_db(self, db: Session, key: PoolKey) -> tuple[PoolItem, ...]:
+        subject_id, term_id, item_type, upload_id = key
+        query = (
+            db.query(Item.id, Item.microconcept_id, Item.difficulty)
+            .join(ContentUpload, Item.content_upload_id == ContentUpload.id)
+            .filter(
+                Item.is_active.is_(True),
+                Item.type == item_type,
+                ContentUpload.subject_id == subject_id,
+                ContentUpload.term_id == term_id,
+            )
+            .order_by(Item.id)
+        )
+        if upload_id:
+            query = query.filter(ContentUpload.id == upload_id)
+        return tuple(
+            PoolItem(item_id, mc_id, int(difficulty or 1))
+            for item_id, mc_id, difficulty in query.all()
+        )
+
+    def _get(self, db: Session, key: PoolKey, generation: int) -> tuple[PoolItem, ...]:
+        with self._lock:
+            cached = self._pools.get(key)
+            if cached is not None and cached[0] == generation:
+                self._pools.move_to_end(key)
+                return cached[1]
+
+        pool = self._load_from_redis(key, generation)
+        if pool is None:
+            pool = self._load_from_db(db, key)
+            self._store_in_redis(key, generation, pool)
+
+        with self._lock:
+            self._pools[key] = (generation, pool)
+            self._pools.move_to_end(key)
+            while len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+        return pool
+
+    def get_pool(
+        self,
+        db: Session,
+        *,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        item_types: Iterable[ItemType],
+        content_upload_id: uuid.UUID | None = None,
+    ) -> list[PoolItem]:
+        """Active candidates of ``item_types`` for the scope, sorted by item id."""
+        generation = self._scope_generation(subject_id, term_id)
+        pools = [
+            self._get(db, (subject_id, term_id, item_type, content_upload_id), generation)
+            for item_type in dict.fromkeys(item_types)
+        ]
+        if len(pools) == 1:
+            return list(pools[0])
+        return list(heapq.merge(*pools, key=lambda p: p.id))
+
+
+item_pool_index = ItemPoolIndex(
+    max_pools=settings.ITEM_POOL_CACHE_MAX_POOLS,
+    redis_ttl_seconds=settings.ITEM_POOL_REDIS_TTL_SECONDS,
+)
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import logging
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.llm_cache import LLMResponseCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_llm_input(value: Any) -> Any:
+    """
+    Canonical form of a prompt input: strings are NFC-normalized with whitespace runs
+    collapsed, so re-extracted text that only differs in layout maps to the same key.
+    """
+    if isinstance(value, str):
+        return " ".join(unicodedata.normalize("NFC", value).split())
+    if isinstance(value, dict):
+        return {str(k): normalize_llm_input(v) for k, v in value.items()}
+    if isinstance(value, list | tuple):
+        return [normalize_llm_input(v) for v in value]
+    return value
+
+
+class LLMResponseCache:
+    """
+    Postgres-backed cache of parsed LLM responses, content-addressed by
+    sha256(step, prompt version, model, normalized input).
+
+    Bumping a prompt version in ``app/core/llm_versioning.py`` or switching models changes
+    every key, so stale responses are never served; they simply age out. Entries older than
+    ``LLM_RESPONSE_CACHE_TTL_SECONDS`` are ignored and deleted by ``evict``, which also trims
+    the table to the ``LLM_RESPONSE_CACHE_MAX_ENTRIES`` most recently used.
+    """
+
+    def key(self, *, step: str, prompt_version: str, model: str, payload: Any) -> str:
+        encoded = json.dumps(
+            {
+                "step": step,
+                "prompt_version": prompt_version,
+                "model": model,
+                "input": normalize_llm_input(payload),
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        )
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get_many(
+        self, db: Session, keys: list[str], *, now: datetime | None = None
+    ) -> dict[str, Any]:
+        """Stored responses of the unexpired ``keys``; hits are stamped as recently used."""
+        if not keys:
+            return {}
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(seconds=int(settings.LLM_RESPONSE_CACHE_TTL_SECONDS))
+        rows = db.execute(
+            select(LLMResponseCacheEntry.key, LLMResponseCacheEntry.response).where(
+                LLMResponseCacheEntry.key.in_(set(keys)),
+                LLMResponseCacheEntry.created_at > cutoff,
+            )
+        ).all()
+        hits = {key: response for key, response in rows}
+        if hits:
+            db.execute(
+                update(LLMResponseCacheEntry)
+                .where(LLMResponseCacheEntry.key.in_(hits))
+                .values(
+                    last_used_at=now,
+                    hit_count=LLMResponseCacheEntry.hit_count + 1,
+                ),
+                execution_options={"synchronize_session": False},
+            )
+        return hits
+
+    def put_many(
+        self,
+        db: Session,
+        entries: dict[str, Any],
+        *,
+        step: str,
+        prompt_version: str,
+        model: str,
+        now: datetime | None = None,
+    ) -> None:
+        """Store responses by key, replacing expired entries left under the same key."""
+        if not entries:
+            return
+        now = now or datetime.utcnow()
+        stmt = insert(LLMResponseCacheEntry).values(
+            [
+                {
+                    "key": key,
+                    "step": step,
+                    "prompt_version": prompt_version,
+                    "model": model,
+                    "response": response,
+                    "created_at": now,
+                    "last_used_at": now,
+                }
+                for key, response in entries.items()
+            ]
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[LLMResponseCacheEntry.key],
+                set_={
+                    "response": stmt.excluded.response,
+                    "created_at": stmt.excluded.created_at,
+                    "last_used_at": stmt.excluded.last_used_at,
+                },
+            )
+        )
+
+    def evict(
+        self,
+        db: Session,
+        *,
+        now: datetime | None = None,
+        ttl_seconds: int | None = None,
+        max_entries: int | None = None,
+    ) -> int:
+        """Delete expired entries and the least recently used beyond the size limit."""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(
+            seconds=int(ttl_seconds or settings.LLM_RESPONSE_CACHE_TTL_SECONDS)
+        )
+        max_entries = int(max_entries or settings.LLM_RESPONSE_CACHE_MAX_ENTRIES)
+
+        expired = db.execute(
+            delete(LLMResponseCacheEntry).where(LLMResponseCacheEntry.created_at <= cutoff)
+        ).rowcount
+        overflow_keys = (
+            select(LLMResponseCacheEntry.key)
+            .order_by(LLMResponseCacheEntry.last_used_at.desc())
+            .offset(max_entries)
+        )
+        overflow = db.execute(
+            delete(LLMResponseCacheEntry).where(LLMResponseCacheEntry.key.in_(overflow_keys))
+        ).rowcount
+
+        evicted = (expired or 0) + (overflow or 0)
+        if evicted:
+            logger.info(f"LLM response cache: evicted {expired} expired, {overflow} over limit")
+        return evicted
+
+
+# Singleton instance
+llm_response_cache = LLMResponseCache()
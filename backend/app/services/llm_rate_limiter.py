@@ -0,0 +1,158 @@
+import logging
+import random
+import time
+
+import redis
+
+from app.core.config import settings
+from app.core.queue import _get_redis_connection, is_async_queue_enabled
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "decies:llm_rate:"
+# An upload stops counting towards the fair share once it has not asked for this long
+ACTIVE_UPLOAD_TTL_SECONDS = 15
+BUCKET_KEY_TTL_SECONDS = 120
+MAX_SLEEP_SECONDS = 2.0
+
+
+class LLMRateLimitTimeout(RuntimeError):
+    pass
+
+
+class LLMRateLimiter:
+    """
+    Token buckets in Redis shared by every worker calling the provider: one for requests and
+    one for tokens per minute (``LLM_RATE_LIMIT_RPM`` / ``LLM_RATE_LIMIT_TPM``, 0 disables).
+
+    Each upload (the caller's ``key``) that asked within ``ACTIVE_UPLOAD_TTL_SECONDS`` also gets
+    its own buckets holding an equal share of both limits, so a large upload cannot starve the
+    others. Buckets are read and updated in a WATCH/MULTI transaction. Token counts are
+    estimates; ``settle`` corrects the token buckets once the real usage is known. Without the
+    async queue (no Redis) or when Redis fails, calls are not limited.
+    """
+
+    def _limits(self) -> dict[str, float]:
+        return {
+            "requests": float(settings.LLM_RATE_LIMIT_RPM or 0),
+            "tokens": float(settings.LLM_RATE_LIMIT_TPM or 0),
+        }
+
+    def _keys(self, key: str) -> tuple[str, str, str]:
+        prefix = f"{REDIS_KEY_PREFIX}{settings.LLM_MODEL_NAME}:"
+        return f"{prefix}bucket", f"{prefix}active", f"{prefix}upload:{key}"
+
+    def enabled(self) -> bool:
+        return bool(settings.LLM_RATE_LIMIT_ENABLED) and is_async_queue_enabled()
+
+    @staticmethod
+    def _refill(state: dict, limits: dict[str, float], share: int, now: float) -> dict:
+        """Bucket levels at ``now``; capacity is one minute of the (shared) limit."""
+        last = float(state.get(b"ts", now))
+        levels = {}
+        for name, limit in limits.items():
+            capacity = limit / share
+            current = float(state.get(name.encode(), capacity))
+            levels[name] = min(capacity, current + max(0.0, now - last) * capacity / 60)
+        return levels
+
+    def try_acquire(
+        self,
+        key: str,
+        tokens: int,
+        *,
+        now: float | None = None,
+        connection: redis.Redis | None = None,
+    ) -> float:
+        """Take one request and ``tokens`` if available; otherwise the seconds to wait."""
+        limits = {name: limit for name, limit in self._limits().items() if limit > 0}
+        if not limits:
+            return 0.0
+        now = time.time() if now is None else now
+        need = {"requests": 1.0, "tokens": float(tokens)}
+        bucket_key, active_key, upload_key = self._keys(key)
+
+        def _transaction(pipe: redis.client.Pipeline) -> float:
+            active_since = now - ACTIVE_UPLOAD_TTL_SECONDS
+            own_score = pipe.zscore(active_key, key)
+            share = pipe.zcount(active_key, active_since, "+inf") + (
+                own_score is None or own_score < active_since
+            )
+            buckets = {
+                bucket_key: self._refill(pipe.hgetall(bucket_key), limits, 1, now),
+                upload_key: self._refill(pipe.hgetall(upload_key), limits, share, now),
+            }
+
+            wait = 0.0
+            for redis_key, levels in buckets.items():
+                for name, level in levels.items():
+                    capacity = limits[name] / (1 if redis_key == bucket_key else share)
+                    # A request larger than the bucket goes out once the bucket is full.
+                    missing = min(need[name], capacity) - level
+                    if missing > 0:
+                        wait = max(wait, missing * 60 / capacity)
+
+            pipe.multi()
+            pipe.zremrangebyscore(active_key, "-inf", f"({active_since}")
+            pipe.zadd(active_key, {key: now})
+            pipe.expire(active_key, BUCKET_KEY_TTL_SECONDS)
+            for redis_key, levels in buckets.items():
+                if not wait:
+                    levels = {name: level - need[name] for name, level in levels.items()}
+                pipe.hset(redis_key, mapping={**levels, "ts": now})
+                pipe.expire(redis_key, BUCKET_KEY_TTL_SECONDS)
+            return wait
+
+        connection = connection or _get_redis_connection()
+        return connection.transaction(
+            _transaction, bucket_key, active_key, upload_key, value_from_callable=True
+        )
+
+    def acquire(self, key: str, tokens: int) -> float:
+        """Block until the call may go out. Returns the seconds waited."""
+        if not self.enabled():
+            return 0.0
+        started = time.monotonic()
+        deadline = started + float(settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS)
+        while True:
+            try:
+                wait = self.try_acquire(key, tokens)
+            except redis.RedisError as exc:  # pragma: no cover - depends on Redis availability
+                logger.warning(f"LLM rate limiter: Redis unavailable, not limiting: {exc}")
+                return time.monotonic() - started
+            if not wait:
+                return time.monotonic() - started
+            if time.monotonic() + wait > deadline:
+                raise LLMRateLimitTimeout(
+                    f"LLM rate limit: no capacity for {tokens} tokens within "
+                    f"{settings.LLM_RATE_LIMIT_MAX_WAIT_SECONDS}s"
+                )
+            # Jitter keeps workers woken by the same refill from colliding again.
+            time.sleep(min(wait, MAX_SLEEP_SECONDS) + random.uniform(0, 0.05))
+
+    def settle(
+        self,
+        key: str,
+        estimated_tokens: int,
+        actual_tokens: int | None,
+        *,
+        connection: redis.Redis | None = None,
+    ) -> None:
+        """Give back (or charge) the difference between estimated and actual token usage."""
+        if actual_tokens is None or not settings.LLM_RATE_LIMIT_TPM or not self.enabled():
+            return
+        delta = estimated_tokens - actual_tokens
+        if not delta:
+            return
+        bucket_key, _active_key, upload_key = self._keys(key)
+        try:
+            connection = connection or _get_redis_connection()
+            for redis_key in (bucket_key, upload_key):
+                if connection.exists(redis_key):
+                    connection.hincrbyfloat(redis_key, "tokens", delta)
+        except redis.RedisError as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"LLM rate limiter: could not settle token usage: {exc}")
+
+
+# Singleton instance
+llm_rate_limiter = LLMRateLimiter()
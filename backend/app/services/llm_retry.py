@@ -0,0 +1,154 @@
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import openai
+import redis
+
+from app.core.config import settings
+from app.core.queue import _get_redis_connection, is_async_queue_enabled
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = "decies:llm_breaker:"
+TRANSIENT_STATUS_CODES = {408, 409, 429}
+
+
+class LLMCircuitOpenError(RuntimeError):
+    """The provider is failing for everyone: the job should wait ``retry_in`` seconds."""
+
+    def __init__(self, retry_in: float) -> None:
+        super().__init__(f"LLM circuit breaker open; retry in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+
+def is_transient_error(exc: Exception) -> bool:
+    """Provider-side failures worth backing off for: rate limits, 5xx, timeouts, network."""
+    if isinstance(exc, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in TRANSIENT_STATUS_CODES or exc.status_code >= 500
+    return False
+
+
+def retry_after_seconds(exc: Exception) -> float | None:
+    """Delay the provider asked for (``retry-after-ms`` / ``retry-after``), if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return max(0.0, float(headers["retry-after-ms"]) / 1000)
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay_seconds(attempt: int, exc: Exception) -> float:
+    """
+    Wait before attempt ``attempt + 1``: exponential backoff with full jitter, at least any
+    ``Retry-After`` the provider sent, capped at ``LLM_RETRY_MAX_DELAY_SECONDS``.
+    """
+    ceiling = float(settings.LLM_RETRY_MAX_DELAY_SECONDS)
+    backoff = min(ceiling, float(settings.LLM_RETRY_BASE_DELAY_SECONDS) * 2 ** (attempt - 1))
+    delay = random.uniform(0, backoff)
+    retry_after = retry_after_seconds(exc)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return min(delay, ceiling)
+
+
+class LLMCircuitBreaker:
+    """
+    Circuit breaker over transient provider errors, shared by every worker through Redis
+    when the async queue is enabled (per process otherwise, or when Redis fails).
+
+    ``LLM_BREAKER_FAILURE_THRESHOLD`` consecutive transient failures open it for
+    ``LLM_BREAKER_OPEN_SECONDS``. Afterwards it is half-open: one more failure opens it
+    again, a success closes it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._open_until = 0.0
+
+    def _keys(self) -> tuple[str, str]:
+        prefix = f"{REDIS_KEY_PREFIX}{settings.LLM_MODEL_NAME}:"
+        return f"{prefix}failures", f"{prefix}open"
+
+    def _redis(self) -> redis.Redis | None:
+        return _get_redis_connection() if is_async_queue_enabled() else None
+
+    def open_for(self) -> float:
+        """Seconds until the breaker lets calls through again (0 when closed)."""
+        try:
+            conn = self._redis()
+            if conn is not None:
+                return max(0, conn.pttl(self._keys()[1])) / 1000
+        except redis.RedisError as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"LLM circuit breaker: could not read state from Redis: {exc}")
+        with self._lock:
+            return max(0.0, self._open_until - time.monotonic())
+
+    def record_success(self) -> None:
+        try:
+            conn = self._redis()
+            if conn is not None:
+                conn.delete(self._keys()[0])
+                return
+        except redis.RedisError as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"LLM circuit breaker: could not record success in Redis: {exc}")
+        with self._lock:
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        threshold = max(1, int(settings.LLM_BREAKER_FAILURE_THRESHOLD))
+        open_seconds = int(settings.LLM_BREAKER_OPEN_SECONDS)
+        try:
+            conn = self._redis()
+            if conn is not None:
+                failures_key, open_key = self._keys()
+                failures = conn.incr(failures_key)
+                conn.expire(failures_key, open_seconds * 10)
+                if failures >= threshold:
+                    # Half-open after the cool-down: the next failure trips it again.
+                    conn.set(failures_key, threshold - 1, ex=open_seconds * 10)
+                    if conn.set(open_key, 1, ex=open_seconds, nx=True):
+                        logger.warning(f"LLM circuit breaker opened for {open_seconds}s")
+                return
+        except redis.RedisError as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"LLM circuit breaker: could not record failure in Redis: {exc}")
+        with self._lock:
+            self._failures += 1
+            if self._failures >= threshold:
+                self._failures = threshold - 1
+                if self._open_until <= time.monotonic():
+                    self._open_until = time.monotonic() + open_seconds
+                    logger.warning(f"LLM circuit breaker opened for {open_seconds}s")
+
+    def reset(self) -> None:
+        try:
+            conn = self._redis()
+            if conn is not None:
+                conn.delete(*self._keys())
+        except redis.RedisError as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"LLM circuit breaker: could not reset Redis state: {exc}")
+        with self._lock:
+            self._failures = 0
+            self._open_until = 0.0
+
+
+# Singleton instance
+llm_circuit_breaker = LLMCircuitBreaker()
@@ -6,10 +6,20 @@ import openai
 from pydantic import BaseModel
 
 from app.core.config import settings
+from app.services.llm_rate_limiter import llm_rate_limiter
 
 logger = logging.getLogger(__name__)
 
 
+class LLMResponseError(ValueError):
+    """The response does not fit the request; sending the same prompt again is not worth it."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (~4 characters per token), for budgeting requests."""
+    return len(text or "") // 4 + 1
+
+
 class StructureResult(BaseModel):
     summary: str
     chunks: list[str]  # Just text content for now
@@ -81,13 +91,35 @@ class E5ValidationResult(BaseModel):
 
 
 class LLMService:
-    def __init__(self):
+    def __init__(self, *, rate_limit_key: str | None = None):
         self.client = None
+        # Callers sharing the provider rate limit fairly, e.g. one key per upload
+        self.rate_limit_key = rate_limit_key or "default"
         if settings.OPENAI_API_KEY:
             self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
         else:
             logger.warning("OPENAI_API_KEY not set. LLMService will fail if called.")
 
+    def _chat_completion(self, *, messages: list[dict], **kwargs):
+        """
+        Chat completion sent once the shared rate limiter has capacity for it. The token
+        estimate covers the prompt plus ``LLM_RATE_LIMIT_COMPLETION_TOKENS`` for the answer.
+        """
+        estimated = sum(estimate_tokens(m["content"]) for m in messages) + int(
+            settings.LLM_RATE_LIMIT_COMPLETION_TOKENS
+        )
+        llm_rate_limiter.acquire(self.rate_limit_key, estimated)
+        response = self.client.chat.completions.create(
+            model=settings.LLM_MODEL_NAME, messages=messages, **kwargs
+        )
+        total_tokens = getattr(getattr(response, "usage", None), "total_tokens", None)
+        llm_rate_limiter.settle(
+            self.rate_limit_key,
+            estimated,
+            total_tokens if isinstance(total_tokens, int) else None,
+        )
+        return response
+
     def generate_structure_e2(self, text: str) -> StructureResult:
         """
         Step E2: Transforms raw text into a summary and logical chunks.
@@ -122,8 +154,7 @@ class LLMService:
         {text}
         """
 
-        response = self.client.chat.completions.create(
-            model=settings.LLM_MODEL_NAME,
+        response = self._chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -180,8 +211,7 @@ class LLMService:
         {chunk_text[:5000]}
         """
 
-        response = self.client.chat.completions.create(
-            model=settings.LLM_MODEL_NAME,
+        response = self._chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -199,6 +229,80 @@ class LLMService:
         data = json.loads(content_str)
         return ItemResult(items=data["items"])
 
+    def generate_items_e4_batch(self, chunks: list[dict], quantity: int = 2) -> ItemResult:
+        """
+        Step E4 (batched): Generates assessment items for several short chunks at once.
+
+        ``chunks`` are ``{"chunk_index": int, "content": str}``; every returned item carries
+        the ``source_chunk_index`` it was generated from. Raises ``LLMResponseError`` when the
+        response is not valid JSON or an item points at an unknown chunk, so the caller can
+        fall back to per-chunk requests. Chunks may come back without items: the caller
+        requests those on their own.
+        """
+        if not self.client:
+            raise ValueError("LLM Client not configured")
+
+        payload = {"chunks": chunks}
+
+        prompt = f"""
+        Crea {quantity} preguntas de evaluación (Opción Múltiple o Verdadero/Falso) para
+        CADA uno de los textos de la entrada, basadas estrictamente en ese texto.
+        TODAS LAS PREGUNTAS DEBEN ESTAR EN ESPAÑOL.
+        Cada pregunta indica en "source_chunk_index" el "chunk_index" del texto del que sale.
+
+        Entrada JSON:
+        {json.dumps(payload, ensure_ascii=False)}
+
+        Devuelve formato JSON:
+        {{
+            "items": [
+                {{
+                    "source_chunk_index": 0,
+                    "type": "multiple_choice",
+                    "stem": "Texto de la pregunta en español...",
+                    "options": ["Opción A", "Opción B", "Opción C", "Opción D"],
+                    "correct_answer": "Opción A",
+                    "explanation": "Explicación en español..."
+                }},
+                {{
+                    "source_chunk_index": 0,
+                    "type": "true_false",
+                    "stem": "Afirmación en español...",
+                    "options": ["Verdadero", "Falso"],
+                    "correct_answer": "Verdadero",
+                    "explanation": "Explicación en español..."
+                }}
+            ]
+        }}
+        """
+
+        response = self._chat_completion(
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "Eres un experto creador de evaluaciones. "
+                        "Genera TODO el contenido en ESPAÑOL. Output valid JSON."
+                    ),
+                },
+                {"role": "user", "content": prompt},
+            ],
+            response_format={"type": "json_object"},
+        )
+
+        content_str = response.choices[0].message.content
+        try:
+            result = ItemResult(items=json.loads(content_str)["items"])
+        except (ValueError, KeyError, TypeError) as exc:
+            raise LLMResponseError(f"E4 batch response is not valid: {exc}") from exc
+
+        expected = {chunk["chunk_index"] for chunk in chunks}
+        for item in result.items:
+            index = item.get("source_chunk_index") if isinstance(item, dict) else None
+            if index not in expected:
+                raise LLMResponseError(f"E4 batch item for unknown chunk {index!r}")
+        return result
+
     def map_chunks_to_microconcepts_e3(
         self,
         microconcept_catalog: list[dict],
@@ -245,8 +349,7 @@ class LLMService:
         }}
         """
 
-        response = self.client.chat.completions.create(
-            model=settings.LLM_MODEL_NAME,
+        response = self._chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -275,7 +378,8 @@ class LLMService:
         payload = {"items": items, "chunks_from_E2": chunks_from_e2}
 
         prompt = f"""
-        Valida cada ítem respecto al chunk indicado:
+        Valida cada ítem respecto al chunk indicado (su source_chunk_index es el
+        chunk_index de chunks_from_E2):
         1) ¿La respuesta correcta se deriva del chunk?
         2) ¿Hay ambigüedad?
         3) ¿Opciones consistentes?
@@ -322,8 +426,7 @@ class LLMService:
         }}
         """
 
-        response = self.client.chat.completions.create(
-            model=settings.LLM_MODEL_NAME,
+        response = self._chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -1,11 +1,16 @@
+import logging
 import uuid
 from datetime import datetime, timedelta
 
 from sqlalchemy.orm import Session
 
+from app.core.query_budget import query_budget
 from app.models.activity import LearningEvent
 from app.models.metric import MasteryState, MetricAggregate
 from app.models.microconcept import MicroConcept
+from app.services.session_plan_service import session_plan_service
+
+logger = logging.getLogger(__name__)
 
 
 class MetricService:
@@ -241,6 +246,7 @@ class MetricService:
 
         return mastery_states
 
+    @query_budget("metrics.recalculate")
     def recalculate_and_save_metrics(
         self,
         db: Session,
@@ -309,10 +315,39 @@ class MetricService:
                 # Create new
                 db.add(ms)
 
+        # Next-session plans were built from the previous mastery states.
+        session_plan_service.invalidate(
+            db, student_id=student_id, subject_id=subject_id, term_id=term_id
+        )
         db.commit()
 
         return metrics, mastery_states
 
+    def refresh_after_session(
+        self,
+        db: Session,
+        student_id: uuid.UUID,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+    ) -> None:
+        """
+        What a closed session (ended or abandoned) triggers without the async queue:
+        recalculate metrics, then precompute the next session plans. With the queue the
+        worker's recalculation job runs instead. Failures are logged, not raised.
+        """
+        try:
+            self.recalculate_and_save_metrics(db, student_id, subject_id, term_id)
+        except Exception:  # noqa: BLE001
+            db.rollback()
+            logger.exception(f"Error recalculating metrics for student {student_id}")
+            return
+        try:
+            session_plan_service.build_plans(db, student_id, subject_id, term_id)
+            db.commit()
+        except Exception:  # noqa: BLE001
+            db.rollback()
+            logger.exception(f"Error precomputing session plans for student {student_id}")
+
 
 # Singleton instance
 metric_service = MetricService()
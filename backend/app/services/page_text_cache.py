@@ -0,0 +1,78 @@
+import logging
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.content import PdfPageText
+from app.pipelines.extraction import PDF_EXTRACTOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class PageTextCache:
+    """
+    Extracted page texts of uploaded files, by content hash and extractor version.
+
+    A file's pages are stored together once it has been read to the end, so a hit always
+    covers the whole file. Texts of other extractor versions are dropped when a file is
+    stored again.
+    """
+
+    def get(
+        self,
+        db: Session,
+        content_sha256: str,
+        *,
+        extractor_version: str = PDF_EXTRACTOR_VERSION,
+    ) -> list[str] | None:
+        """Page texts in page order, or ``None`` when this file was not read by this version."""
+        rows = (
+            db.query(PdfPageText.content)
+            .filter(
+                PdfPageText.content_sha256 == content_sha256,
+                PdfPageText.extractor_version == extractor_version,
+            )
+            .order_by(PdfPageText.page_number.asc())
+            .all()
+        )
+        if not rows:
+            return None
+        return [row.content for row in rows]
+
+    def put(
+        self,
+        db: Session,
+        content_sha256: str,
+        pages: list[str],
+        *,
+        extractor_version: str = PDF_EXTRACTOR_VERSION,
+    ) -> None:
+        if not pages:
+            return
+        db.execute(
+            delete(PdfPageText).where(
+                PdfPageText.content_sha256 == content_sha256,
+                PdfPageText.extractor_version != extractor_version,
+            )
+        )
+        db.execute(
+            insert(PdfPageText)
+            .values(
+                [
+                    {
+                        "content_sha256": content_sha256,
+                        "extractor_version": extractor_version,
+                        "page_number": page_number,
+                        "content": content,
+                    }
+                    for page_number, content in enumerate(pages, start=1)
+                ]
+            )
+            .on_conflict_do_nothing()
+        )
+        logger.info(f"Cached text of {len(pages)} pages of file {content_sha256[:12]}")
+
+
+# Singleton instance
+page_text_cache = PageTextCache()
@@ -0,0 +1,53 @@
+import uuid
+from typing import Any
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.content import ContentPipelineCheckpoint
+
+
+class PipelineCheckpointService:
+    """
+    Completed stages of the content pipeline per upload.
+
+    A stage is marked in the same transaction as the rows it writes, so a checkpoint never
+    points at work that was rolled back; a rerun skips the marked stages.
+    """
+
+    def load(self, db: Session, upload_id: uuid.UUID) -> dict[str, Any]:
+        """Payload of each completed stage, by stage name."""
+        rows = (
+            db.query(ContentPipelineCheckpoint.stage, ContentPipelineCheckpoint.payload)
+            .filter(ContentPipelineCheckpoint.content_upload_id == upload_id)
+            .all()
+        )
+        return {stage: payload or {} for stage, payload in rows}
+
+    def mark(
+        self, db: Session, upload_id: uuid.UUID, stage: str, payload: dict | None = None
+    ) -> None:
+        stmt = insert(ContentPipelineCheckpoint).values(
+            content_upload_id=upload_id, stage=stage, payload=payload or {}
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    ContentPipelineCheckpoint.content_upload_id,
+                    ContentPipelineCheckpoint.stage,
+                ],
+                set_={"payload": stmt.excluded.payload, "completed_at": func.now()},
+            )
+        )
+
+    def clear(self, db: Session, upload_id: uuid.UUID) -> None:
+        db.execute(
+            delete(ContentPipelineCheckpoint).where(
+                ContentPipelineCheckpoint.content_upload_id == upload_id
+            )
+        )
+
+
+# Singleton instance
+pipeline_checkpoints = PipelineCheckpointService()
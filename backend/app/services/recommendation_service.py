@@ -5,6 +5,7 @@ from typing import Optional
 from sqlalchemy import func
 from sqlalchemy.orm import Session, selectinload
 
+from app.core.query_budget import query_budget
 from app.core.versioning import RECOMMENDATION_ENGINE_VERSION, RECOMMENDATION_RULESET_VERSION
 from app.models.activity import ActivitySession, ActivityType, LearningEvent
 from app.models.grade import RealGrade
@@ -17,28 +18,19 @@ from app.models.recommendation import (
     RecommendationStatus,
     TutorDecision,
 )
-from app.models.recommendation_catalog import RecommendationCatalog
 from app.schemas.recommendation import (
     RecommendationEvidenceCreate,
     TutorDecisionCreate,
 )
+from app.services.reference_cache import reference_cache
+from app.services.review_queue import review_queue
 
 
 class RecommendationService:
     """Service for generating and managing study recommendations"""
 
-    def __init__(self) -> None:
-        self._catalog_codes_cache: set[str] | None = None
-
     def _get_catalog_codes(self, db: Session) -> set[str]:
-        if self._catalog_codes_cache is None:
-            rows = (
-                db.query(RecommendationCatalog.code)
-                .filter(RecommendationCatalog.active.is_(True))
-                .all()
-            )
-            self._catalog_codes_cache = {code for (code,) in rows}
-        return self._catalog_codes_cache
+        return {code for code, entry in reference_cache.catalog(db).items() if entry.active}
 
     @staticmethod
     def _normalize_grade(*, grade_value: float | None, grading_scale: str | None) -> float | None:
@@ -67,6 +59,7 @@ class RecommendationService:
 
         return max(0.0, min(1.0, value / max_value))
 
+    @query_budget("recommendations.generate")
     def generate_recommendations(
         self,
         db: Session,
@@ -123,11 +116,9 @@ class RecommendationService:
         )
         mastery_by_microconcept_id = {ms.microconcept_id: ms for ms in mastery_states}
 
-        microconcept_name_by_id: dict[uuid.UUID, str] = {}
-        microconcept_ids = list(mastery_by_microconcept_id.keys())
-        if microconcept_ids:
-            for mc in db.query(MicroConcept).filter(MicroConcept.id.in_(microconcept_ids)).all():
-                microconcept_name_by_id[mc.id] = mc.name
+        microconcept_name_by_id = reference_cache.microconcept_names(
+            db, mastery_by_microconcept_id.keys()
+        )
 
         # 2. Rule R01: General Low Accuracy (Scope: Subject)
         # Condition: accuracy < 0.5
@@ -211,15 +202,15 @@ class RecommendationService:
                 generated_recs.append(rec)
 
         # Rule R03: Spaced review of dominant microconcepts due for review.
-        due_dominant = [
-            state
-            for state in mastery_states
-            if state.status == "dominant"
-            and state.recommended_next_review_at is not None
-            and state.recommended_next_review_at <= now
-        ]
+        due_dominant = review_queue.due(
+            db,
+            student_ids=[student_id],
+            subject_id=subject_id,
+            term_id=term_id,
+            now=now,
+            statuses=["dominant"],
+        )
         if due_dominant:
-            due_dominant.sort(key=lambda s: s.recommended_next_review_at or now)
             due_count = len(due_dominant)
             evidence: list[RecommendationEvidenceCreate] = [
                 RecommendationEvidenceCreate(
@@ -229,15 +220,13 @@ class RecommendationService:
                     description="Microconceptos dominados con repaso vencido",
                 )
             ]
-            for state in due_dominant[:5]:
+            for entry in due_dominant[:5]:
                 evidence.append(
                     RecommendationEvidenceCreate(
                         evidence_type="microconcept",
                         key="microconcept_id",
-                        value=str(state.microconcept_id),
-                        description=microconcept_name_by_id.get(
-                            state.microconcept_id, "Microconcepto"
-                        ),
+                        value=str(entry.microconcept_id),
+                        description=entry.microconcept_name,
                     )
                 )
 
@@ -498,10 +487,6 @@ class RecommendationService:
             if state.status == "at_risk" or state.mastery_score < 0.5:
                 # Get microconcept name
                 mc_name = microconcept_name_by_id.get(state.microconcept_id, "Unknown Concept")
-                if mc_name == "Unknown Concept":
-                    mc = db.get(MicroConcept, state.microconcept_id)
-                    if mc:
-                        mc_name = mc.name
 
                 rec = self._create_or_get_recommendation(
                     db,
@@ -908,28 +893,44 @@ class RecommendationService:
         # Condition: target microconcept is at_risk AND has been practiced at least once
         # (last_practice_at set).
         # Action: recommend practicing up to 2 weakest prerequisites (non-dominant).
-        for state in mastery_states:
-            if state.status != "at_risk" or not state.last_practice_at:
-                continue
-
+        r05_targets = [
+            state
+            for state in mastery_states
+            if state.status == "at_risk" and state.last_practice_at
+        ]
+        prereq_ids_by_target: dict[uuid.UUID, list[uuid.UUID]] = {}
+        if r05_targets:
             prereq_rows = (
-                db.query(MicroConceptPrerequisite.prerequisite_microconcept_id)
+                db.query(
+                    MicroConceptPrerequisite.microconcept_id,
+                    MicroConceptPrerequisite.prerequisite_microconcept_id,
+                )
                 .join(
                     MicroConcept,
                     MicroConcept.id == MicroConceptPrerequisite.prerequisite_microconcept_id,
                 )
                 .filter(
-                    MicroConceptPrerequisite.microconcept_id == state.microconcept_id,
+                    MicroConceptPrerequisite.microconcept_id.in_(
+                        [state.microconcept_id for state in r05_targets]
+                    ),
                     MicroConcept.active == True,  # noqa: E712
                 )
                 .all()
             )
-            prereq_ids = [row[0] for row in prereq_rows]
+            for target_id, prereq_id in prereq_rows:
+                prereq_ids_by_target.setdefault(target_id, []).append(prereq_id)
+        r05_names = reference_cache.microconcept_names(
+            db,
+            {state.microconcept_id for state in r05_targets}
+            | {pid for ids in prereq_ids_by_target.values() for pid in ids},
+        )
+
+        for state in r05_targets:
+            prereq_ids = prereq_ids_by_target.get(state.microconcept_id, [])
             if not prereq_ids:
                 continue
 
-            target_mc = db.get(MicroConcept, state.microconcept_id)
-            target_name = target_mc.name if target_mc else "Unknown Concept"
+            target_name = r05_names.get(state.microconcept_id, "Unknown Concept")
 
             candidates: list[tuple[uuid.UUID, float]] = []
             for prereq_id in prereq_ids:
@@ -942,8 +943,7 @@ class RecommendationService:
 
             candidates.sort(key=lambda t: t[1])
             for prereq_id, prereq_score in candidates[:2]:
-                prereq_mc = db.get(MicroConcept, prereq_id)
-                prereq_name = prereq_mc.name if prereq_mc else "Unknown Prerequisite"
+                prereq_name = r05_names.get(prereq_id, "Unknown Prerequisite")
 
                 prereq_state = mastery_by_microconcept_id.get(prereq_id)
                 prereq_status = prereq_state.status if prereq_state else "unknown"
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.queue import _get_redis_connection, is_async_queue_enabled
+from app.models.activity import ActivityType
+from app.models.microconcept import MicroConcept
+from app.models.recommendation_catalog import RecommendationCatalog
+from app.models.subject import Subject
+from app.models.term import Term
+from app.models.topic import Topic
+
+logger = logging.getLogger(__name__)
+
+REDIS_STAMP_PREFIX = "decies:reference_cache:version:"
+
+
+@dataclass(frozen=True)
+class MicroConceptRef:
+    id: uuid.UUID
+    subject_id: uuid.UUID
+    term_id: uuid.UUID | None
+    topic_id: uuid.UUID | None
+    code: str | None
+    name: str
+    active: bool
+
+
+@dataclass(frozen=True)
+class TopicRef:
+    id: uuid.UUID
+    subject_id: uuid.UUID
+    term_id: uuid.UUID | None
+    name: str
+
+
+@dataclass(frozen=True)
+class SubjectRef:
+    id: uuid.UUID
+    name: str
+    tutor_id: uuid.UUID | None
+
+
+@dataclass(frozen=True)
+class TermRef:
+    id: uuid.UUID
+    academic_year_id: uuid.UUID | None
+    code: str
+    name: str
+
+
+@dataclass(frozen=True)
+class ActivityTypeRef:
+    id: uuid.UUID
+    code: str
+    name: str
+    active: bool
+
+
+@dataclass(frozen=True)
+class CatalogRef:
+    code: str
+    title: str
+    category: str
+    active: bool
+    catalog_version: str
+
+
+@dataclass(frozen=True)
+class _KindSpec:
+    model: type
+    key_column: str
+    to_ref: Callable[[Any], Any]
+
+
+_KINDS: dict[str, _KindSpec] = {
+    "microconcept": _KindSpec(
+        model=MicroConcept,
+        key_column="id",
+        to_ref=lambda row: MicroConceptRef(
+            id=row.id,
+            subject_id=row.subject_id,
+            term_id=row.term_id,
+            topic_id=row.topic_id,
+            code=row.code,
+            name=row.name,
+            active=bool(row.active),
+        ),
+    ),
+    "topic": _KindSpec(
+        model=Topic,
+        key_column="id",
+        to_ref=lambda row: TopicRef(
+            id=row.id, subject_id=row.subject_id, term_id=row.term_id, name=row.name
+        ),
+    ),
+    "subject": _KindSpec(
+        model=Subject,
+        key_column="id",
+        to_ref=lambda row: SubjectRef(id=row.id, name=row.name, tutor_id=row.tutor_id),
+    ),
+    "term": _KindSpec(
+        model=Term,
+        key_column="id",
+        to_ref=lambda row: TermRef(
+            id=row.id, academic_year_id=row.academic_year_id, code=row.code, name=row.name
+        ),
+    ),
+    "activity_type": _KindSpec(
+        model=ActivityType,
+        key_column="id",
+        to_ref=lambda row: ActivityTypeRef(
+            id=row.id, code=row.code, name=row.name, active=bool(row.active)
+        ),
+    ),
+    "catalog": _KindSpec(
+        model=RecommendationCatalog,
+        key_column="code",
+        to_ref=lambda row: CatalogRef(
+            code=row.code,
+            title=row.title,
+            category=row.category,
+            active=bool(row.active),
+            catalog_version=row.catalog_version,
+        ),
+    ),
+}
+
+REFERENCE_KINDS = tuple(_KINDS)
+
+
+class ReferenceCache:
+    """
+    Per-process cache of near-static reference rows (microconcepts, topics, subjects,
+    terms, activity types and the recommendation catalog).
+
+    Entries are immutable snapshots built from plain column rows (never ORM instances, so
+    a session's identity map cannot hand back stale values) and can be shared across
+    sessions. Each kind is an LRU bounded by ``max_entries`` and carries a version stamp;
+    ``invalidate`` bumps the stamp and drops the kind. When the async queue is enabled the
+    stamps are mirrored in Redis so API and worker processes invalidate each other.
+    """
+
+    def __init__(self, *, max_entries: int, stamp_check_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.stamp_check_seconds = stamp_check_seconds
+        self._lock = threading.Lock()
+        self._entries: dict[str, OrderedDict[Any, Any]] = {k: OrderedDict() for k in _KINDS}
+        self._complete: dict[str, bool] = {k: False for k in _KINDS}
+        self._versions: dict[str, int] = {k: 0 for k in _KINDS}
+        self._shared_stamps: dict[str, int] = {}
+        self._shared_checked_at = 0.0
+
+    def version(self, kind: str) -> int:
+        return self._versions[kind]
+
+    def _drop(self, kind: str) -> None:
+        self._entries[kind].clear()
+        self._complete[kind] = False
+        self._versions[kind] += 1
+
+    def invalidate(self, *kinds: str) -> None:
+        targets = kinds or REFERENCE_KINDS
+        with self._lock:
+            for kind in targets:
+                self._drop(kind)
+        if not is_async_queue_enabled():
+            return
+        try:
+            redis_conn = _get_redis_connection()
+            pipe = redis_conn.pipeline()
+            for kind in targets:
+                pipe.incr(f"{REDIS_STAMP_PREFIX}{kind}")
+            stamps = pipe.execute()
+            with self._lock:
+                self._shared_stamps.update(
+                    {kind: int(stamp) for kind, stamp in zip(targets, stamps)}
+                )
+        except Exception as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"Reference cache: could not publish invalidation: {exc}")
+
+    def clear(self) -> None:
+        with self._lock:
+            for kind in _KINDS:
+                self._drop(kind)
+            self._shared_stamps.clear()
+            self._shared_checked_at = 0.0
+
+    def _sync_shared_stamps(self) -> None:
+        if not is_async_queue_enabled():
+            return
+        now = time.monotonic()
+        if now - self._shared_checked_at < self.stamp_check_seconds:
+            return
+        self._shared_checked_at = now
+        try:
+            raw = _get_redis_connection().mget([f"{REDIS_STAMP_PREFIX}{k}" for k in _KINDS])
+        except Exception as exc:  # pragma: no cover - depends on Redis availability
+            logger.warning(f"Reference cache: could not read version stamps: {exc}")
+            return
+        with self._lock:
+            for kind, value in zip(_KINDS, raw):
+                stamp = int(value) if value is not None else 0
+                if self._shared_stamps.get(kind, 0) != stamp:
+                    self._shared_stamps[kind] = stamp
+                    self._drop(kind)
+
+    def _store(self, kind: str, key: Any, ref: Any) -> None:
+        entries = self._entries[kind]
+        entries[key] = ref
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self._complete[kind] = False
+
+    def get_many(self, db: Session, kind: str, keys: Iterable[Any]) -> dict[Any, Any]:
+        """Resolve ``keys`` to snapshots, loading all misses with a single ``IN`` query."""
+        wanted = {k for k in keys if k is not None}
+        if not wanted:
+            return {}
+        self._sync_shared_stamps()
+
+        found: dict[Any, Any] = {}
+        with self._lock:
+            entries = self._entries[kind]
+            for key in wanted:
+                ref = entries.get(key)
+                if ref is not None:
+                    entries.move_to_end(key)
+                    found[key] = ref
+            version = self._versions[kind]
+
+        missing = wanted - found.keys()
+        if missing:
+            spec = _KINDS[kind]
+            column = getattr(spec.model, spec.key_column)
+            rows = db.query(*spec.model.__table__.columns).filter(column.in_(missing)).all()
+            loaded = {getattr(row, spec.key_column): spec.to_ref(row) for row in rows}
+            found.update(loaded)
+            with self._lock:
+                # Skip storing if a writer invalidated the kind while we were querying.
+                if self._versions[kind] == version:
+                    for key, ref in loaded.items():
+                        self._store(kind, key, ref)
+        return found
+
+    def get(self, db: Session, kind: str, key: Any) -> Any | None:
+        return self.get_many(db, kind, [key]).get(key)
+
+    def get_all(self, db: Session, kind: str) -> dict[Any, Any]:
+        """Load every row of a small table (e.g. the recommendation catalog) once."""
+        self._sync_shared_stamps()
+        with self._lock:
+            if self._complete[kind]:
+                return dict(self._entries[kind])
+            version = self._versions[kind]
+
+        spec = _KINDS[kind]
+        rows = db.query(*spec.model.__table__.columns).all()
+        loaded = {getattr(row, spec.key_column): spec.to_ref(row) for row in rows}
+        with self._lock:
+            if self._versions[kind] == version and len(loaded) <= self.max_entries:
+                self._entries[kind] = OrderedDict(loaded)
+                self._complete[kind] = True
+        return loaded
+
+    def microconcepts(self, db: Session, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, Any]:
+        return self.get_many(db, "microconcept", ids)
+
+    def microconcept_names(self, db: Session, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, str]:
+        return {mc_id: ref.name for mc_id, ref in self.microconcepts(db, ids).items()}
+
+    def topic_names(self, db: Session, ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, str]:
+        return {topic_id: ref.name for topic_id, ref in self.get_many(db, "topic", ids).items()}
+
+    def catalog(self, db: Session) -> dict[str, CatalogRef]:
+        return self.get_all(db, "catalog")
+
+
+reference_cache = ReferenceCache(
+    max_entries=settings.REFERENCE_CACHE_MAX_ENTRIES,
+    stamp_check_seconds=settings.REFERENCE_CACHE_STAMP_CHECK_SECONDS,
+)
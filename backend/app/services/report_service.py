@@ -1,22 +1,24 @@
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
 from typing import Any
 
 from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session, selectinload
 
+from app.core.query_budget import query_budget
 from app.core.versioning import RECOMMENDATION_ENGINE_VERSION, RECOMMENDATION_RULESET_VERSION
 from app.models.activity import ActivitySession, ActivityType
 from app.models.grade import RealGrade
 from app.models.metric import MasteryState, MetricAggregate
 from app.models.microconcept import MicroConcept
 from app.models.recommendation import RecommendationInstance, RecommendationStatus
-from app.models.recommendation_catalog import RecommendationCatalog
-from app.models.report import TutorReport, TutorReportSection
-from app.models.topic import Topic
+from app.models.report import TutorReport
 from app.services.metric_service import metric_service
 from app.services.recommendation_service import recommendation_service
+from app.services.reference_cache import reference_cache
+from app.services.report_storage import add_report_sections
+from app.services.review_queue import ReviewEntry, review_queue
 
 
 def _recommendation_code(rec: RecommendationInstance) -> str:
@@ -34,6 +36,16 @@ def _to_float(value: Any) -> float | None:
         return None
 
 
+def _review_payload(entry: ReviewEntry) -> dict[str, Any]:
+    return {
+        "microconcept_id": str(entry.microconcept_id),
+        "name": entry.microconcept_name,
+        "recommended_next_review_at": entry.recommended_next_review_at.isoformat(),
+        "status": entry.status,
+        "mastery_score": entry.mastery_score,
+    }
+
+
 def _priority_to_str(value: Any) -> str:
     if value is None:
         return ""
@@ -114,6 +126,7 @@ def format_feedback_section_content(entries: list[dict[str, Any]]) -> str:
 
 
 class ReportService:
+    @query_budget("reports.generate_student_report")
     def generate_student_report(
         self,
         db: Session,
@@ -191,21 +204,11 @@ class ReportService:
             .all()
         )
 
-        recommendation_categories: dict[str, str] = {}
-        recommendation_catalog_versions: dict[str, str] = {}
-        rec_codes = {_recommendation_code(rec) for rec in pending_recommendations}
-        if rec_codes:
-            rows = (
-                db.query(
-                    RecommendationCatalog.code,
-                    RecommendationCatalog.category,
-                    RecommendationCatalog.catalog_version,
-                )
-                .filter(RecommendationCatalog.code.in_(rec_codes))
-                .all()
-            )
-            recommendation_categories.update({code: category for code, category, _v in rows})
-            recommendation_catalog_versions.update({code: v for code, _c, v in rows})
+        catalog = reference_cache.catalog(db)
+        recommendation_categories = {code: entry.category for code, entry in catalog.items()}
+        recommendation_catalog_versions = {
+            code: entry.catalog_version for code, entry in catalog.items()
+        }
 
         accepted_recommendations = (
             db.query(RecommendationInstance)
@@ -233,20 +236,6 @@ class ReportService:
             .all()
         )
 
-        accepted_codes = {_recommendation_code(rec) for rec in accepted_recommendations}
-        if accepted_codes:
-            rows = (
-                db.query(
-                    RecommendationCatalog.code,
-                    RecommendationCatalog.category,
-                    RecommendationCatalog.catalog_version,
-                )
-                .filter(RecommendationCatalog.code.in_(accepted_codes))
-                .all()
-            )
-            recommendation_categories.update({code: category for code, category, _v in rows})
-            recommendation_catalog_versions.update({code: v for code, _c, v in rows})
-
         accepted_payload: list[dict[str, Any]] = []
         with_outcome = 0
         success_true = 0
@@ -326,15 +315,8 @@ class ReportService:
                 if tag.microconcept_id:
                     microconcept_ids.add(tag.microconcept_id)
 
-        topic_by_id: dict[uuid.UUID, str] = {}
-        if topic_ids:
-            for topic in db.query(Topic).filter(Topic.id.in_(topic_ids)).all():
-                topic_by_id[topic.id] = topic.name
-
-        microconcept_by_id: dict[uuid.UUID, str] = {}
-        if microconcept_ids:
-            for mc in db.query(MicroConcept).filter(MicroConcept.id.in_(microconcept_ids)).all():
-                microconcept_by_id[mc.id] = mc.name
+        topic_by_id = reference_cache.topic_names(db, topic_ids)
+        microconcept_by_id = reference_cache.microconcept_names(db, microconcept_ids)
 
         grade_entries: list[dict[str, Any]] = []
         grade_values: list[float] = []
@@ -400,29 +382,19 @@ class ReportService:
         at_risk_count = sum(1 for (ms, _mc) in mastery_states if ms.status == "at_risk")
 
         report_now = datetime.utcnow()
-        review_due: list[dict[str, Any]] = []
-        review_upcoming: list[dict[str, Any]] = []
-        review_unscheduled_count = 0
-        for ms, mc in mastery_states:
-            next_review = ms.recommended_next_review_at
-            if not next_review:
-                review_unscheduled_count += 1
-                continue
-
-            payload = {
-                "microconcept_id": str(ms.microconcept_id),
-                "name": mc.name,
-                "recommended_next_review_at": next_review.isoformat(),
-                "status": ms.status,
-                "mastery_score": _to_float(ms.mastery_score),
-            }
-            if next_review <= report_now:
-                review_due.append(payload)
-            elif next_review <= report_now + timedelta(days=7):
-                review_upcoming.append(payload)
-
-        review_due.sort(key=lambda e: e["recommended_next_review_at"])
-        review_upcoming.sort(key=lambda e: e["recommended_next_review_at"])
+        review_scope = {
+            "student_ids": [student_id],
+            "subject_id": subject_id,
+            "term_id": term_id,
+            "now": report_now,
+        }
+        review_due = [_review_payload(entry) for entry in review_queue.due(db, **review_scope)]
+        review_upcoming = [
+            _review_payload(entry) for entry in review_queue.upcoming(db, **review_scope, days=7)
+        ]
+        review_unscheduled_count = sum(
+            1 for (ms, _mc) in mastery_states if not ms.recommended_next_review_at
+        )
 
         accuracy = _to_float(metrics.accuracy)
         first_attempt_accuracy = _to_float(metrics.first_attempt_accuracy)
@@ -516,72 +488,57 @@ class ReportService:
         db.add(report)
         db.flush()
 
-        sections: list[TutorReportSection] = [
-            TutorReportSection(
-                id=uuid.uuid4(),
-                report_id=report.id,
-                order_index=0,
-                section_type="executive_summary",
-                title="Resumen ejecutivo",
-                content="\n".join(executive_lines),
-                data={"metrics": metrics_snapshot},
+        section_specs: list[tuple[str, str, str, dict[str, Any] | None]] = [
+            (
+                "executive_summary",
+                "Resumen ejecutivo",
+                "\n".join(executive_lines),
+                {"metrics": metrics_snapshot},
             ),
-            TutorReportSection(
-                id=uuid.uuid4(),
-                report_id=report.id,
-                order_index=1,
-                section_type="mastery",
-                title="Estado de dominio",
-                content=(
+            (
+                "mastery",
+                "Estado de dominio",
+                (
                     f"Dominados: {dominant_count}\n"
                     f"En progreso: {in_progress_count}\n"
                     f"En riesgo: {at_risk_count}\n"
                 ),
-                data={"at_risk": at_risk},
+                {"at_risk": at_risk},
             ),
-            TutorReportSection(
-                id=uuid.uuid4(),
-                report_id=report.id,
-                order_index=2,
-                section_type="review_schedule",
-                title="Próximas revisiones",
-                content="\n".join(review_lines),
-                data={
+            (
+                "review_schedule",
+                "Próximas revisiones",
+                "\n".join(review_lines),
+                {
                     "due": review_due,
                     "upcoming": review_upcoming,
                     "unscheduled": review_unscheduled_count,
                 },
             ),
-            TutorReportSection(
-                id=uuid.uuid4(),
-                report_id=report.id,
-                order_index=3,
-                section_type="real_grades",
-                title="Calificaciones",
-                content=(
+            (
+                "real_grades",
+                "Calificaciones",
+                (
                     "\n".join([_format_grade_entry(entry) for entry in grade_entries])
                     if grade_entries
                     else "No hay calificaciones registradas aún."
                 ),
-                data={
+                {
                     "recent": grade_entries,
                     "stats": {"trend": trend_label, "average_recent": avg_label},
                 },
             ),
-            TutorReportSection(
-                id=uuid.uuid4(),
-                report_id=report.id,
-                order_index=4,
-                section_type="recommendations",
-                title="Recomendaciones activas",
-                content="\n".join(
+            (
+                "recommendations",
+                "Recomendaciones activas",
+                "\n".join(
                     [
                         f"- [{_priority_to_str(rec.priority)}] {rec.title}: {rec.description}"
                         for rec in pending_recommendations[:10]
                     ]
                 )
                 or "No hay recomendaciones pendientes.",
-                data={
+                {
                     "pending": [
                         {
                             "id": str(rec.id),
@@ -600,13 +557,10 @@ class ReportService:
                     ]
                 },
             ),
-            TutorReportSection(
-                id=uuid.uuid4(),
-                report_id=report.id,
-                order_index=5,
-                section_type="recommendation_outcomes",
-                title="Impacto de recomendaciones",
-                content=(
+            (
+                "recommendation_outcomes",
+                "Impacto de recomendaciones",
+                (
                     "No hay recomendaciones aceptadas aún."
                     if not accepted_payload
                     else (
@@ -616,7 +570,7 @@ class ReportService:
                         else "Impacto estimado (Δ) en métricas dentro de la ventana de evaluación."
                     )
                 ),
-                data={
+                {
                     "accepted": accepted_payload,
                     "stats": {
                         "total_accepted": len(accepted_payload),
@@ -627,18 +581,14 @@ class ReportService:
                     },
                 },
             ),
-            TutorReportSection(
-                id=uuid.uuid4(),
-                report_id=report.id,
-                order_index=6,
-                section_type="student_feedback",
-                title="Feedback del alumno",
-                content=format_feedback_section_content(feedback_entries),
-                data={"entries": feedback_entries},
+            (
+                "student_feedback",
+                "Feedback del alumno",
+                format_feedback_section_content(feedback_entries),
+                {"entries": feedback_entries},
             ),
         ]
-        for section in sections:
-            db.add(section)
+        add_report_sections(db, report, section_specs)
 
         db.commit()
         db.refresh(report)
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import uuid
+import zlib
+from typing import Any
+
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.report import ReportSectionPayload, TutorReport, TutorReportSection
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def section_payload_hash(content: str, data: dict[str, Any] | None) -> str:
+    return hashlib.sha256(
+        _canonical_json({"content": content, "data": data}).encode("utf-8")
+    ).hexdigest()
+
+
+def store_section_payload(db: Session, *, content: str, data: dict[str, Any] | None) -> str:
+    """
+    Store a section body once, keyed by its sha256, and return the hash.
+
+    ``data`` larger than ``REPORT_SECTION_COMPRESS_MIN_BYTES`` is kept zlib-compressed.
+    """
+    content_hash = section_payload_hash(content, data)
+    values: dict[str, Any] = {"content_hash": content_hash, "content": content, "data": data}
+
+    threshold = int(settings.REPORT_SECTION_COMPRESS_MIN_BYTES)
+    if data is not None and threshold > 0:
+        encoded = _canonical_json(data).encode("utf-8")
+        if len(encoded) >= threshold:
+            values["data"] = None
+            values["data_compressed"] = zlib.compress(encoded)
+
+    db.execute(
+        insert(ReportSectionPayload)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=["content_hash"])
+    )
+    return content_hash
+
+
+def add_report_sections(
+    db: Session,
+    report: TutorReport,
+    specs: list[tuple[str, str, str, dict[str, Any] | None]],
+) -> None:
+    """
+    Attach ``(section_type, title, content, data)`` sections to ``report`` in order.
+
+    The executive summary duplicates the report's summary and metrics_snapshot, so it is
+    stored without a body and resolved from the report on read.
+    """
+    payloads: dict[str, tuple[str, dict[str, Any] | None]] = {}
+    for order_index, (section_type, title, content, data) in enumerate(specs):
+        payload_hash = None
+        if not (
+            section_type == "executive_summary"
+            and content == report.summary
+            and data == {"metrics": report.metrics_snapshot}
+        ):
+            payload_hash = store_section_payload(db, content=content, data=data)
+            payloads[payload_hash] = (content, data)
+        db.add(
+            TutorReportSection(
+                id=uuid.uuid4(),
+                report_id=report.id,
+                order_index=order_index,
+                section_type=section_type,
+                title=title,
+                payload_hash=payload_hash,
+            )
+        )
+    _hold_section_payloads(db, payloads)
+
+
+def _hold_section_payloads(
+    db: Session, payloads: dict[str, tuple[str, dict[str, Any] | None]]
+) -> None:
+    """
+    Key-share lock stored payloads until the transaction ends, so a concurrent purge cannot
+    delete them before the sections referencing them commit. Payloads a purge deleted
+    after they were found existing are stored again.
+    """
+    pending = payloads
+    while pending:
+        held = set(
+            db.execute(
+                select(ReportSectionPayload.content_hash)
+                .where(ReportSectionPayload.content_hash.in_(list(pending)))
+                .with_for_update(key_share=True)
+            ).scalars()
+        )
+        pending = {h: body for h, body in pending.items() if h not in held}
+        for content, data in pending.values():
+            store_section_payload(db, content=content, data=data)
+
+
+def purge_orphan_section_payloads(db: Session, *, batch_size: int | None = None) -> int:
+    """
+    Delete payloads no section references any more, in batches each committed on its own.
+    Returns the payloads deleted.
+
+    Candidates are locked first, skipping those a report being generated holds, and deleted
+    by a second statement whose fresh snapshot sees sections committed in between.
+    """
+    batch_size = int(batch_size or settings.REPORT_SECTION_PURGE_BATCH_SIZE)
+    orphan = ~exists().where(TutorReportSection.payload_hash == ReportSectionPayload.content_hash)
+
+    purged = 0
+    while True:
+        batch = list(
+            db.execute(
+                select(ReportSectionPayload.content_hash)
+                .where(orphan)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ).scalars()
+        )
+        if batch:
+            purged += db.execute(
+                delete(ReportSectionPayload).where(
+                    ReportSectionPayload.content_hash.in_(batch), orphan
+                ),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+        db.commit()
+        if len(batch) < batch_size:
+            break
+    return purged
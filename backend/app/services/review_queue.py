@@ -0,0 +1,152 @@
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import Select
+from sqlalchemy.orm import Session
+
+from app.models.metric import MasteryState
+from app.models.microconcept import MicroConcept
+
+
+class ReviewEntry(NamedTuple):
+    student_id: uuid.UUID
+    microconcept_id: uuid.UUID
+    microconcept_name: str
+    status: str
+    mastery_score: float
+    recommended_next_review_at: datetime
+
+
+def is_review_due(state: MasteryState | None, now: datetime) -> bool:
+    """
+    A microconcept is due for review when it has no mastery state yet (never practiced),
+    no scheduled review, or a scheduled review at or before ``now``.
+    """
+    return (
+        state is None
+        or state.recommended_next_review_at is None
+        or state.recommended_next_review_at <= now
+    )
+
+
+class ReviewQueue:
+    """
+    Spaced-repetition reviews scheduled in ``MasteryState.recommended_next_review_at``.
+
+    Queries are range scans on the (student_id, recommended_next_review_at) index, for a
+    list of students or a class (a ``select`` of student ids), returned in review order.
+    Microconcepts without a scheduled review are not part of the queue.
+    """
+
+    def _scheduled(
+        self,
+        db: Session,
+        *,
+        student_ids: Iterable[uuid.UUID] | Select,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        after: datetime | None = None,
+        until: datetime | None = None,
+        statuses: Iterable[str] | None = None,
+        limit: int | None = None,
+    ) -> list[ReviewEntry]:
+        query = (
+            db.query(
+                MasteryState.student_id,
+                MasteryState.microconcept_id,
+                MicroConcept.name,
+                MasteryState.status,
+                MasteryState.mastery_score,
+                MasteryState.recommended_next_review_at,
+            )
+            .join(MicroConcept, MasteryState.microconcept_id == MicroConcept.id)
+            .filter(
+                MasteryState.student_id.in_(
+                    student_ids if isinstance(student_ids, Select) else list(student_ids)
+                ),
+                MasteryState.recommended_next_review_at.is_not(None),
+                MicroConcept.subject_id == subject_id,
+                MicroConcept.term_id == term_id,
+            )
+        )
+        if after is not None:
+            query = query.filter(MasteryState.recommended_next_review_at > after)
+        if until is not None:
+            query = query.filter(MasteryState.recommended_next_review_at <= until)
+        if statuses is not None:
+            query = query.filter(MasteryState.status.in_(list(statuses)))
+        query = query.order_by(
+            MasteryState.recommended_next_review_at,
+            MasteryState.student_id,
+            MasteryState.microconcept_id,
+        )
+        if limit is not None:
+            query = query.limit(limit)
+        return [
+            ReviewEntry(student_id, mc_id, name, status, float(score or 0), next_review)
+            for student_id, mc_id, name, status, score, next_review in query.all()
+        ]
+
+    def due(
+        self,
+        db: Session,
+        *,
+        student_ids: Iterable[uuid.UUID] | Select,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        now: datetime,
+        statuses: Iterable[str] | None = None,
+        limit: int | None = None,
+    ) -> list[ReviewEntry]:
+        """Reviews scheduled at or before ``now``, oldest first."""
+        return self._scheduled(
+            db,
+            student_ids=student_ids,
+            subject_id=subject_id,
+            term_id=term_id,
+            until=now,
+            statuses=statuses,
+            limit=limit,
+        )
+
+    def upcoming(
+        self,
+        db: Session,
+        *,
+        student_ids: Iterable[uuid.UUID] | Select,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        now: datetime,
+        days: int,
+        limit: int | None = None,
+    ) -> list[ReviewEntry]:
+        """Reviews falling due after ``now`` and within the next ``days`` days."""
+        return self._scheduled(
+            db,
+            student_ids=student_ids,
+            subject_id=subject_id,
+            term_id=term_id,
+            after=now,
+            until=now + timedelta(days=days),
+            limit=limit,
+        )
+
+    def next_due(
+        self,
+        db: Session,
+        *,
+        student_ids: Iterable[uuid.UUID] | Select,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        k: int,
+    ) -> list[ReviewEntry]:
+        """The ``k`` earliest scheduled reviews, overdue ones included."""
+        return self._scheduled(
+            db, student_ids=student_ids, subject_id=subject_id, term_id=term_id, limit=k
+        )
+
+
+# Singleton instance
+review_queue = ReviewQueue()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.activity import ActivitySession, ActivitySessionItem
+from app.models.item import Item
+from app.models.student import Student
+from app.models.subject import Subject
+from app.schemas.item import ItemResponse
+
+
+@dataclass(frozen=True)
+class SessionItems:
+    """
+    Serialized items of one session, in ``order_index`` order.
+
+    Session items never change once created and item content is not edited in place; only
+    an item being (de)activated changes the payload, which changes ``order_indexes``.
+    """
+
+    session_id: uuid.UUID
+    student_user_id: uuid.UUID | None
+    tutor_user_id: uuid.UUID | None
+    order_indexes: tuple[int, ...]
+    encoded: tuple[bytes, ...]
+    digest: str
+
+    def etag(self, *, after: int | None = None, limit: int | None = None) -> str:
+        if after is None and limit is None:
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{after}-{limit}"'
+
+    def page(
+        self, *, after: int | None = None, limit: int | None = None
+    ) -> tuple[bytes, int | None]:
+        """JSON array of the items after ``after`` (an order_index), and the next cursor."""
+        start = 0
+        if after is not None:
+            start = next(
+                (pos for pos, idx in enumerate(self.order_indexes) if idx > after),
+                len(self.order_indexes),
+            )
+        end = len(self.encoded) if limit is None else min(len(self.encoded), start + limit)
+        next_cursor = self.order_indexes[end - 1] if end < len(self.encoded) else None
+        return b"[" + b",".join(self.encoded[start:end]) + b"]", next_cursor
+
+
+class SessionItemsCache:
+    """
+    Bounded in-process LRU of serialized session items by session id.
+
+    Entries are built once when a session is created (or on first read in another worker)
+    and serve reloads and reconnects without loading and serializing the items again. Every
+    read still runs one query for the session's current owners and active item indexes, so
+    authorization and the payload are never staler than the database.
+    """
+
+    def __init__(self, *, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[uuid.UUID, SessionItems] = OrderedDict()
+
+    def _store(self, entry: SessionItems) -> SessionItems:
+        with self._lock:
+            self._entries[entry.session_id] = entry
+            self._entries.move_to_end(entry.session_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def build(
+        self,
+        db: Session,
+        *,
+        session_id: uuid.UUID,
+        student_user_id: uuid.UUID | None,
+        tutor_user_id: uuid.UUID | None,
+    ) -> SessionItems:
+        """Serialize the active items of a session and cache them."""
+        rows = (
+            db.query(ActivitySessionItem.order_index, Item)
+            .join(Item, ActivitySessionItem.item_id == Item.id)
+            .filter(
+                ActivitySessionItem.session_id == session_id,
+                Item.is_active.is_(True),
+            )
+            .order_by(ActivitySessionItem.order_index.asc())
+            .all()
+        )
+        encoded = tuple(
+            ItemResponse.model_validate(item).model_dump_json().encode() for _idx, item in rows
+        )
+        return self._store(
+            SessionItems(
+                session_id=session_id,
+                student_user_id=student_user_id,
+                tutor_user_id=tutor_user_id,
+                order_indexes=tuple(idx for idx, _item in rows),
+                encoded=encoded,
+                digest=hashlib.sha256(b"\n".join(encoded)).hexdigest()[:32],
+            )
+        )
+
+    def get(self, db: Session, session_id: uuid.UUID) -> SessionItems | None:
+        """
+        Items of a session with its current student and tutor; ``None`` if no session.
+
+        The cached payload is reused while the session's active item indexes match it,
+        otherwise it is rebuilt.
+        """
+        active_indexes = (
+            select(
+                func.array_agg(
+                    aggregate_order_by(
+                        ActivitySessionItem.order_index, ActivitySessionItem.order_index.asc()
+                    )
+                )
+            )
+            .join(Item, ActivitySessionItem.item_id == Item.id)
+            .where(
+                ActivitySessionItem.session_id == session_id,
+                Item.is_active.is_(True),
+            )
+            .scalar_subquery()
+        )
+        row = (
+            db.query(Student.user_id, Subject.tutor_id, active_indexes)
+            .select_from(ActivitySession)
+            .outerjoin(Student, Student.id == ActivitySession.student_id)
+            .outerjoin(Subject, Subject.id == ActivitySession.subject_id)
+            .filter(ActivitySession.id == session_id)
+            .first()
+        )
+        if row is None:
+            return None
+        student_user_id, tutor_user_id, order_indexes = row
+
+        with self._lock:
+            cached = self._entries.get(session_id)
+            if cached is not None:
+                self._entries.move_to_end(session_id)
+        if cached is None or cached.order_indexes != tuple(order_indexes or ()):
+            return self.build(
+                db,
+                session_id=session_id,
+                student_user_id=student_user_id,
+                tutor_user_id=tutor_user_id,
+            )
+        if (cached.student_user_id, cached.tutor_user_id) != (student_user_id, tutor_user_id):
+            cached = self._store(
+                dataclasses.replace(
+                    cached, student_user_id=student_user_id, tutor_user_id=tutor_user_id
+                )
+            )
+        return cached
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Singleton instance
+session_items_cache = SessionItemsCache(max_entries=settings.SESSION_ITEMS_CACHE_MAX_ENTRIES)
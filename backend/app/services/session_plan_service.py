@@ -0,0 +1,202 @@
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.query_budget import query_budget
+from app.models.activity import ActivityType, SessionPlan
+from app.models.item import Item
+from app.models.metric import MasteryState
+from app.services.item_pool import PoolItem, item_pool_index
+from app.services.session_selection import (
+    MAX_ITEMS_PER_MICROCONCEPT,
+    _fetch_mastery_map,
+    _select_items_topk,
+    _select_prerequisite_microconcepts_v2,
+    item_types_for_activity,
+)
+
+
+class SessionPlanService:
+    """
+    Precompute the next session's item order per activity type once a session ends, so
+    ``create_session`` only has to materialize it.
+
+    A plan is stale once the subject/term item pool changes (pool generation), mastery is
+    recalculated (plans are deleted), its TTL expires, one of its items is deactivated or
+    deleted or, for REVIEW, the next microconcept review falls due; ``create_session`` then
+    falls back to live selection.
+    """
+
+    def invalidate(
+        self, db: Session, *, student_id: uuid.UUID, subject_id: uuid.UUID, term_id: uuid.UUID
+    ) -> None:
+        db.query(SessionPlan).filter(
+            SessionPlan.student_id == student_id,
+            SessionPlan.subject_id == subject_id,
+            SessionPlan.term_id == term_id,
+        ).delete(synchronize_session=False)
+
+    @query_budget("session_plans.build")
+    def build_plans(
+        self,
+        db: Session,
+        student_id: uuid.UUID,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        *,
+        now: datetime | None = None,
+    ) -> int:
+        """Compute and upsert one plan per active activity type. Returns the plans stored."""
+        if not settings.SESSION_PLAN_ENABLED:
+            return 0
+
+        now = now or datetime.utcnow()
+        ttl_until = now + timedelta(seconds=int(settings.SESSION_PLAN_TTL_SECONDS))
+        max_items = int(settings.SESSION_PLAN_MAX_ITEMS)
+        generation = item_pool_index.generation(subject_id, term_id)
+
+        activity_types = db.query(ActivityType.id, ActivityType.code).filter_by(active=True).all()
+
+        # QUIZ-like activity types share a pool: load it and its prerequisites only once.
+        pools: dict[tuple, list[PoolItem]] = {}
+        for _type_id, code in activity_types:
+            item_types = tuple(item_types_for_activity(code))
+            if item_types not in pools:
+                pools[item_types] = item_pool_index.get_pool(
+                    db, subject_id=subject_id, term_id=term_id, item_types=item_types
+                )
+
+        microconcept_ids = {
+            item.microconcept_id for pool in pools.values() for item in pool if item.microconcept_id
+        }
+        mastery_by_microconcept = _fetch_mastery_map(
+            db, student_id=student_id, microconcept_ids=microconcept_ids
+        )
+
+        prereqs: dict[tuple, set[uuid.UUID]] = {}
+        stored = 0
+        for activity_type_id, code in activity_types:
+            item_types = tuple(item_types_for_activity(code))
+            pool = pools[item_types]
+            if not pool:
+                continue
+
+            if item_types not in prereqs:
+                prereqs[item_types] = set(
+                    _select_prerequisite_microconcepts_v2(
+                        db,
+                        student_id=student_id,
+                        subject_id=subject_id,
+                        term_id=term_id,
+                        mastery_by_microconcept=mastery_by_microconcept,
+                        candidate_microconcept_ids={
+                            i.microconcept_id for i in pool if i.microconcept_id
+                        },
+                    )
+                )
+
+            review = code == "REVIEW"
+            # A session of n items is the first n of the full ordering (see _select_items_topk).
+            ordered = _select_items_topk(
+                pool,
+                mastery_by_microconcept=mastery_by_microconcept,
+                prereq_microconcept_ids=prereqs[item_types],
+                item_count=min(len(pool), max_items),
+                max_per_microconcept=MAX_ITEMS_PER_MICROCONCEPT,
+                review_now=now if review else None,
+            )
+            valid_until = ttl_until
+            if review:
+                valid_until = min(
+                    valid_until,
+                    self._next_review_due(pool, mastery_by_microconcept, now) or valid_until,
+                )
+
+            values = {
+                "item_ids": [str(item.id) for item in ordered],
+                "candidate_count": len(pool),
+                "pool_generation": generation,
+                "computed_at": now,
+                "valid_until": valid_until,
+            }
+            db.execute(
+                insert(SessionPlan)
+                .values(
+                    id=uuid.uuid4(),
+                    student_id=student_id,
+                    subject_id=subject_id,
+                    term_id=term_id,
+                    activity_type_id=activity_type_id,
+                    **values,
+                )
+                .on_conflict_do_update(constraint="session_plans_scope_key", set_=values)
+            )
+            stored += 1
+
+        return stored
+
+    def _next_review_due(
+        self,
+        pool: list[PoolItem],
+        mastery_by_microconcept: dict[uuid.UUID, MasteryState],
+        now: datetime,
+    ) -> datetime | None:
+        """Earliest future review among the pool's microconcepts: the REVIEW order changes then."""
+        upcoming = [
+            ms.recommended_next_review_at
+            for mcid in {i.microconcept_id for i in pool if i.microconcept_id}
+            if (ms := mastery_by_microconcept.get(mcid)) is not None
+            and ms.recommended_next_review_at is not None
+            and ms.recommended_next_review_at > now
+        ]
+        return min(upcoming) if upcoming else None
+
+    def materialize(
+        self,
+        db: Session,
+        *,
+        student_id: uuid.UUID,
+        subject_id: uuid.UUID,
+        term_id: uuid.UUID,
+        activity_type_id: uuid.UUID,
+        item_count: int,
+        now: datetime,
+    ) -> list[uuid.UUID] | None:
+        """Item ids for a new session from a fresh plan, or ``None`` when there is none."""
+        if not settings.SESSION_PLAN_ENABLED:
+            return None
+
+        plan = (
+            db.query(SessionPlan)
+            .filter(
+                SessionPlan.student_id == student_id,
+                SessionPlan.subject_id == subject_id,
+                SessionPlan.term_id == term_id,
+                SessionPlan.activity_type_id == activity_type_id,
+            )
+            .first()
+        )
+        if plan is None or plan.valid_until <= now:
+            return None
+        if plan.pool_generation != item_pool_index.generation(subject_id, term_id):
+            return None
+        if item_count > len(plan.item_ids) and len(plan.item_ids) < plan.candidate_count:
+            return None
+
+        # The pool generation is per process without Redis (and evicted with it): check the
+        # items themselves are still active before using them.
+        item_ids = [uuid.UUID(item_id) for item_id in plan.item_ids[:item_count]]
+        active_ids = {
+            row.id
+            for row in db.query(Item.id).filter(Item.id.in_(item_ids), Item.is_active.is_(True))
+        }
+        if len(active_ids) < len(set(item_ids)):
+            return None
+        return item_ids
+
+
+# Singleton instance
+session_plan_service = SessionPlanService()
@@ -0,0 +1,499 @@
+import heapq
+import itertools
+import uuid
+from collections.abc import Iterator
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy.orm import Session
+
+from app.models.item import ItemType
+from app.models.metric import MasteryState
+from app.models.microconcept import MicroConcept, MicroConceptPrerequisite
+from app.services.item_pool import PoolItem
+from app.services.review_queue import is_review_due
+
+MAX_ITEMS_PER_MICROCONCEPT = 2
+AT_RISK_PER_CYCLE = 2
+PREREQ_PER_CYCLE = 1
+IN_PROGRESS_PER_CYCLE = 1
+MAX_PREREQ_MICROCONCEPTS = 2
+
+
+def item_types_for_activity(activity_code: str) -> list[ItemType]:
+    if activity_code == "MATCH":
+        return [ItemType.MATCH]
+    if activity_code == "CLOZE":
+        return [ItemType.CLOZE]
+    # Default: QUIZ-like items
+    return [ItemType.MCQ, ItemType.TRUE_FALSE]
+
+
+def _to_float(value: float | Decimal | None) -> float:
+    if value is None:
+        return 0.0
+    if isinstance(value, Decimal):
+        return float(value)
+    return float(value)
+
+
+def _fetch_mastery_map(
+    db: Session, *, student_id: uuid.UUID, microconcept_ids: set[uuid.UUID]
+) -> dict[uuid.UUID, MasteryState]:
+    if not microconcept_ids:
+        return {}
+    rows = (
+        db.query(MasteryState)
+        .filter(
+            MasteryState.student_id == student_id,
+            MasteryState.microconcept_id.in_(microconcept_ids),
+        )
+        .all()
+    )
+    return {ms.microconcept_id: ms for ms in rows}
+
+
+def _adaptive_order_items_v1(
+    items: list[PoolItem], mastery_by_microconcept: dict[uuid.UUID, MasteryState]
+) -> list[PoolItem]:
+    at_risk: list[tuple[float, uuid.UUID, PoolItem]] = []
+    in_progress: list[tuple[float, uuid.UUID, PoolItem]] = []
+    dominant: list[tuple[float, uuid.UUID, PoolItem]] = []
+    unknown: list[tuple[uuid.UUID, PoolItem]] = []
+    no_microconcept: list[PoolItem] = []
+
+    for item in items:
+        if not item.microconcept_id:
+            no_microconcept.append(item)
+            continue
+
+        ms = mastery_by_microconcept.get(item.microconcept_id)
+        if not ms:
+            unknown.append((item.id, item))
+            continue
+
+        score = _to_float(ms.mastery_score)
+        key = (score, item.id, item)
+        if ms.status == "at_risk":
+            at_risk.append(key)
+        elif ms.status == "in_progress":
+            in_progress.append(key)
+        elif ms.status == "dominant":
+            dominant.append(key)
+        else:
+            unknown.append((item.id, item))
+
+    at_risk.sort(key=lambda x: (x[0], x[1]))
+    in_progress.sort(key=lambda x: (x[0], x[1]))
+    dominant.sort(key=lambda x: (x[0], x[1]))
+    unknown.sort(key=lambda x: x[0])
+    no_microconcept.sort(key=lambda x: x.id)
+
+    at_risk_items = [i for (_score, _id, i) in at_risk]
+    in_progress_items = [i for (_score, _id, i) in in_progress]
+
+    # Interleave at_risk and in_progress to avoid bias towards a single bucket.
+    interleaved: list[PoolItem] = []
+    a_idx = 0
+    p_idx = 0
+    while a_idx < len(at_risk_items) or p_idx < len(in_progress_items):
+        for _ in range(AT_RISK_PER_CYCLE):
+            if a_idx >= len(at_risk_items):
+                break
+            interleaved.append(at_risk_items[a_idx])
+            a_idx += 1
+        for _ in range(IN_PROGRESS_PER_CYCLE):
+            if p_idx >= len(in_progress_items):
+                break
+            interleaved.append(in_progress_items[p_idx])
+            p_idx += 1
+
+        # If one bucket is exhausted, keep draining the other.
+        if a_idx >= len(at_risk_items):
+            interleaved.extend(in_progress_items[p_idx:])
+            break
+        if p_idx >= len(in_progress_items):
+            interleaved.extend(at_risk_items[a_idx:])
+            break
+
+    ordered = interleaved
+    ordered.extend([i for (_score, _id, i) in dominant])
+    ordered.extend([i for (_id, i) in unknown])
+    ordered.extend(no_microconcept)
+    return ordered
+
+
+def _select_prerequisite_microconcepts_v2(
+    db: Session,
+    *,
+    student_id: uuid.UUID,
+    subject_id: uuid.UUID,
+    term_id: uuid.UUID,
+    mastery_by_microconcept: dict[uuid.UUID, MasteryState],
+    candidate_microconcept_ids: set[uuid.UUID],
+) -> list[uuid.UUID]:
+    targets = [
+        ms
+        for ms in mastery_by_microconcept.values()
+        if ms.status == "at_risk" and ms.last_practice_at is not None
+    ]
+    if not targets:
+        return []
+
+    target_ids = [ms.microconcept_id for ms in targets]
+
+    prereq_rows = (
+        db.query(
+            MicroConceptPrerequisite.microconcept_id,
+            MicroConceptPrerequisite.prerequisite_microconcept_id,
+        )
+        .join(
+            MicroConcept,
+            MicroConcept.id == MicroConceptPrerequisite.prerequisite_microconcept_id,
+        )
+        .filter(
+            MicroConceptPrerequisite.microconcept_id.in_(target_ids),
+            MicroConcept.subject_id == subject_id,
+            MicroConcept.term_id == term_id,
+            MicroConcept.active == True,  # noqa: E712
+        )
+        .all()
+    )
+    if not prereq_rows:
+        return []
+
+    prereq_ids = {
+        prereq_id
+        for (_mcid, prereq_id) in prereq_rows
+        if prereq_id in candidate_microconcept_ids and prereq_id not in target_ids
+    }
+    if not prereq_ids:
+        return []
+
+    scored: list[tuple[float, uuid.UUID]] = []
+    for prereq_id in prereq_ids:
+        ms = mastery_by_microconcept.get(prereq_id)
+        if not ms:
+            continue
+        score = _to_float(ms.mastery_score)
+        if score >= 0.8:
+            continue
+        scored.append((score, prereq_id))
+
+    scored.sort(key=lambda t: (t[0], t[1]))
+    return [prereq_id for (_score, prereq_id) in scored[:MAX_PREREQ_MICROCONCEPTS]]
+
+
+def _adaptive_order_items_v2(
+    db: Session,
+    *,
+    items: list[PoolItem],
+    mastery_by_microconcept: dict[uuid.UUID, MasteryState],
+    student_id: uuid.UUID,
+    subject_id: uuid.UUID,
+    term_id: uuid.UUID,
+    candidate_microconcept_ids: set[uuid.UUID],
+) -> list[PoolItem]:
+    prereq_microconcept_ids = set(
+        _select_prerequisite_microconcepts_v2(
+            db,
+            student_id=student_id,
+            subject_id=subject_id,
+            term_id=term_id,
+            mastery_by_microconcept=mastery_by_microconcept,
+            candidate_microconcept_ids=candidate_microconcept_ids,
+        )
+    )
+
+    if not prereq_microconcept_ids:
+        return _adaptive_order_items_v1(items, mastery_by_microconcept)
+
+    at_risk: list[tuple[float, uuid.UUID, PoolItem]] = []
+    prereq: list[tuple[float, uuid.UUID, PoolItem]] = []
+    in_progress: list[tuple[float, uuid.UUID, PoolItem]] = []
+    dominant: list[tuple[float, uuid.UUID, PoolItem]] = []
+    unknown: list[tuple[uuid.UUID, PoolItem]] = []
+    no_microconcept: list[PoolItem] = []
+
+    for item in items:
+        if not item.microconcept_id:
+            no_microconcept.append(item)
+            continue
+
+        ms = mastery_by_microconcept.get(item.microconcept_id)
+        if not ms:
+            unknown.append((item.id, item))
+            continue
+
+        score = _to_float(ms.mastery_score)
+        key = (score, item.id, item)
+        if ms.status == "at_risk":
+            at_risk.append(key)
+        elif item.microconcept_id in prereq_microconcept_ids:
+            prereq.append(key)
+        elif ms.status == "in_progress":
+            in_progress.append(key)
+        elif ms.status == "dominant":
+            dominant.append(key)
+        else:
+            unknown.append((item.id, item))
+
+    at_risk.sort(key=lambda x: (x[0], x[1]))
+    prereq.sort(key=lambda x: (x[0], x[1]))
+    in_progress.sort(key=lambda x: (x[0], x[1]))
+    dominant.sort(key=lambda x: (x[0], x[1]))
+    unknown.sort(key=lambda x: x[0])
+    no_microconcept.sort(key=lambda x: x.id)
+
+    at_risk_items = [i for (_score, _id, i) in at_risk]
+    prereq_items = [i for (_score, _id, i) in prereq]
+    in_progress_items = [i for (_score, _id, i) in in_progress]
+
+    interleaved: list[PoolItem] = []
+    a_idx = 0
+    r_idx = 0
+    p_idx = 0
+
+    while a_idx < len(at_risk_items) or r_idx < len(prereq_items) or p_idx < len(in_progress_items):
+        for _ in range(AT_RISK_PER_CYCLE):
+            if a_idx >= len(at_risk_items):
+                break
+            interleaved.append(at_risk_items[a_idx])
+            a_idx += 1
+
+        for _ in range(PREREQ_PER_CYCLE):
+            if r_idx >= len(prereq_items):
+                break
+            interleaved.append(prereq_items[r_idx])
+            r_idx += 1
+
+        for _ in range(IN_PROGRESS_PER_CYCLE):
+            if p_idx >= len(in_progress_items):
+                break
+            interleaved.append(in_progress_items[p_idx])
+            p_idx += 1
+
+        if a_idx >= len(at_risk_items) and r_idx >= len(prereq_items):
+            interleaved.extend(in_progress_items[p_idx:])
+            break
+        if a_idx >= len(at_risk_items) and p_idx >= len(in_progress_items):
+            interleaved.extend(prereq_items[r_idx:])
+            break
+        if r_idx >= len(prereq_items) and p_idx >= len(in_progress_items):
+            interleaved.extend(at_risk_items[a_idx:])
+            break
+
+    ordered = interleaved
+    ordered.extend([i for (_score, _id, i) in dominant])
+    ordered.extend([i for (_id, i) in unknown])
+    ordered.extend(no_microconcept)
+    return ordered
+
+
+def _prioritize_due_microconcepts_for_review(
+    *,
+    ordered_items: list[PoolItem],
+    mastery_by_microconcept: dict[uuid.UUID, MasteryState],
+    now: datetime,
+) -> list[PoolItem]:
+    """
+    For REVIEW sessions, prioritize items belonging to microconcepts that are due for review.
+
+    A microconcept is considered due if:
+    - no mastery state exists (no practice yet), or
+    - recommended_next_review_at is null, or
+    - recommended_next_review_at <= now
+    """
+    due_microconcept_ids: set[uuid.UUID] = {
+        mcid for mcid, ms in mastery_by_microconcept.items() if is_review_due(ms, now)
+    }
+
+    # Treat microconcepts with no mastery row as due (e.g., new items introduced).
+    for item in ordered_items:
+        if not item.microconcept_id:
+            continue
+        if item.microconcept_id not in mastery_by_microconcept:
+            due_microconcept_ids.add(item.microconcept_id)
+
+    if not due_microconcept_ids:
+        return ordered_items
+
+    due: list[PoolItem] = []
+    not_due: list[PoolItem] = []
+    for item in ordered_items:
+        if item.microconcept_id and item.microconcept_id in due_microconcept_ids:
+            due.append(item)
+        else:
+            not_due.append(item)
+
+    return due + not_due
+
+
+def _apply_microconcept_cap(
+    ordered_items: list[PoolItem], *, item_count: int, max_per_microconcept: int
+) -> list[PoolItem]:
+    selected: list[PoolItem] = []
+    skipped_due_to_cap: list[PoolItem] = []
+    counts: dict[uuid.UUID, int] = {}
+
+    for item in ordered_items:
+        if len(selected) >= item_count:
+            break
+
+        mcid = item.microconcept_id
+        if mcid and counts.get(mcid, 0) >= max_per_microconcept:
+            skipped_due_to_cap.append(item)
+            continue
+
+        selected.append(item)
+        if mcid:
+            counts[mcid] = counts.get(mcid, 0) + 1
+
+    if len(selected) >= item_count:
+        return selected
+
+    # Soft fallback: fill remaining ignoring the cap if we can't reach item_count.
+    for item in skipped_due_to_cap:
+        if len(selected) >= item_count:
+            break
+        if item in selected:
+            continue
+        selected.append(item)
+
+    return selected
+
+
+def _heap_stream(entries: list[tuple]) -> Iterator[PoolItem]:
+    """Yield the items (last tuple element) in ascending key order, popping lazily."""
+    heapq.heapify(entries)
+    while entries:
+        yield heapq.heappop(entries)[-1]
+
+
+def _interleave_streams(streams: list[tuple[Iterator[PoolItem], int]]) -> Iterator[PoolItem]:
+    """Round-robin ``per_cycle`` items from each stream until all are exhausted."""
+    active = list(streams)
+    while active:
+        still_active: list[tuple[Iterator[PoolItem], int]] = []
+        for stream, per_cycle in active:
+            exhausted = False
+            for _ in range(per_cycle):
+                item = next(stream, None)
+                if item is None:
+                    exhausted = True
+                    break
+                yield item
+            if not exhausted:
+                still_active.append((stream, per_cycle))
+        active = still_active
+
+
+def _select_items_topk(
+    items: list[PoolItem],
+    *,
+    mastery_by_microconcept: dict[uuid.UUID, MasteryState],
+    prereq_microconcept_ids: set[uuid.UUID],
+    item_count: int,
+    max_per_microconcept: int,
+    review_now: datetime | None = None,
+) -> list[PoolItem]:
+    """
+    Same result as ``_adaptive_order_items_v2`` (+ ``_prioritize_due_microconcepts_for_review``
+    when ``review_now`` is given) followed by ``_apply_microconcept_cap`` and truncation, but
+    buckets are heapified instead of sorted and the ordering is only produced lazily until
+    ``item_count`` items have been placed.
+    """
+    if item_count <= 0:
+        return []
+
+    at_risk: list[tuple[float, uuid.UUID, PoolItem]] = []
+    prereq: list[tuple[float, uuid.UUID, PoolItem]] = []
+    in_progress: list[tuple[float, uuid.UUID, PoolItem]] = []
+    dominant: list[tuple[float, uuid.UUID, PoolItem]] = []
+    unknown: list[tuple[uuid.UUID, PoolItem]] = []
+    no_microconcept: list[tuple[uuid.UUID, PoolItem]] = []
+
+    # Bucket and score are per microconcept: classify each one once, not once per item.
+    bucket_by_microconcept: dict[uuid.UUID, tuple[list, float | None]] = {}
+    for item in items:
+        mcid = item.microconcept_id
+        if not mcid:
+            no_microconcept.append((item.id, item))
+            continue
+
+        bucket = bucket_by_microconcept.get(mcid)
+        if bucket is None:
+            ms = mastery_by_microconcept.get(mcid)
+            if not ms:
+                bucket = (unknown, None)
+            elif ms.status == "at_risk":
+                bucket = (at_risk, _to_float(ms.mastery_score))
+            elif mcid in prereq_microconcept_ids:
+                bucket = (prereq, _to_float(ms.mastery_score))
+            elif ms.status == "in_progress":
+                bucket = (in_progress, _to_float(ms.mastery_score))
+            elif ms.status == "dominant":
+                bucket = (dominant, _to_float(ms.mastery_score))
+            else:
+                bucket = (unknown, None)
+            bucket_by_microconcept[mcid] = bucket
+
+        entries, score = bucket
+        if score is None:
+            entries.append((item.id, item))
+        else:
+            entries.append((score, item.id, item))
+
+    ordered: Iterator[PoolItem] = itertools.chain(
+        _interleave_streams(
+            [
+                (_heap_stream(at_risk), AT_RISK_PER_CYCLE),
+                (_heap_stream(prereq), PREREQ_PER_CYCLE),
+                (_heap_stream(in_progress), IN_PROGRESS_PER_CYCLE),
+            ]
+        ),
+        _heap_stream(dominant),
+        _heap_stream(unknown),
+        _heap_stream(no_microconcept),
+    )
+
+    if review_now is not None:
+        ordered = _due_first(
+            ordered, mastery_by_microconcept=mastery_by_microconcept, now=review_now
+        )
+
+    selected: list[PoolItem] = []
+    skipped_due_to_cap: list[PoolItem] = []
+    counts: dict[uuid.UUID, int] = {}
+    for item in ordered:
+        mcid = item.microconcept_id
+        if mcid and counts.get(mcid, 0) >= max_per_microconcept:
+            skipped_due_to_cap.append(item)
+            continue
+        selected.append(item)
+        if mcid:
+            counts[mcid] = counts.get(mcid, 0) + 1
+        if len(selected) >= item_count:
+            return selected
+
+    # Soft fallback: fill remaining ignoring the cap if we can't reach item_count.
+    selected.extend(skipped_due_to_cap[: item_count - len(selected)])
+    return selected
+
+
+def _due_first(
+    ordered: Iterator[PoolItem],
+    *,
+    mastery_by_microconcept: dict[uuid.UUID, MasteryState],
+    now: datetime,
+) -> Iterator[PoolItem]:
+    """Lazy stable partition of ``ordered``: items due for review first, then the rest."""
+    not_due: list[PoolItem] = []
+    for item in ordered:
+        mcid = item.microconcept_id
+        ms = mastery_by_microconcept.get(mcid) if mcid else None
+        if mcid and is_review_due(ms, now):
+            yield item
+        else:
+            not_due.append(item)
+    yield from not_due
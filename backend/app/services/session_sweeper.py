@@ -0,0 +1,99 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.activity import ActivitySession, LearningEvent
+
+logger = logging.getLogger(__name__)
+
+
+class SessionScope(NamedTuple):
+    student_id: uuid.UUID
+    subject_id: uuid.UUID
+    term_id: uuid.UUID
+
+
+class SessionSweeper:
+    """
+    Mark in-progress sessions nobody ended as abandoned.
+
+    A session is stale once it started more than ``SESSION_ABANDON_AFTER_SECONDS`` ago and
+    has no response recorded within that window. Candidates come from the (status,
+    started_at) index and are updated in batches, each committed on its own; rows locked
+    by a concurrent ``end_session`` are skipped and left to it.
+    """
+
+    def sweep(
+        self,
+        db: Session,
+        *,
+        now: datetime | None = None,
+        abandon_after_seconds: int | None = None,
+        batch_size: int | None = None,
+    ) -> set[SessionScope]:
+        """Abandon stale sessions. Returns the student scopes whose metrics need recalculating."""
+        now = now or datetime.utcnow()
+        cutoff = now - timedelta(
+            seconds=int(abandon_after_seconds or settings.SESSION_ABANDON_AFTER_SECONDS)
+        )
+        batch_size = int(batch_size or settings.SESSION_SWEEP_BATCH_SIZE)
+
+        recent_response = exists().where(
+            LearningEvent.session_id == ActivitySession.id,
+            LearningEvent.created_at > cutoff,
+        )
+        last_response_at = (
+            select(func.max(LearningEvent.created_at))
+            .where(LearningEvent.session_id == ActivitySession.id)
+            .scalar_subquery()
+        )
+
+        scopes: set[SessionScope] = set()
+        abandoned = 0
+        while True:
+            batch = (
+                select(ActivitySession.id)
+                .where(
+                    ActivitySession.status == "in_progress",
+                    ActivitySession.started_at < cutoff,
+                    ~recent_response,
+                )
+                .order_by(ActivitySession.started_at)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = db.execute(
+                update(ActivitySession)
+                .where(ActivitySession.id.in_(batch))
+                .values(
+                    status="abandoned",
+                    ended_at=func.coalesce(last_response_at, ActivitySession.started_at),
+                )
+                .returning(
+                    ActivitySession.student_id,
+                    ActivitySession.subject_id,
+                    ActivitySession.term_id,
+                ),
+                execution_options={"synchronize_session": False},
+            ).all()
+            db.commit()
+
+            abandoned += len(rows)
+            scopes.update(SessionScope(*row) for row in rows)
+            if len(rows) < batch_size:
+                break
+
+        if abandoned:
+            logger.info(
+                f"Session sweeper: abandoned {abandoned} sessions of {len(scopes)} student scopes"
+            )
+        return scopes
+
+
+# Singleton instance
+session_sweeper = SessionSweeper()
@@ -1,16 +1,27 @@
+import hashlib
 import os
 import uuid
+from typing import NamedTuple
 
 from fastapi import UploadFile
 
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+class StoredFile(NamedTuple):
+    uri: str
+    sha256: str
+    size: int
+
 
 class StorageService:
     STORAGE_ROOT = "storage"
 
     @classmethod
-    def save_file(cls, file: UploadFile, subfolder: str = "uploads") -> str:
+    def save_file(cls, file: UploadFile, subfolder: str = "uploads") -> StoredFile:
         """
-        Saves file to disk and returns the relative path (URI).
+        Saves file to disk and returns the relative path (URI) with the SHA-256 of the
+        content, hashed while the file is streamed to disk.
         """
         # Ensure directory exists
         path = os.path.join(cls.STORAGE_ROOT, subfolder)
@@ -22,7 +33,12 @@ class StorageService:
 
         full_path = os.path.join(path, unique_name)
 
+        digest = hashlib.sha256()
+        size = 0
         with open(full_path, "wb") as f:
-            f.write(file.file.read())
+            while chunk := file.file.read(READ_CHUNK_BYTES):
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
 
-        return f"{subfolder}/{unique_name}"
+        return StoredFile(uri=f"{subfolder}/{unique_name}", sha256=digest.hexdigest(), size=size)
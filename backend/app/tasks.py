@@ -1,14 +1,30 @@
 from __future__ import annotations
 
 import logging
+import threading
 import uuid
 from datetime import datetime
 
+from rq import get_current_job
+
+from app.core.config import settings
 from app.core.db import SessionLocal
+from app.core.queue import (
+    enqueue_recalculate_metrics,
+    enqueue_upload_processing,
+    is_async_queue_enabled,
+    release_session_sweep,
+    schedule_session_sweep,
+)
 from app.models.content import ContentUpload
 from app.pipelines.processing import process_content_upload
+from app.services.idempotency import idempotency_service
+from app.services.llm_retry import LLMCircuitOpenError
 from app.services.metric_service import metric_service
 from app.services.recommendation_service import recommendation_service
+from app.services.report_storage import purge_orphan_section_payloads
+from app.services.session_plan_service import session_plan_service
+from app.services.session_sweeper import session_sweeper
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +49,19 @@ def process_upload_job(upload_id: str) -> None:
             upload.processed_at = datetime.utcnow()
             db.add(upload)
             db.commit()
+    except LLMCircuitOpenError as e:
+        # Provider down for everyone: park the job instead of failing it. The requeued run
+        # resumes from the pipeline checkpoints once the breaker has cooled down.
+        db.rollback()
+        job_id = enqueue_upload_processing(upload_id=upload_uuid, delay_seconds=e.retry_in)
+        logger.warning(f"Upload {upload_id} parked: {e}; requeued as job {job_id}")
+        upload = db.query(ContentUpload).filter(ContentUpload.id == upload_uuid).first()
+        if upload:
+            upload.processing_status = "queued"
+            upload.processing_error = str(e)
+            upload.processing_job_id = job_id
+            db.add(upload)
+            db.commit()
     except Exception as e:  # noqa: BLE001
         db.rollback()
         upload = db.query(ContentUpload).filter(ContentUpload.id == upload_uuid).first()
@@ -55,6 +84,7 @@ def recalculate_metrics_job(student_id: str, subject_id: str, term_id: str) -> N
     try:
         metric_service.recalculate_and_save_metrics(db, student_uuid, subject_uuid, term_uuid)
         recommendation_service.generate_recommendations(db, student_uuid, subject_uuid, term_uuid)
+        session_plan_service.build_plans(db, student_uuid, subject_uuid, term_uuid)
         db.commit()
     except Exception:  # noqa: BLE001
         db.rollback()
@@ -62,3 +92,61 @@ def recalculate_metrics_job(student_id: str, subject_id: str, term_id: str) -> N
         raise
     finally:
         db.close()
+
+
+def sweep_abandoned_sessions_job() -> int:
+    """
+    Abandon stale sessions and recalculate each affected student scope once; also purges
+    expired idempotency keys and orphaned report section payloads.
+    """
+    if is_async_queue_enabled():
+        # Schedule the next run first so a failing sweep does not stop the cycle.
+        job = get_current_job()
+        if job is not None:
+            release_session_sweep(job.id)
+        schedule_session_sweep(delay_seconds=int(settings.SESSION_SWEEP_INTERVAL_SECONDS))
+
+    db = SessionLocal()
+    try:
+        scopes = session_sweeper.sweep(db)
+        idempotency_service.purge_expired(db)
+        # Reports also go with cascaded student/subject/term deletions.
+        purge_orphan_section_payloads(db)
+        # Abandoned sessions get the same follow-up as ended ones.
+        for scope in scopes:
+            if is_async_queue_enabled():
+                enqueue_recalculate_metrics(
+                    student_id=scope.student_id,
+                    subject_id=scope.subject_id,
+                    term_id=scope.term_id,
+                )
+            else:
+                metric_service.refresh_after_session(
+                    db, scope.student_id, scope.subject_id, scope.term_id
+                )
+    finally:
+        db.close()
+    return len(scopes)
+
+
+def start_in_process_sweeper() -> threading.Event | None:
+    """
+    Without the async queue there is no worker to schedule the sweep: with
+    ``SESSION_SWEEP_IN_API`` the API process runs it from a daemon thread every
+    ``SESSION_SWEEP_INTERVAL_SECONDS`` instead. Enable it on one process where possible;
+    overlapping sweeps are safe (locked rows are skipped). Returns the event that stops the
+    thread.
+    """
+    if is_async_queue_enabled() or not settings.SESSION_SWEEP_IN_API:
+        return None
+    stop = threading.Event()
+
+    def _loop() -> None:
+        while not stop.wait(int(settings.SESSION_SWEEP_INTERVAL_SECONDS)):
+            try:
+                sweep_abandoned_sessions_job()
+            except Exception:  # noqa: BLE001
+                logger.exception("In-process session sweep failed")
+
+    threading.Thread(target=_loop, name="session-sweeper", daemon=True).start()
+    return stop
@@ -5,7 +5,7 @@ import logging
 from rq import Worker
 
 from app.core.config import settings
-from app.core.queue import _get_redis_connection
+from app.core.queue import _get_redis_connection, schedule_session_sweep
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +13,9 @@ logger = logging.getLogger(__name__)
 def main() -> None:
     redis_connection = _get_redis_connection()
     worker = Worker([settings.RQ_QUEUE_NAME], connection=redis_connection)
-    worker.work()
+    # The abandoned-session sweep reschedules itself; (re)start the cycle with the worker.
+    schedule_session_sweep(delay_seconds=0)
+    worker.work(with_scheduler=True)
 
 
 if __name__ == "__main__":
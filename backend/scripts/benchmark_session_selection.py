@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest.mock import patch
+
+script_path = Path(__file__).resolve()
+backend_root = script_path.parents[1]
+sys.path.append(str(backend_root))
+
+from app.models.metric import MasteryState  # noqa: E402
+from app.services.item_pool import PoolItem  # noqa: E402
+from app.services.session_selection import (  # noqa: E402
+    MAX_ITEMS_PER_MICROCONCEPT,
+    _adaptive_order_items_v2,
+    _apply_microconcept_cap,
+    _prioritize_due_microconcepts_for_review,
+    _select_items_topk,
+)
+
+STATUSES = ["at_risk", "in_progress", "dominant", "unknown"]
+
+
+def _build_candidates(n_items: int, rng: random.Random):
+    now = datetime.utcnow()
+    n_microconcepts = max(1, n_items // 20)
+    microconcept_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(n_microconcepts)]
+    mastery = {
+        mcid: MasteryState(
+            student_id=uuid.uuid4(),
+            microconcept_id=mcid,
+            mastery_score=Decimal(f"{rng.random():.4f}"),
+            status=rng.choice(STATUSES),
+            recommended_next_review_at=now + timedelta(days=rng.randint(-5, 5)),
+        )
+        for mcid in microconcept_ids
+        if rng.random() > 0.2
+    }
+    items = sorted(
+        (
+            PoolItem(uuid.UUID(int=rng.getrandbits(128)), rng.choice(microconcept_ids), 1)
+            for _ in range(n_items)
+        ),
+        key=lambda p: p.id,
+    )
+    prereq_ids = set(rng.sample(microconcept_ids, k=min(2, len(microconcept_ids))))
+    return now, items, mastery, prereq_ids
+
+
+def _full_sort(items, mastery, prereq_ids, *, item_count, review_now):
+    with patch(
+        "app.services.session_selection._select_prerequisite_microconcepts_v2",
+        return_value=sorted(prereq_ids),
+    ):
+        ordered = _adaptive_order_items_v2(
+            None,
+            items=items,
+            mastery_by_microconcept=mastery,
+            student_id=uuid.uuid4(),
+            subject_id=uuid.uuid4(),
+            term_id=uuid.uuid4(),
+            candidate_microconcept_ids=set(),
+        )
+    if review_now is not None:
+        ordered = _prioritize_due_microconcepts_for_review(
+            ordered_items=ordered, mastery_by_microconcept=mastery, now=review_now
+        )
+    selected = _apply_microconcept_cap(
+        ordered, item_count=item_count, max_per_microconcept=MAX_ITEMS_PER_MICROCONCEPT
+    )
+    return selected[:item_count]
+
+
+def _top_k(items, mastery, prereq_ids, *, item_count, review_now):
+    return _select_items_topk(
+        items,
+        mastery_by_microconcept=mastery,
+        prereq_microconcept_ids=prereq_ids,
+        item_count=item_count,
+        max_per_microconcept=MAX_ITEMS_PER_MICROCONCEPT,
+        review_now=review_now,
+    )
+
+
+def _best_of(fn, repeat: int, **kwargs) -> tuple[float, list[PoolItem]]:
+    best = float("inf")
+    result: list[PoolItem] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(**kwargs)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark session item selection")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--item-count", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--review", action="store_true", help="Use REVIEW prioritization")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'candidates':>10} {'full sort (ms)':>15} {'top-k (ms)':>11} {'speedup':>8}")
+    for size in args.sizes:
+        now, items, mastery, prereq_ids = _build_candidates(size, rng)
+        kwargs = {
+            "items": items,
+            "mastery": mastery,
+            "prereq_ids": prereq_ids,
+            "item_count": args.item_count,
+            "review_now": now if args.review else None,
+        }
+        full_s, full_result = _best_of(_full_sort, args.repeat, **kwargs)
+        topk_s, topk_result = _best_of(_top_k, args.repeat, **kwargs)
+        if full_result != topk_result:
+            raise SystemExit(f"Selections differ for {size} candidates")
+        print(
+            f"{size:>10} {full_s * 1000:>15.2f} {topk_s * 1000:>11.2f} "
+            f"{full_s / topk_s if topk_s else float('inf'):>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
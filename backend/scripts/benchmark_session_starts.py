@@ -0,0 +1,205 @@
+"""
+Benchmark concurrent session starts (POST /activities/sessions) for a whole class.
+
+Creates a throwaway subject with ``--students`` students and ``--items`` items, starts one
+session per student from ``--concurrency`` threads against the in-process app and reports
+latency percentiles. The fixture data is deleted afterwards.
+
+    DATABASE_URL=... python scripts/benchmark_session_starts.py --students 300 --item-count 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+script_path = Path(__file__).resolve()
+backend_root = script_path.parents[1]
+sys.path.append(str(backend_root))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.db import SessionLocal  # noqa: E402
+from app.core.security import create_access_token, get_password_hash  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.activity import ActivitySession, ActivitySessionItem, ActivityType  # noqa: E402
+from app.models.content import ContentUpload, ContentUploadType  # noqa: E402
+from app.models.item import Item, ItemType  # noqa: E402
+from app.models.microconcept import MicroConcept  # noqa: E402
+from app.models.role import Role  # noqa: E402
+from app.models.student import Student  # noqa: E402
+from app.models.subject import Subject  # noqa: E402
+from app.models.term import Term  # noqa: E402
+from app.models.tutor import Tutor  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+
+def _create_class(db, *, n_students: int, n_items: int) -> dict:
+    role_student = db.query(Role).filter_by(name="student").first()
+    role_tutor = db.query(Role).filter_by(name="tutor").first()
+    term = db.query(Term).filter_by(code="T1").first()
+    quiz = db.query(ActivityType).filter_by(code="QUIZ").first()
+    run = uuid.uuid4().hex[:8]
+    hashed = get_password_hash("benchmark")
+
+    tutor_user = User(
+        email=f"bench_tutor_{run}@example.com",
+        hashed_password=hashed,
+        is_active=True,
+        role_id=role_tutor.id,
+    )
+    db.add(tutor_user)
+    db.flush()
+    tutor = Tutor(user_id=tutor_user.id, display_name="Benchmark")
+    subject = Subject(name=f"Benchmark {run}", tutor_id=tutor_user.id)
+    db.add_all([tutor, subject])
+    db.flush()
+
+    student_users = [
+        User(
+            email=f"bench_student_{run}_{idx}@example.com",
+            hashed_password=hashed,
+            is_active=True,
+            role_id=role_student.id,
+        )
+        for idx in range(n_students)
+    ]
+    db.add_all(student_users)
+    db.flush()
+    students = [Student(user_id=user.id, subject_id=subject.id) for user in student_users]
+    upload = ContentUpload(
+        file_name="benchmark.pdf",
+        storage_uri="/benchmark/benchmark.pdf",
+        mime_type="application/pdf",
+        upload_type=ContentUploadType.pdf,
+        tutor_id=tutor.id,
+        subject_id=subject.id,
+        term_id=term.id,
+        page_count=1,
+    )
+    microconcepts = [
+        MicroConcept(
+            subject_id=subject.id,
+            term_id=term.id,
+            code=f"BENCH-{run}-{idx}",
+            name=f"Benchmark {idx}",
+            active=True,
+        )
+        for idx in range(max(1, n_items // 10))
+    ]
+    db.add_all([*students, upload, *microconcepts])
+    db.flush()
+    db.add_all(
+        Item(
+            content_upload_id=upload.id,
+            microconcept_id=microconcepts[idx % len(microconcepts)].id,
+            type=ItemType.MCQ,
+            stem=f"Benchmark item {idx}",
+            options=["A", "B", "C", "D"],
+            correct_answer="A",
+            difficulty=1 + idx % 3,
+            is_active=True,
+        )
+        for idx in range(n_items)
+    )
+    db.commit()
+
+    return {
+        "users": [tutor_user.id, *(u.id for u in student_users)],
+        "tutor_id": tutor.id,
+        "subject_id": subject.id,
+        "term_id": term.id,
+        "activity_type_id": quiz.id,
+        "upload_id": upload.id,
+        "students": [(s.id, u.id) for s, u in zip(students, student_users, strict=True)],
+    }
+
+
+def _delete_class(db, fixture: dict) -> None:
+    session_ids = db.query(ActivitySession.id).filter(
+        ActivitySession.subject_id == fixture["subject_id"]
+    )
+    db.query(ActivitySessionItem).filter(ActivitySessionItem.session_id.in_(session_ids)).delete(
+        synchronize_session=False
+    )
+    db.query(ActivitySession).filter(ActivitySession.subject_id == fixture["subject_id"]).delete(
+        synchronize_session=False
+    )
+    db.query(Item).filter(Item.content_upload_id == fixture["upload_id"]).delete()
+    db.query(ContentUpload).filter(ContentUpload.id == fixture["upload_id"]).delete()
+    db.query(MicroConcept).filter(MicroConcept.subject_id == fixture["subject_id"]).delete()
+    db.query(Student).filter(Student.subject_id == fixture["subject_id"]).delete()
+    db.query(Subject).filter(Subject.id == fixture["subject_id"]).delete()
+    db.query(Tutor).filter(Tutor.id == fixture["tutor_id"]).delete()
+    db.query(User).filter(User.id.in_(fixture["users"])).delete(synchronize_session=False)
+    db.commit()
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent session starts")
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--items", type=int, default=200, help="Items in the subject pool")
+    parser.add_argument("--item-count", type=int, default=50, help="Items per session")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    fixture = _create_class(db, n_students=args.students, n_items=args.items)
+    client = TestClient(app)
+
+    def start(student: tuple[uuid.UUID, uuid.UUID]) -> float:
+        student_id, user_id = student
+        token = create_access_token(user_id, expires_delta=timedelta(minutes=30))
+        started = time.perf_counter()
+        res = client.post(
+            "/api/v1/activities/sessions",
+            json={
+                "student_id": str(student_id),
+                "activity_type_id": str(fixture["activity_type_id"]),
+                "subject_id": str(fixture["subject_id"]),
+                "term_id": str(fixture["term_id"]),
+                "item_count": args.item_count,
+                "content_upload_id": str(fixture["upload_id"]),
+                "device_type": "benchmark",
+            },
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        elapsed = time.perf_counter() - started
+        if res.status_code != 200:
+            raise SystemExit(f"Session start failed ({res.status_code}): {res.text}")
+        return elapsed
+
+    try:
+        wall_started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(start, fixture["students"]))
+        wall = time.perf_counter() - wall_started
+    finally:
+        _delete_class(db, fixture)
+        db.close()
+
+    print(
+        f"{len(latencies)} starts of {args.item_count} items, "
+        f"concurrency {args.concurrency}: {wall:.2f}s ({len(latencies) / wall:.1f} starts/s)"
+    )
+    print(
+        f"latency ms: mean {statistics.mean(latencies) * 1000:.1f}, "
+        f"p50 {_percentile(latencies, 50) * 1000:.1f}, "
+        f"p95 {_percentile(latencies, 95) * 1000:.1f}, "
+        f"p99 {_percentile(latencies, 99) * 1000:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+# Query-budget violations fail the suite instead of only being logged.
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+# Pipeline tests mock one LLM response per call; response caching and E4 batching are
+# opted into explicitly. Failed calls are retried once, without backoff.
+os.environ.setdefault("LLM_RESPONSE_CACHE_ENABLED", "false")
+os.environ.setdefault("LLM_E4_BATCH_ENABLED", "false")
+os.environ.setdefault("LLM_MAX_ATTEMPTS", "2")
+os.environ.setdefault("LLM_RETRY_BASE_DELAY_SECONDS", "0")
+
+
+@pytest.fixture(autouse=True)
+def _reset_item_pool_index():
+    # Tests insert items straight into the database, bypassing the write paths that
+    # invalidate the candidate pool index.
+    from app.services.item_pool import item_pool_index
+
+    item_pool_index.invalidate()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _storage_root(tmp_path, monkeypatch):
+    # Uploaded files go to a per-test directory instead of backend/storage/.
+    from app.services.storage import StorageService
+
+    monkeypatch.setattr(StorageService, "STORAGE_ROOT", str(tmp_path / "storage"))
@@ -211,7 +211,7 @@ def test_e2e_01_flow_content_to_report(db_session: Session):
 
     settings.OPENAI_API_KEY = "fake-key"
     with (
-        patch("app.pipelines.processing.extract_text_from_pdf", return_value=MOCK_PDF_TEXT),
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
         patch("app.pipelines.processing.os.path.exists", return_value=True),
         patch("app.services.llm_service.openai.OpenAI") as mock_openai,
     ):
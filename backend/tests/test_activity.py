@@ -7,8 +7,14 @@ from fastapi.testclient import TestClient
 from app.core.db import SessionLocal
 from app.core.security import get_password_hash
 from app.main import app
-from app.models.activity import ActivitySession, ActivitySessionItem, ActivityType
+from app.models.activity import (
+    ActivitySession,
+    ActivitySessionItem,
+    ActivityType,
+    LearningEvent,
+)
 from app.models.content import ContentUpload, ContentUploadType
+from app.models.idempotency import IdempotencyKey
 from app.models.item import Item, ItemType
 from app.models.metric import MasteryState
 from app.models.microconcept import MicroConcept, MicroConceptPrerequisite
@@ -223,6 +229,235 @@ def test_record_learning_event(db_session):
     assert data["duration_ms"] == 5000
 
 
+def test_record_responses_batch_accepts_partial_failures(db_session):
+    token_res = client.post(
+        "/api/v1/login/access-token",
+        json={"email": "student@decies.com", "password": "decies"},
+    )
+    assert token_res.status_code == 200
+    headers = {"Authorization": f"Bearer {token_res.json()['access_token']}"}
+
+    me_res = client.get("/api/v1/auth/me", headers=headers)
+    assert me_res.status_code == 200
+    student = db_session.get(Student, uuid.UUID(me_res.json()["student_id"]))
+    assert student is not None
+
+    subject = db_session.get(Subject, student.subject_id)
+    term = db_session.query(Term).filter_by(code="T1").first()
+    activity_type = db_session.query(ActivityType).filter_by(code="QUIZ").first()
+    tutor = db_session.query(Tutor).first()
+
+    upload = ContentUpload(
+        id=uuid.uuid4(),
+        tutor_id=tutor.id,
+        subject_id=subject.id,
+        term_id=term.id,
+        upload_type=ContentUploadType.pdf,
+        storage_uri="/test/batch_test.pdf",
+        file_name="batch_test.pdf",
+        mime_type="application/pdf",
+        page_count=1,
+    )
+    db_session.add(upload)
+    db_session.flush()
+
+    active_item = Item(
+        id=uuid.uuid4(),
+        content_upload_id=upload.id,
+        type=ItemType.MCQ,
+        stem="Batch question",
+        options={"options": ["A", "B"]},
+        correct_answer="A",
+        difficulty=1,
+        is_active=True,
+    )
+    inactive_item = Item(
+        id=uuid.uuid4(),
+        content_upload_id=upload.id,
+        type=ItemType.MCQ,
+        stem="Inactive question",
+        options={"options": ["A", "B"]},
+        correct_answer="A",
+        difficulty=1,
+        is_active=False,
+    )
+    db_session.add_all([active_item, inactive_item])
+    db_session.commit()
+
+    session_res = client.post(
+        "/api/v1/activities/sessions",
+        json={
+            "student_id": str(student.id),
+            "activity_type_id": str(activity_type.id),
+            "subject_id": str(subject.id),
+            "term_id": str(term.id),
+            "item_count": 1,
+            "content_upload_id": str(upload.id),
+            "device_type": "web",
+        },
+        headers=headers,
+    )
+    assert session_res.status_code == 200
+    session_id = session_res.json()["id"]
+
+    now = datetime.utcnow().isoformat()
+
+    def response_payload(item_id, answer):
+        return {
+            "student_id": str(student.id),
+            "item_id": str(item_id),
+            "subject_id": str(subject.id),
+            "term_id": str(term.id),
+            "activity_type_id": str(activity_type.id),
+            "is_correct": False,
+            "duration_ms": 1200,
+            "response_normalized": answer,
+            "timestamp_start": now,
+            "timestamp_end": now,
+        }
+
+    batch_res = client.post(
+        f"/api/v1/activities/sessions/{session_id}/responses/batch",
+        json={
+            "responses": [
+                response_payload(active_item.id, "a"),
+                response_payload(active_item.id, "B"),
+                response_payload(inactive_item.id, "A"),
+                response_payload(uuid.uuid4(), "A"),
+            ]
+        },
+        headers=headers,
+    )
+    assert batch_res.status_code == 200
+    data = batch_res.json()
+    assert data["recorded"] == 2
+    assert data["rejected"] == 2
+    results = data["results"]
+    assert [r["status"] for r in results] == ["recorded", "recorded", "rejected", "rejected"]
+    assert [r["is_correct"] for r in results[:2]] == [True, False]
+    assert results[0]["event"]["session_id"] == session_id
+    assert results[0]["event"]["created_at"] is not None
+    assert results[2]["error"] == "Item is not active"
+    assert results[3]["error"] == "Item not found"
+
+    stored = db_session.query(LearningEvent).filter_by(session_id=uuid.UUID(session_id)).all()
+    assert sorted(e.is_correct for e in stored) == [False, True]
+
+
+def test_idempotency_key_replays_response_and_session_end(db_session):
+    token_res = client.post(
+        "/api/v1/login/access-token",
+        json={"email": "student@decies.com", "password": "decies"},
+    )
+    assert token_res.status_code == 200
+    headers = {"Authorization": f"Bearer {token_res.json()['access_token']}"}
+
+    me_res = client.get("/api/v1/auth/me", headers=headers)
+    student = db_session.get(Student, uuid.UUID(me_res.json()["student_id"]))
+    subject = db_session.get(Subject, student.subject_id)
+    term = db_session.query(Term).filter_by(code="T1").first()
+    activity_type = db_session.query(ActivityType).filter_by(code="QUIZ").first()
+    tutor = db_session.query(Tutor).first()
+
+    upload = ContentUpload(
+        id=uuid.uuid4(),
+        tutor_id=tutor.id,
+        subject_id=subject.id,
+        term_id=term.id,
+        upload_type=ContentUploadType.pdf,
+        storage_uri="/test/idempotency_test.pdf",
+        file_name="idempotency_test.pdf",
+        mime_type="application/pdf",
+        page_count=1,
+    )
+    db_session.add(upload)
+    db_session.flush()
+    item = Item(
+        id=uuid.uuid4(),
+        content_upload_id=upload.id,
+        type=ItemType.MCQ,
+        stem="Idempotent question",
+        options={"options": ["A", "B"]},
+        correct_answer="A",
+        difficulty=1,
+        is_active=True,
+    )
+    db_session.add(item)
+    db_session.commit()
+
+    session_res = client.post(
+        "/api/v1/activities/sessions",
+        json={
+            "student_id": str(student.id),
+            "activity_type_id": str(activity_type.id),
+            "subject_id": str(subject.id),
+            "term_id": str(term.id),
+            "item_count": 1,
+            "content_upload_id": str(upload.id),
+            "device_type": "web",
+        },
+        headers=headers,
+    )
+    assert session_res.status_code == 200
+    session_id = session_res.json()["id"]
+
+    now = datetime.utcnow().isoformat()
+    payload = {
+        "student_id": str(student.id),
+        "item_id": str(item.id),
+        "subject_id": str(subject.id),
+        "term_id": str(term.id),
+        "activity_type_id": str(activity_type.id),
+        "is_correct": False,
+        "duration_ms": 900,
+        "response_normalized": "A",
+        "timestamp_start": now,
+        "timestamp_end": now,
+    }
+    key_headers = {**headers, "Idempotency-Key": f"resp-{uuid.uuid4()}"}
+    first = client.post(
+        f"/api/v1/activities/sessions/{session_id}/responses", json=payload, headers=key_headers
+    )
+    retry = client.post(
+        f"/api/v1/activities/sessions/{session_id}/responses", json=payload, headers=key_headers
+    )
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.json() == first.json()
+    assert db_session.query(LearningEvent).filter_by(session_id=uuid.UUID(session_id)).count() == 1
+
+    conflicting = client.post(
+        f"/api/v1/activities/sessions/{session_id}/responses",
+        json={**payload, "response_normalized": "B"},
+        headers=key_headers,
+    )
+    assert conflicting.status_code == 409
+
+    # An expired key is dropped and the request runs again, within the endpoint's budget.
+    db_session.query(IdempotencyKey).filter_by(key=key_headers["Idempotency-Key"]).update(
+        {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db_session.commit()
+    expired_retry = client.post(
+        f"/api/v1/activities/sessions/{session_id}/responses", json=payload, headers=key_headers
+    )
+    assert expired_retry.status_code == 200
+    assert expired_retry.json()["id"] != first.json()["id"]
+
+    end_headers = {**headers, "Idempotency-Key": f"end-{uuid.uuid4()}"}
+    ended = client.post(f"/api/v1/activities/sessions/{session_id}/end", headers=end_headers)
+    ended_retry = client.post(f"/api/v1/activities/sessions/{session_id}/end", headers=end_headers)
+    assert ended.status_code == 200
+    assert ended_retry.status_code == 200
+    assert ended_retry.json() == ended.json()
+
+    # Without the key the second end is still rejected.
+    assert (
+        client.post(f"/api/v1/activities/sessions/{session_id}/end", headers=headers).status_code
+        == 400
+    )
+
+
 def test_end_session(db_session):
     """Test ending a session and triggering metrics recalculation"""
     token_res = client.post(
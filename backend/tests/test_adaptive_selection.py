@@ -0,0 +1,116 @@
+import random
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+
+from app.models.metric import MasteryState
+from app.services.item_pool import PoolItem
+from app.services.session_selection import (
+    MAX_ITEMS_PER_MICROCONCEPT,
+    _adaptive_order_items_v2,
+    _apply_microconcept_cap,
+    _prioritize_due_microconcepts_for_review,
+    _select_items_topk,
+)
+
+STATUSES = ["at_risk", "in_progress", "dominant", "unknown"]
+
+
+def _random_scenario(rng: random.Random, n_items: int, n_microconcepts: int):
+    now = datetime(2026, 3, 1, 12, 0, 0)
+    student_id = uuid.UUID(int=rng.getrandbits(128))
+    microconcept_ids = [uuid.UUID(int=rng.getrandbits(128)) for _ in range(n_microconcepts)]
+
+    mastery: dict[uuid.UUID, MasteryState] = {}
+    for mcid in microconcept_ids:
+        if rng.random() < 0.2:
+            continue  # never practiced
+        next_review = rng.choice(
+            [None, now - timedelta(days=rng.randint(0, 5)), now + timedelta(days=rng.randint(1, 5))]
+        )
+        mastery[mcid] = MasteryState(
+            student_id=student_id,
+            microconcept_id=mcid,
+            # Few distinct scores so ties on score are common and broken by item id.
+            mastery_score=Decimal(rng.choice(["0.10", "0.35", "0.50", "0.75", "0.90"])),
+            status=rng.choice(STATUSES),
+            recommended_next_review_at=next_review,
+        )
+
+    items = [
+        PoolItem(
+            uuid.UUID(int=rng.getrandbits(128)),
+            rng.choice(microconcept_ids) if rng.random() > 0.1 else None,
+            rng.randint(1, 3),
+        )
+        for _ in range(n_items)
+    ]
+    prereq_ids = set(rng.sample(microconcept_ids, k=min(len(microconcept_ids), rng.randint(0, 2))))
+    return now, items, mastery, prereq_ids
+
+
+def _reference_selection(items, mastery, prereq_ids, *, item_count, review_now):
+    with patch(
+        "app.services.session_selection._select_prerequisite_microconcepts_v2",
+        return_value=sorted(prereq_ids),
+    ):
+        ordered = _adaptive_order_items_v2(
+            None,
+            items=items,
+            mastery_by_microconcept=mastery,
+            student_id=uuid.uuid4(),
+            subject_id=uuid.uuid4(),
+            term_id=uuid.uuid4(),
+            candidate_microconcept_ids={i.microconcept_id for i in items if i.microconcept_id},
+        )
+    if review_now is not None:
+        ordered = _prioritize_due_microconcepts_for_review(
+            ordered_items=ordered, mastery_by_microconcept=mastery, now=review_now
+        )
+    selected = _apply_microconcept_cap(
+        ordered, item_count=item_count, max_per_microconcept=MAX_ITEMS_PER_MICROCONCEPT
+    )
+    return selected[:item_count]
+
+
+@pytest.mark.parametrize("review", [False, True])
+def test_topk_selection_matches_reference_pipeline(review: bool):
+    rng = random.Random(20260301 + int(review))
+    for _trial in range(300):
+        now, items, mastery, prereq_ids = _random_scenario(
+            rng, n_items=rng.randint(0, 60), n_microconcepts=rng.randint(1, 12)
+        )
+        item_count = rng.randint(0, 70)
+        review_now = now if review else None
+
+        expected = _reference_selection(
+            items, mastery, prereq_ids, item_count=item_count, review_now=review_now
+        )
+        actual = _select_items_topk(
+            items,
+            mastery_by_microconcept=mastery,
+            prereq_microconcept_ids=prereq_ids,
+            item_count=item_count,
+            max_per_microconcept=MAX_ITEMS_PER_MICROCONCEPT,
+            review_now=review_now,
+        )
+        assert actual == expected
+
+
+def test_topk_selection_falls_back_to_capped_items():
+    mcid = uuid.uuid4()
+    items = [PoolItem(uuid.UUID(int=i), mcid, 1) for i in range(1, 6)]
+
+    selected = _select_items_topk(
+        items,
+        mastery_by_microconcept={},
+        prereq_microconcept_ids=set(),
+        item_count=4,
+        max_per_microconcept=2,
+    )
+
+    # Only one microconcept: the cap is relaxed to still reach item_count, in id order.
+    assert selected == items[:4]
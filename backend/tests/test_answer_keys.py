@@ -0,0 +1,192 @@
+import json
+import random
+import uuid
+from unicodedata import combining, normalize
+
+import pytest
+
+from app.models.item import Item, ItemType
+from app.services.answer_keys import AnswerKeyCache, compile_answer_key
+
+
+# Reference graders: the per-response grading that compiled answer keys replaced.
+def _normalize_text(text: str) -> str:
+    decomposed = normalize("NFKD", text)
+    without_diacritics = "".join(ch for ch in decomposed if not combining(ch))
+    collapsed = " ".join(without_diacritics.strip().split())
+    return collapsed.casefold()
+
+
+def _compute_match_correct(item: Item, response_normalized: str | None) -> bool:
+    if not response_normalized:
+        return False
+    if not item.options or not isinstance(item.options, dict):
+        return False
+    pairs = item.options.get("pairs")
+    if not isinstance(pairs, list):
+        return False
+
+    expected: dict[str, str] = {}
+    for pair in pairs:
+        if not isinstance(pair, dict):
+            continue
+        left = pair.get("left")
+        right = pair.get("right")
+        if isinstance(left, str) and isinstance(right, str):
+            expected[left] = right
+
+    if not expected:
+        return False
+
+    try:
+        submitted = json.loads(response_normalized)
+    except json.JSONDecodeError:
+        return False
+    if not isinstance(submitted, dict):
+        return False
+
+    normalized_submitted: dict[str, str] = {}
+    for key, value in submitted.items():
+        if isinstance(key, str) and isinstance(value, str):
+            normalized_submitted[key] = value
+
+    return normalized_submitted == expected
+
+
+def _compute_cloze_correct(item: Item, response_normalized: str | None) -> bool:
+    if not response_normalized:
+        return False
+
+    submitted = _normalize_text(response_normalized)
+    if not submitted:
+        return False
+
+    # Allow multiple acceptable answers stored as JSON array in correct_answer.
+    acceptable: list[str] = []
+    try:
+        parsed = json.loads(item.correct_answer)
+        if isinstance(parsed, list):
+            acceptable = [str(x) for x in parsed if isinstance(x, (str, int, float))]
+    except json.JSONDecodeError:
+        acceptable = []
+
+    if not acceptable:
+        acceptable = [item.correct_answer]
+
+    return any(_normalize_text(ans) == submitted for ans in acceptable if isinstance(ans, str))
+
+
+def _compute_quiz_correct(item: Item, response_normalized: str | None) -> bool:
+    if not response_normalized:
+        return False
+    return _normalize_text(response_normalized) == _normalize_text(item.correct_answer)
+
+
+REFERENCE_GRADERS = {
+    ItemType.MCQ: _compute_quiz_correct,
+    ItemType.TRUE_FALSE: _compute_quiz_correct,
+    ItemType.CLOZE: _compute_cloze_correct,
+    ItemType.MATCH: _compute_match_correct,
+}
+
+WORDS = ["Canción", "cancion", "  CANCIÓN ", "Árbol", "arbol", "Ñandú", "nandu", "ﬁn", "fin", ""]
+
+
+def _item(item_type: ItemType, correct_answer: str, options=None) -> Item:
+    return Item(
+        id=uuid.uuid4(),
+        content_upload_id=uuid.uuid4(),
+        type=item_type,
+        stem="?",
+        options=options,
+        correct_answer=correct_answer,
+        difficulty=1,
+        is_active=True,
+    )
+
+
+def _random_text(rng: random.Random) -> str:
+    return rng.choice([" ", "  ", ""]).join(rng.sample(WORDS, k=rng.randint(1, 2)))
+
+
+def _random_item(rng: random.Random) -> Item:
+    item_type = rng.choice(list(REFERENCE_GRADERS))
+    if item_type == ItemType.MATCH:
+        pairs = [{"left": rng.choice(WORDS), "right": rng.choice(WORDS)} for _ in range(3)]
+        pairs.append(rng.choice([{"left": 1, "right": "x"}, "broken", {"left": "solo"}]))
+        options = rng.choice([{"pairs": pairs}, {"pairs": "nope"}, None, {"pairs": []}])
+        return _item(item_type, "", options)
+    if item_type == ItemType.CLOZE:
+        correct = rng.choice(
+            [
+                _random_text(rng),
+                json.dumps([_random_text(rng), _random_text(rng)]),
+                json.dumps([1, 2.5, True, None]),
+                json.dumps([]),
+                "4",
+                "[not json",
+            ]
+        )
+        return _item(item_type, correct, {"placeholder": "____"})
+    return _item(item_type, _random_text(rng), {"options": ["A", "B"]})
+
+
+def _random_response(rng: random.Random, item: Item) -> str | None:
+    if item.type == ItemType.MATCH and isinstance(item.options, dict):
+        pairs = item.options.get("pairs")
+        if isinstance(pairs, list) and rng.random() < 0.5:
+            valid = {
+                p["left"]: p["right"]
+                for p in pairs
+                if isinstance(p, dict)
+                and isinstance(p.get("left"), str)
+                and isinstance(p.get("right"), str)
+            }
+            return json.dumps(valid)
+        return rng.choice(["", "[]", "{", json.dumps({"a": "b"}), json.dumps({"x": 1})])
+    return rng.choice([None, "", "   ", "1", "2.5", "True", _random_text(rng), _random_text(rng)])
+
+
+def test_compiled_answer_keys_match_reference_graders():
+    rng = random.Random(35)
+    for _ in range(2000):
+        item = _random_item(rng)
+        key = compile_answer_key(item)
+        for _ in range(5):
+            response = _random_response(rng, item)
+            expected = REFERENCE_GRADERS[item.type](item, response)
+            assert key.is_correct(response) == expected, (item.correct_answer, response)
+
+
+@pytest.mark.parametrize(
+    ("item_type", "correct_answer", "response", "expected"),
+    [
+        (ItemType.MCQ, "Canción", "  cancion ", True),
+        (ItemType.TRUE_FALSE, "Verdadero", "falso", False),
+        (ItemType.CLOZE, '["Árbol", "arbol grande"]', "ARBOL  GRANDE", True),
+        (ItemType.CLOZE, "4", "4", True),
+        (ItemType.CLOZE, " ", " ", False),
+    ],
+)
+def test_compiled_answer_keys_examples(item_type, correct_answer, response, expected):
+    item = _item(item_type, correct_answer)
+    assert compile_answer_key(item).is_correct(response) is expected
+    assert REFERENCE_GRADERS[item_type](item, response) is expected
+
+
+def test_answer_key_cache_recompiles_when_item_changes():
+    cache = AnswerKeyCache(max_entries=2)
+    item = _item(ItemType.MCQ, "A")
+
+    first = cache.get(item)
+    assert cache.get(item) is first
+    assert cache.grade(item, "a") is True
+
+    item.correct_answer = "B"
+    assert cache.get(item) is not first
+    assert cache.grade(item, "a") is False
+    assert cache.grade(item, "b") is True
+
+    for _ in range(3):
+        cache.get(_item(ItemType.MCQ, "C"))
+    assert len(cache._keys) == 2
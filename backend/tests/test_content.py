@@ -1,3 +1,4 @@
+import hashlib
 import uuid
 from unittest.mock import patch
 
@@ -112,6 +113,8 @@ def test_upload_content_success(db_session: Session):
     record = db_session.query(ContentUpload).filter_by(id=uuid.UUID(json_resp["id"])).first()
     assert record is not None
     assert record.tutor_id == tutor.id
+    assert record.content_sha256 == hashlib.sha256(file_content).hexdigest()
+    assert json_resp["content_sha256"] == record.content_sha256
 
 
 def test_upload_content_missing_fields():
@@ -0,0 +1,142 @@
+import uuid
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.core.query_budget import query_budget
+from app.models.content import ContentUpload, ContentUploadType
+from app.models.item import Item, ItemType
+from app.models.role import Role
+from app.models.subject import Subject
+from app.models.term import AcademicYear, Term
+from app.models.tutor import Tutor
+from app.models.user import User
+from app.routers.content import set_item_active_state
+from app.schemas.item import ItemActivationUpdate
+from app.services.item_pool import PoolItem, item_pool_index
+
+
+@pytest.fixture
+def db_session() -> Session:
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _create_upload_with_items(db: Session) -> tuple[Tutor, ContentUpload, list[Item]]:
+    role = db.query(Role).filter(Role.name.ilike("tutor")).first()
+    if not role:
+        role = Role(name="tutor")
+        db.add(role)
+        db.flush()
+    uid = uuid.uuid4()
+    user = User(
+        id=uuid.uuid4(),
+        email=f"tutor_pool_{uid}@example.com",
+        hashed_password="x",
+        is_active=True,
+        role_id=role.id,
+    )
+    db.add(user)
+    db.flush()
+    tutor = Tutor(user_id=user.id, display_name="Pool Tutor")
+    year = AcademicYear(
+        name=f"2025-2026-pool-{uid}", start_date="2025-09-01", end_date="2026-06-30"
+    )
+    subject = Subject(name=f"Pool {uid}", tutor_id=user.id)
+    db.add_all([tutor, year, subject])
+    db.flush()
+    term = Term(academic_year_id=year.id, code="T1", name="Term 1")
+    db.add(term)
+    db.flush()
+    upload = ContentUpload(
+        id=uuid.uuid4(),
+        file_name="pool.pdf",
+        storage_uri="/test/pool.pdf",
+        mime_type="application/pdf",
+        upload_type=ContentUploadType.pdf,
+        tutor_id=tutor.id,
+        subject_id=subject.id,
+        term_id=term.id,
+        page_count=1,
+    )
+    db.add(upload)
+    db.flush()
+    items = [
+        Item(
+            id=uuid.uuid4(),
+            content_upload_id=upload.id,
+            type=item_type,
+            stem=f"Pregunta {idx}",
+            options=["A", "B"],
+            correct_answer="A",
+            difficulty=difficulty,
+            is_active=True,
+        )
+        for idx, (item_type, difficulty) in enumerate(
+            [(ItemType.MCQ, 1), (ItemType.TRUE_FALSE, 2), (ItemType.MCQ, 3), (ItemType.CLOZE, 1)]
+        )
+    ]
+    db.add_all(items)
+    db.commit()
+    return tutor, upload, items
+
+
+def test_item_pool_returns_sorted_compact_tuples_and_caches(db_session: Session):
+    _tutor, upload, items = _create_upload_with_items(db_session)
+    quiz_types = [ItemType.MCQ, ItemType.TRUE_FALSE]
+    subject_id, term_id = upload.subject_id, upload.term_id
+
+    with query_budget("test.item_pool.cold") as cold:
+        pool = item_pool_index.get_pool(
+            db_session, subject_id=subject_id, term_id=term_id, item_types=quiz_types
+        )
+    expected = sorted(
+        (PoolItem(i.id, i.microconcept_id, i.difficulty) for i in items if i.type in quiz_types),
+        key=lambda p: p.id,
+    )
+    assert pool == expected
+    # One query per item type, nothing once cached.
+    assert cold.statements == 2
+
+    with query_budget("test.item_pool.warm") as warm:
+        again = item_pool_index.get_pool(
+            db_session, subject_id=subject_id, term_id=term_id, item_types=quiz_types
+        )
+    assert again == expected
+    assert warm.statements == 0
+
+    by_upload = item_pool_index.get_pool(
+        db_session,
+        subject_id=upload.subject_id,
+        term_id=upload.term_id,
+        item_types=[ItemType.CLOZE],
+        content_upload_id=upload.id,
+    )
+    assert [p.id for p in by_upload] == [items[3].id]
+
+
+def test_item_pool_invalidated_when_item_is_deactivated(db_session: Session):
+    tutor, upload, items = _create_upload_with_items(db_session)
+    pool = item_pool_index.get_pool(
+        db_session,
+        subject_id=upload.subject_id,
+        term_id=upload.term_id,
+        item_types=[ItemType.MCQ],
+    )
+    assert {p.id for p in pool} == {items[0].id, items[2].id}
+
+    set_item_active_state(
+        upload.id, items[0].id, ItemActivationUpdate(is_active=False), tutor, db_session
+    )
+
+    pool = item_pool_index.get_pool(
+        db_session,
+        subject_id=upload.subject_id,
+        term_id=upload.term_id,
+        item_types=[ItemType.MCQ],
+    )
+    assert [p.id for p in pool] == [items[2].id]
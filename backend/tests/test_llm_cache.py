@@ -0,0 +1,71 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.db import SessionLocal
+from app.models.llm_cache import LLMResponseCacheEntry
+from app.services.llm_cache import llm_response_cache
+
+
+@pytest.fixture
+def db_session():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def test_cache_key_normalizes_input():
+    def key(payload, prompt_version="E4-V1", model="gpt-test"):
+        return llm_response_cache.key(
+            step="E4_ITEMS", prompt_version=prompt_version, model=model, payload=payload
+        )
+
+    base = key({"chunk_text": "Álgebra  es\ndivertida ", "quantity": 2})
+    assert base == key({"quantity": 2, "chunk_text": "Álgebra es divertida"})
+    assert base != key({"chunk_text": "Álgebra es divertida", "quantity": 3})
+    assert base != key({"chunk_text": "Álgebra es divertida", "quantity": 2}, "E4-V2")
+    assert base != key({"chunk_text": "Álgebra es divertida", "quantity": 2}, model="other")
+
+
+def test_cache_get_put_and_evict(db_session):
+    now = datetime.utcnow()
+    keys = [uuid.uuid4().hex * 2 for _ in range(4)]
+
+    def put(key: str, at: datetime) -> None:
+        llm_response_cache.put_many(
+            db_session,
+            {key: {"items": [key]}},
+            step="E4_ITEMS",
+            prompt_version="E4-V1",
+            model="gpt-test",
+            now=at,
+        )
+
+    put(keys[0], now - timedelta(days=400))
+    put(keys[1], now + timedelta(days=1))
+    put(keys[2], now + timedelta(days=2))
+    put(keys[3], now + timedelta(days=3))
+    db_session.commit()
+
+    evicted = llm_response_cache.evict(db_session, now=now, max_entries=2)
+    db_session.commit()
+    assert evicted >= 2
+
+    # keys[0] expired, keys[1] is the least recently used beyond the limit.
+    hits = llm_response_cache.get_many(db_session, keys, now=now)
+    assert hits == {keys[2]: {"items": [keys[2]]}, keys[3]: {"items": [keys[3]]}}
+
+    # Storing a response under an existing key replaces it.
+    llm_response_cache.put_many(
+        db_session,
+        {keys[2]: {"items": []}},
+        step="E4_ITEMS",
+        prompt_version="E4-V1",
+        model="gpt-test",
+    )
+    db_session.commit()
+    assert llm_response_cache.get_many(db_session, [keys[2]]) == {keys[2]: {"items": []}}
+    assert db_session.get(LLMResponseCacheEntry, keys[3]).hit_count == 1
@@ -1,3 +1,6 @@
+import re
+import threading
+import time
 import uuid
 from datetime import date
 from unittest.mock import MagicMock, patch
@@ -228,7 +231,7 @@ def test_process_pipeline_success(db_session):
 
     # 2. Mock External Services
     with (
-        patch("app.pipelines.processing.extract_text_from_pdf", return_value=MOCK_PDF_TEXT),
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
         patch("app.pipelines.processing.os.path.exists", return_value=True),
         patch("app.services.llm_service.openai.OpenAI") as mock_openai,
     ):
@@ -392,24 +395,33 @@ def test_pipeline_segmentation_merges_chunks(db_session):
     e2_segment_2 = {"summary": "S2", "chunks": ["C2"]}
 
     with (
-        patch("app.pipelines.processing.extract_text_from_pdf", return_value=long_text),
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[long_text]),
         patch("app.pipelines.processing.os.path.exists", return_value=True),
         patch("app.pipelines.processing.E2_SEGMENT_MAX_CHARS", 70),
         patch("app.pipelines.processing.E2_SEGMENT_MIN_CHARS", 10),
         patch("app.services.llm_service.openai.OpenAI") as mock_openai,
     ):
+        # Segments are structured concurrently: answer by segment content, not call order.
+        responses_by_marker = {
+            "A" * 60: e2_segment_0,
+            "B" * 60: e2_segment_1,
+            "C" * 60: e2_segment_2,
+        }
+
+        def create(**kwargs):
+            prompt = kwargs["messages"][-1]["content"]
+            marker = next(m for m in responses_by_marker if m in prompt)
+            return create_mock_response(responses_by_marker[marker])
+
         mock_instance = mock_openai.return_value
-        mock_instance.chat.completions.create.side_effect = [
-            create_mock_response(e2_segment_0),
-            create_mock_response(e2_segment_1),
-            create_mock_response(e2_segment_2),
-        ]
+        mock_instance.chat.completions.create.side_effect = create
 
         process_content_upload(db_session, upload_id)
 
         db_session.expire_all()
         entry = db_session.query(KnowledgeEntry).filter_by(content_upload_id=upload_id).first()
         assert entry is not None
+        assert entry.summary == "S0\n\nS1\n\nS2"
         assert entry.structure_json["segments_count"] == 3
         assert entry.structure_json["chunks_count"] == 3
 
@@ -441,7 +453,7 @@ def test_pipeline_retries_e2_and_logs_attempts(db_session):
     e2_ok = {"summary": "S", "chunks": ["C"], "quality": {"hallucination_risk": "high"}}
 
     with (
-        patch("app.pipelines.processing.extract_text_from_pdf", return_value="X" * 200),
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=["X" * 200]),
         patch("app.pipelines.processing.os.path.exists", return_value=True),
         patch("app.services.llm_service.openai.OpenAI") as mock_openai,
     ):
@@ -596,7 +608,7 @@ def test_pipeline_e5_missing_validation_drops_item(db_session):
     }
 
     with (
-        patch("app.pipelines.processing.extract_text_from_pdf", return_value=MOCK_PDF_TEXT),
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
         patch("app.pipelines.processing.os.path.exists", return_value=True),
         patch("app.services.llm_service.openai.OpenAI") as mock_openai,
     ):
@@ -628,3 +640,752 @@ def test_pipeline_e5_missing_validation_drops_item(db_session):
         assert dropped[0].validation_status == "drop"
         assert dropped[0].is_active is False
         assert sum(1 for it in items if it.is_active) == 3
+
+
+def test_pipeline_e4_runs_chunks_concurrently_in_order(db_session, monkeypatch):
+    fx = _create_upload_fixture(db_session)
+    upload_id = fx["upload"].id
+
+    settings.OPENAI_API_KEY = "fake-key"
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 4)
+
+    def create_mock_response(content_dict):
+        import json
+
+        mock_msg = MagicMock()
+        mock_msg.message.content = json.dumps(content_dict)
+        mock_choice = MagicMock()
+        mock_choice.choices = [mock_msg]
+        return mock_choice
+
+    chunk_count = 6
+    e2 = {
+        "summary": "Summary",
+        "chunks": [f"Chunk-{idx}-text" for idx in range(chunk_count)],
+        "quality": {"hallucination_risk": "low", "coverage": 1.0, "coherence": 1.0},
+    }
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+    failed_once: set[int] = set()
+    e5_prompts: list[str] = []
+
+    def create(**kwargs):
+        nonlocal in_flight, max_in_flight
+        prompt = kwargs["messages"][-1]["content"]
+        if "chunk_mappings" in prompt:
+            return create_mock_response(MOCK_E3_RESPONSE_BASE)
+        if "validated_items" in prompt:
+            e5_prompts.append(prompt)
+            raise RuntimeError("E5 unavailable")
+        if "fragmentos" in prompt:
+            return create_mock_response(e2)
+
+        idx = int(re.search(r"Chunk-(\d+)-text", prompt).group(1))
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        try:
+            # Later chunks answer first, so completion order differs from chunk order.
+            time.sleep(0.02 * (chunk_count - idx))
+            if idx == 3 and idx not in failed_once:
+                failed_once.add(idx)
+                raise RuntimeError("transient")
+            return create_mock_response(
+                {
+                    "items": [
+                        {
+                            "type": "multiple_choice",
+                            "stem": f"Q{idx}",
+                            "options": ["A", "B"],
+                            "correct_answer": "A",
+                        }
+                    ]
+                }
+            )
+        finally:
+            with lock:
+                in_flight -= 1
+
+    with (
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
+        patch("app.pipelines.processing.os.path.exists", return_value=True),
+        patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+    ):
+        mock_openai.return_value.chat.completions.create.side_effect = create
+        process_content_upload(db_session, upload_id)
+
+    assert max_in_flight > 1
+
+    # Candidates reach E5 in chunk order.
+    stems = [f'"Q{idx}"' for idx in range(chunk_count)]
+    positions = [e5_prompts[0].index(stem) for stem in stems]
+    assert positions == sorted(positions)
+
+    chunks = (
+        db_session.query(KnowledgeChunk)
+        .join(KnowledgeEntry, KnowledgeChunk.knowledge_entry_id == KnowledgeEntry.id)
+        .filter(KnowledgeEntry.content_upload_id == upload_id)
+        .all()
+    )
+    chunk_index_by_id = {c.id: c.index for c in chunks}
+    runs = (
+        db_session.query(LLMRun)
+        .filter(LLMRun.content_upload_id == upload_id, LLMRun.step == LLMRunStep.E4_ITEMS)
+        .all()
+    )
+    attempts: dict[int, list[tuple[int, str]]] = {}
+    for run in runs:
+        attempts.setdefault(chunk_index_by_id[run.knowledge_chunk_id], []).append(
+            (run.attempt, run.status)
+        )
+    assert attempts[3] == [(1, "failed"), (2, "success")]
+    assert all(attempts[idx] == [(1, "success")] for idx in range(chunk_count) if idx != 3)
+
+    items = db_session.query(Item).filter_by(content_upload_id=upload_id).all()
+    assert sorted(item.source_chunk_index for item in items) == list(range(chunk_count))
+
+
+def test_pipeline_reuses_cached_llm_responses(db_session, monkeypatch):
+    import json
+
+    fx = _create_upload_fixture(db_session)
+    monkeypatch.setattr(settings, "LLM_RESPONSE_CACHE_ENABLED", True)
+    settings.OPENAI_API_KEY = "fake-key"
+
+    marker = uuid.uuid4().hex
+    pdf_text = f"{MOCK_PDF_TEXT} {marker}"
+    e2 = {
+        "summary": "Summary",
+        "chunks": [f"Chunk 1 {marker}", f"Chunk 2 {marker}"],
+        "quality": {"hallucination_risk": "low", "coverage": 1.0, "coherence": 1.0},
+    }
+
+    def create(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "chunk_mappings" in prompt:
+            content = MOCK_E3_RESPONSE_BASE
+        elif "validated_items" in prompt:
+            payload = json.loads(prompt.split("Entrada JSON:")[1].split("Devuelve SOLO")[0])
+            content = {
+                "validated_items": [
+                    {"index": idx, "status": "ok", "reason": "ok", "item": item}
+                    for idx, item in enumerate(payload["items"])
+                ],
+                "quality": {"kept": 2, "fixed": 0, "dropped": 0, "notes": []},
+            }
+        elif "fragmentos" in prompt:
+            content = e2
+        else:
+            content = MOCK_E4_RESPONSE
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = json.dumps(content)
+        return response
+
+    def run(upload_id, text):
+        with (
+            patch("app.pipelines.processing.iter_pdf_pages", return_value=[text]),
+            patch("app.pipelines.processing.os.path.exists", return_value=True),
+            patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+        ):
+            mock_openai.return_value.chat.completions.create.side_effect = create
+            process_content_upload(db_session, upload_id)
+            return mock_openai.return_value.chat.completions.create
+
+    first_calls = run(fx["upload"].id, pdf_text)
+    assert first_calls.call_count == 5  # E2, E3, E4 x2, E5
+    db_session.refresh(fx["upload"])
+    assert fx["upload"].page_count == 1
+
+    # Same content uploaded again, extracted with different line breaks.
+    second = ContentUpload(
+        tutor_id=fx["tutor"].id,
+        subject_id=fx["subject"].id,
+        term_id=fx["term"].id,
+        upload_type=ContentUploadType.pdf,
+        storage_uri=f"mock/path/again_{marker}.pdf",
+        file_name=f"again_{marker}.pdf",
+        mime_type="application/pdf",
+        page_count=1,
+    )
+    db_session.add(second)
+    db_session.commit()
+    second_calls = run(second.id, pdf_text.replace(" ", "\n", 3))
+    second_calls.assert_not_called()
+
+    runs = db_session.query(LLMRun).filter(LLMRun.content_upload_id == second.id).all()
+    assert len(runs) == 5
+    assert {run.status for run in runs} == {"cached"}
+    assert all(run.prompt_tokens == 0 and run.completion_tokens == 0 for run in runs)
+
+    def stems(upload_id):
+        items = db_session.query(Item).filter_by(content_upload_id=upload_id).all()
+        return sorted((item.stem, item.is_active) for item in items)
+
+    assert stems(second.id) == stems(fx["upload"].id)
+    assert len(stems(second.id)) == 2
+
+
+def test_pipeline_clones_identical_upload_without_llm_calls(db_session):
+    import json
+
+    settings.OPENAI_API_KEY = "fake-key"
+    content_sha256 = uuid.uuid4().hex * 2
+
+    source_fx = _create_upload_fixture(db_session)
+    source = source_fx["upload"]
+    source.content_sha256 = content_sha256
+    db_session.commit()
+
+    mc_algebra = source_fx["microconcepts"][0]
+    e3 = {
+        **MOCK_E3_RESPONSE_BASE,
+        "chunk_mappings": [
+            {
+                "chunk_index": 0,
+                "microconcept_match": {"microconcept_id": str(mc_algebra.id)},
+                "confidence": 0.9,
+                "reason": "algebra",
+            }
+        ],
+    }
+
+    def create(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "chunk_mappings" in prompt:
+            content = e3
+        elif "validated_items" in prompt:
+            raise RuntimeError("E5 unavailable")
+        elif "fragmentos" in prompt:
+            content = MOCK_E2_RESPONSE
+        else:
+            content = MOCK_E4_RESPONSE
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = json.dumps(content)
+        return response
+
+    with (
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
+        patch("app.pipelines.processing.os.path.exists", return_value=True),
+        patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+    ):
+        mock_openai.return_value.chat.completions.create.side_effect = create
+        process_content_upload(db_session, source.id)
+    source.processing_status = "succeeded"
+    db_session.commit()
+
+    # The same file uploaded by another tutor, whose catalog shares the microconcept codes.
+    target_fx = _create_upload_fixture(db_session)
+    target = target_fx["upload"]
+    target.content_sha256 = content_sha256
+    target.page_count = 0
+    db_session.commit()
+
+    with (
+        patch("app.pipelines.processing.iter_pdf_pages") as mock_extract,
+        patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+    ):
+        process_content_upload(db_session, target.id)
+    mock_extract.assert_not_called()
+    mock_openai.return_value.chat.completions.create.assert_not_called()
+    assert db_session.query(LLMRun).filter(LLMRun.content_upload_id == target.id).count() == 0
+    db_session.refresh(target)
+    assert target.page_count == source.page_count == 1
+
+    def snapshot(upload_id):
+        entry = db_session.query(KnowledgeEntry).filter_by(content_upload_id=upload_id).one()
+        chunks = (
+            db_session.query(KnowledgeChunk)
+            .filter_by(knowledge_entry_id=entry.id)
+            .order_by(KnowledgeChunk.index)
+            .all()
+        )
+        items = db_session.query(Item).filter_by(content_upload_id=upload_id).all()
+        mc_ids = {c.microconcept_id for c in chunks if c.microconcept_id}
+        mc_ids |= {i.microconcept_id for i in items}
+        codes = {
+            mc.id: mc.code
+            for mc in db_session.query(MicroConcept).filter(MicroConcept.id.in_(mc_ids))
+        }
+        return (
+            entry,
+            [(c.index, c.content, codes.get(c.microconcept_id)) for c in chunks],
+            sorted((i.stem, i.source_chunk_index, codes[i.microconcept_id]) for i in items),
+            mc_ids,
+        )
+
+    source_entry, source_chunks, source_items, _ = snapshot(source.id)
+    target_entry, target_chunks, target_items, target_mc_ids = snapshot(target.id)
+    assert target_chunks == source_chunks
+    assert source_chunks[0][2] == "PIPE_MC_001"
+    assert target_items == source_items
+    assert len(target_items) == 2
+    target_catalog = {mc.id for mc in target_fx["microconcepts"]}
+    assert target_mc_ids <= target_catalog
+    assert target_entry.summary == source_entry.summary
+    assert target_entry.structure_json["cloned_from_upload_id"] == str(source.id)
+
+    # Reprocessing the clone runs the pipeline instead of cloning again.
+    with (
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
+        patch("app.pipelines.processing.os.path.exists", return_value=True),
+        patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+    ):
+        mock_openai.return_value.chat.completions.create.side_effect = create
+        process_content_upload(db_session, target.id)
+    mock_openai.return_value.chat.completions.create.assert_called()
+    assert db_session.query(LLMRun).filter(LLMRun.content_upload_id == target.id).count() > 0
+
+
+def test_reprocessing_reads_page_text_cache(db_session):
+    import json
+
+    from app.services.page_text_cache import page_text_cache
+
+    settings.OPENAI_API_KEY = "fake-key"
+    fx = _create_upload_fixture(db_session)
+    upload = fx["upload"]
+    upload.content_sha256 = uuid.uuid4().hex * 2
+    db_session.commit()
+
+    def create(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "chunk_mappings" in prompt:
+            content = MOCK_E3_RESPONSE_BASE
+        elif "validated_items" in prompt:
+            raise RuntimeError("E5 unavailable")
+        elif "fragmentos" in prompt:
+            content = MOCK_E2_RESPONSE
+        else:
+            content = MOCK_E4_RESPONSE
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = json.dumps(content)
+        return response
+
+    def run(**extract):
+        with (
+            patch("app.pipelines.processing.iter_pdf_pages", **extract) as mock_extract,
+            patch("app.pipelines.processing.os.path.exists", return_value=True),
+            patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+        ):
+            mock_openai.return_value.chat.completions.create.side_effect = create
+            process_content_upload(db_session, upload.id)
+            return mock_extract
+
+    pages = ["Page one about algebra.", "", "Page three about functions."]
+    assert run(return_value=pages).call_count == 1
+    assert page_text_cache.get(db_session, upload.content_sha256) == pages
+    assert page_text_cache.get(db_session, upload.content_sha256, extractor_version="old") is None
+
+    run(side_effect=AssertionError("PDF parsed again")).assert_not_called()
+    db_session.refresh(upload)
+    assert upload.page_count == 3
+    entries = db_session.query(KnowledgeEntry).filter_by(content_upload_id=upload.id).count()
+    assert entries == 1
+
+
+def test_reprocessing_replaces_previous_entry_and_items(db_session):
+    import json
+
+    settings.OPENAI_API_KEY = "fake-key"
+    fx = _create_upload_fixture(db_session)
+    upload = fx["upload"]
+
+    def create(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "chunk_mappings" in prompt:
+            content = MOCK_E3_RESPONSE_BASE
+        elif "validated_items" in prompt:
+            raise RuntimeError("E5 unavailable")
+        elif "fragmentos" in prompt:
+            content = MOCK_E2_RESPONSE
+        else:
+            content = MOCK_E4_RESPONSE
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = json.dumps(content)
+        return response
+
+    for _ in range(2):
+        with (
+            patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
+            patch("app.pipelines.processing.os.path.exists", return_value=True),
+            patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+        ):
+            mock_openai.return_value.chat.completions.create.side_effect = create
+            process_content_upload(db_session, upload.id)
+
+    (entry,) = db_session.query(KnowledgeEntry).filter_by(content_upload_id=upload.id).all()
+    items = db_session.query(Item).filter_by(content_upload_id=upload.id).all()
+    active = [item for item in items if item.is_active]
+    assert len(items) == 4
+    assert len(active) == 2
+    assert all(item.knowledge_entry_id == entry.id for item in active)
+    chunks = db_session.query(KnowledgeChunk).join(KnowledgeEntry)
+    assert chunks.filter(KnowledgeEntry.content_upload_id == upload.id).count() == len(
+        MOCK_E2_RESPONSE["chunks"]
+    )
+
+
+def test_pipeline_e4_batches_short_chunks(db_session, monkeypatch):
+    import json
+
+    settings.OPENAI_API_KEY = "fake-key"
+    monkeypatch.setattr(settings, "LLM_E4_BATCH_ENABLED", True)
+    monkeypatch.setattr(settings, "LLM_E4_BATCH_MAX_TOKENS", 100)
+    monkeypatch.setattr(settings, "LLM_E4_BATCH_MAX_CHUNKS", 2)
+    fx = _create_upload_fixture(db_session)
+    upload_id = fx["upload"].id
+
+    # Chunks 0-5 are short (three batches of two), chunk 6 is over the batch budget.
+    chunk_texts = [f"Short chunk {idx}." for idx in range(6)] + ["Long chunk. " * 60]
+    e2 = {
+        "summary": "Summary",
+        "chunks": chunk_texts,
+        "quality": {"hallucination_risk": "low", "coverage": 1.0, "coherence": 1.0},
+    }
+    e5_prompts: list[str] = []
+
+    def item(stem, source_chunk_index=None):
+        data = {"type": "true_false", "stem": stem, "correct_answer": "Verdadero"}
+        if source_chunk_index is not None:
+            data["source_chunk_index"] = source_chunk_index
+        return data
+
+    def create(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "chunk_mappings" in prompt:
+            content = MOCK_E3_RESPONSE_BASE
+        elif "validated_items" in prompt:
+            e5_prompts.append(prompt)
+            raise RuntimeError("E5 unavailable")
+        elif "fragmentos" in prompt:
+            content = e2
+        elif '"chunks": [' in prompt:
+            payload = json.loads(prompt.split("Entrada JSON:")[1].split("Devuelve formato")[0])
+            indexes = [c["chunk_index"] for c in payload["chunks"]]
+            # The second batch leaves chunk 3 out; the third cites a chunk it was not sent.
+            content = {
+                "items": [
+                    item(f"Batch Q{idx}.{n}", idx if idx != 5 else 99)
+                    for idx in indexes
+                    if idx != 3
+                    for n in (0, 1)
+                ]
+            }
+        else:
+            idx = next(i for i, text in enumerate(chunk_texts) if text[:40] in prompt)
+            content = {"items": [item(f"Single Q{idx}")]}
+        response = MagicMock()
+        response.choices = [MagicMock()]
+        response.choices[0].message.content = json.dumps(content)
+        return response
+
+    with (
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
+        patch("app.pipelines.processing.os.path.exists", return_value=True),
+        patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+    ):
+        mock_openai.return_value.chat.completions.create.side_effect = create
+        process_content_upload(db_session, upload_id)
+
+    items = db_session.query(Item).filter_by(content_upload_id=upload_id).all()
+    assert sorted((i.source_chunk_index, i.stem) for i in items) == [
+        (0, "Batch Q0.0"),
+        (0, "Batch Q0.1"),
+        (1, "Batch Q1.0"),
+        (1, "Batch Q1.1"),
+        (2, "Batch Q2.0"),
+        (2, "Batch Q2.1"),
+        (3, "Single Q3"),
+        (4, "Single Q4"),
+        (5, "Single Q5"),
+        (6, "Single Q6"),
+    ]
+    positions = [e5_prompts[0].index(f'"source_chunk_index": {idx}') for idx in range(7)]
+    assert positions == sorted(positions)
+
+    runs = (
+        db_session.query(LLMRun)
+        .filter(LLMRun.content_upload_id == upload_id, LLMRun.step == LLMRunStep.E4_ITEMS)
+        .all()
+    )
+    batch_runs = sorted(
+        (r.subfolder, r.attempt, r.status) for r in runs if r.prompt_version == "E4B-V1"
+    )
+    # An invalid batch falls back to per-chunk requests without another attempt.
+    assert batch_runs == [
+        ("chunks:0,1", 1, "success"),
+        ("chunks:2,3", 1, "success"),
+        ("chunks:4,5", 1, "failed"),
+    ]
+    assert all(r.knowledge_chunk_id is None for r in runs if r.prompt_version == "E4B-V1")
+    assert len([r for r in runs if r.prompt_version == "E4-V1"]) == 4
+
+
+class _WorkerLost(BaseException):
+    """Stands in for the job dying mid-stage; nothing in the pipeline catches it."""
+
+
+def test_pipeline_resumes_from_checkpoints(db_session, monkeypatch):
+    fx = _create_upload_fixture(db_session)
+    upload_id = fx["upload"].id
+
+    settings.OPENAI_API_KEY = "fake-key"
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 1)
+    monkeypatch.setattr("app.pipelines.processing.E4_CHECKPOINT_CHUNKS", 4)
+
+    def create_mock_response(content_dict):
+        import json
+
+        mock_msg = MagicMock()
+        mock_msg.message.content = json.dumps(content_dict)
+        mock_choice = MagicMock()
+        mock_choice.choices = [mock_msg]
+        return mock_choice
+
+    chunk_count = 6
+    e2 = {
+        "summary": "Summary",
+        "chunks": [f"Chunk-{idx}-text" for idx in range(chunk_count)],
+        "quality": {"hallucination_risk": "low", "coverage": 1.0, "coherence": 1.0},
+    }
+    calls: list[str] = []
+    crash_on_chunk: int | None = 5
+
+    def create(**kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        if "chunk_mappings" in prompt:
+            calls.append("e3")
+            return create_mock_response(MOCK_E3_RESPONSE_BASE)
+        if "validated_items" in prompt:
+            calls.append("e5")
+            raise RuntimeError("E5 unavailable")
+        if "fragmentos" in prompt:
+            calls.append("e2")
+            return create_mock_response(e2)
+
+        idx = int(re.search(r"Chunk-(\d+)-text", prompt).group(1))
+        calls.append(f"e4:{idx}")
+        if idx == crash_on_chunk:
+            raise _WorkerLost()
+        return create_mock_response(
+            {
+                "items": [
+                    {
+                        "type": "multiple_choice",
+                        "stem": f"Q{idx}",
+                        "options": ["A", "B"],
+                        "correct_answer": "A",
+                    }
+                ]
+            }
+        )
+
+    def run():
+        with (
+            patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
+            patch("app.pipelines.processing.os.path.exists", return_value=True),
+            patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+        ):
+            mock_openai.return_value.chat.completions.create.side_effect = create
+            process_content_upload(db_session, upload_id)
+
+    with pytest.raises(_WorkerLost):
+        run()
+    db_session.rollback()
+    assert calls == ["e2", "e3", "e4:0", "e4:1", "e4:2", "e4:3", "e4:4", "e4:5"]
+
+    # The retry only generates the chunks of the wave that was lost.
+    calls.clear()
+    crash_on_chunk = None
+    run()
+    assert calls == ["e4:4", "e4:5", "e5", "e5"]  # E5 is retried, then falls back
+
+    entries = db_session.query(KnowledgeEntry).filter_by(content_upload_id=upload_id).all()
+    assert len(entries) == 1
+    chunk_indexes = [
+        c.index
+        for c in db_session.query(KnowledgeChunk).filter_by(knowledge_entry_id=entries[0].id)
+    ]
+    assert sorted(chunk_indexes) == list(range(chunk_count))
+    items = db_session.query(Item).filter_by(content_upload_id=upload_id).all()
+    assert sorted((i.source_chunk_index, i.stem) for i in items) == [
+        (idx, f"Q{idx}") for idx in range(chunk_count)
+    ]
+
+    # Once finished, processing the upload again starts over and replaces the results.
+    calls.clear()
+    run()
+    assert calls[:2] == ["e2", "e3"]
+    assert db_session.query(KnowledgeEntry).filter_by(content_upload_id=upload_id).count() == 1
+    active = db_session.query(Item).filter_by(content_upload_id=upload_id, is_active=True)
+    assert active.count() == chunk_count
+
+
+def test_pipeline_e5_validates_shards_with_cited_chunks(db_session, monkeypatch):
+    fx = _create_upload_fixture(db_session)
+    upload_id = fx["upload"].id
+
+    settings.OPENAI_API_KEY = "fake-key"
+    monkeypatch.setattr(settings, "LLM_E5_SHARD_MAX_ITEMS", 2)
+
+    def create_mock_response(content_dict):
+        import json
+
+        mock_msg = MagicMock()
+        mock_msg.message.content = json.dumps(content_dict)
+        mock_choice = MagicMock()
+        mock_choice.choices = [mock_msg]
+        return mock_choice
+
+    chunk_count = 5
+    e2 = {
+        "summary": "Summary",
+        "chunks": [f"Chunk-{idx}-text" for idx in range(chunk_count)],
+        "quality": {"hallucination_risk": "low", "coverage": 1.0, "coherence": 1.0},
+    }
+    e5_inputs: list[dict] = []
+    lock = threading.Lock()
+
+    def create(**kwargs):
+        import json
+
+        prompt = kwargs["messages"][-1]["content"]
+        if "chunk_mappings" in prompt:
+            return create_mock_response(MOCK_E3_RESPONSE_BASE)
+        if "validated_items" in prompt:
+            payload = json.loads(prompt.split("Entrada JSON:")[1].split("Devuelve SOLO")[0])
+            with lock:
+                e5_inputs.append(payload)
+            validated = []
+            for idx, item in enumerate(payload["items"]):
+                # Chunk 4's item is dropped; everything else passes.
+                status = "drop" if item["source_chunk_index"] == 4 else "ok"
+                validated.append({"index": idx, "status": status, "reason": status, "item": item})
+            return create_mock_response(
+                {
+                    "validated_items": validated,
+                    "quality": {"kept": 0, "fixed": 0, "dropped": 0, "notes": []},
+                }
+            )
+        if "fragmentos" in prompt:
+            return create_mock_response(e2)
+
+        idx = int(re.search(r"Chunk-(\d+)-text", prompt).group(1))
+        return create_mock_response(
+            {
+                "items": [
+                    {
+                        "type": "multiple_choice",
+                        "stem": f"Q{idx}",
+                        "options": ["A", "B"],
+                        "correct_answer": "A",
+                    }
+                ]
+            }
+        )
+
+    with (
+        patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
+        patch("app.pipelines.processing.os.path.exists", return_value=True),
+        patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+    ):
+        mock_openai.return_value.chat.completions.create.side_effect = create
+        process_content_upload(db_session, upload_id)
+
+    # Each shard only carries the chunks its items were generated from.
+    shards = sorted(
+        (
+            [item["source_chunk_index"] for item in payload["items"]],
+            [chunk["chunk_index"] for chunk in payload["chunks_from_E2"]],
+        )
+        for payload in e5_inputs
+    )
+    assert shards == [([0, 1], [0, 1]), ([2, 3], [2, 3]), ([4], [4])]
+
+    runs = (
+        db_session.query(LLMRun)
+        .filter(LLMRun.content_upload_id == upload_id, LLMRun.step == LLMRunStep.E5_VALIDATE)
+        .all()
+    )
+    assert sorted(r.subfolder for r in runs) == ["items:0-1", "items:2-3", "items:4-4"]
+
+    # Shard-local indexes map back to the right candidates; 4 of 5 kept passes the gate.
+    items = db_session.query(Item).filter_by(content_upload_id=upload_id).all()
+    assert sorted(
+        (i.source_chunk_index, i.stem, i.validation_status, i.is_active) for i in items
+    ) == [
+        (0, "Q0", "ok", True),
+        (1, "Q1", "ok", True),
+        (2, "Q2", "ok", True),
+        (3, "Q3", "ok", True),
+        (4, "Q4", "drop", False),
+    ]
+
+
+def test_open_circuit_breaker_parks_and_requeues_upload_job(db_session, monkeypatch):
+    import httpx
+    import openai
+
+    from app import tasks
+    from app.services.llm_retry import llm_circuit_breaker
+
+    fx = _create_upload_fixture(db_session)
+    upload_id = fx["upload"].id
+
+    settings.OPENAI_API_KEY = "fake-key"
+    monkeypatch.setattr(settings, "LLM_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "LLM_BREAKER_OPEN_SECONDS", 60)
+    requeued: list[tuple[uuid.UUID, float]] = []
+    monkeypatch.setattr(
+        tasks,
+        "enqueue_upload_processing",
+        lambda *, upload_id, delay_seconds: requeued.append((upload_id, delay_seconds)) or "job-2",
+    )
+
+    def create(**kwargs):
+        raise openai.InternalServerError(
+            "provider down",
+            response=httpx.Response(
+                503,
+                headers={"retry-after-ms": "5"},
+                request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"),
+            ),
+            body=None,
+        )
+
+    llm_circuit_breaker.reset()
+    try:
+        with (
+            patch("app.pipelines.processing.iter_pdf_pages", return_value=[MOCK_PDF_TEXT]),
+            patch("app.pipelines.processing.os.path.exists", return_value=True),
+            patch("app.services.llm_service.openai.OpenAI") as mock_openai,
+        ):
+            mock_openai.return_value.chat.completions.create.side_effect = create
+            tasks.process_upload_job(str(upload_id))
+    finally:
+        llm_circuit_breaker.reset()
+
+    # Two transient failures (waiting the Retry-After in between) open the breaker; the
+    # third attempt is not made and the job is requeued for after the cool-down.
+    assert len(requeued) == 1
+    assert requeued[0][0] == upload_id
+    assert 0 < requeued[0][1] <= 60
+
+    db_session.expire_all()
+    upload = db_session.get(ContentUpload, upload_id)
+    assert upload.processing_status == "queued"
+    assert upload.processing_job_id == "job-2"
+    assert "circuit breaker open" in upload.processing_error
+
+    runs = db_session.query(LLMRun).filter(LLMRun.content_upload_id == upload_id).all()
+    assert sorted((r.attempt, r.status, r.backoff_ms) for r in runs) == [
+        (1, "failed", 5),
+        (2, "failed", 5),
+        (3, "circuit_open", None),
+    ]
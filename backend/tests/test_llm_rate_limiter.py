@@ -0,0 +1,74 @@
+import pytest
+
+from app.core.config import settings
+from app.services import llm_rate_limiter as limiter_module
+from app.services.llm_rate_limiter import LLMRateLimiter
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MODEL_NAME", "test-model")
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_RPM", 4)
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_TPM", 0)
+    return LLMRateLimiter(), fakeredis.FakeRedis()
+
+
+def test_requests_per_minute_refill(limiter):
+    rate_limiter, conn = limiter
+    now = 1_000.0
+
+    for _ in range(4):
+        assert rate_limiter.try_acquire("upload-a", 10, now=now, connection=conn) == 0
+    # Bucket empty: one request refills every 15s at 4 RPM.
+    assert rate_limiter.try_acquire("upload-a", 10, now=now, connection=conn) == pytest.approx(15)
+    assert rate_limiter.try_acquire("upload-a", 10, now=now + 15, connection=conn) == 0
+
+
+def test_tokens_per_minute_and_settle(limiter, monkeypatch):
+    rate_limiter, conn = limiter
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_RPM", 0)
+    monkeypatch.setattr(settings, "LLM_RATE_LIMIT_TPM", 600)
+    monkeypatch.setattr(limiter_module, "is_async_queue_enabled", lambda: True)
+    now = 1_000.0
+
+    assert rate_limiter.try_acquire("upload-a", 500, now=now, connection=conn) == 0
+    # 100 tokens left; 300 more take 200 tokens of refill at 10 tokens/s.
+    assert rate_limiter.try_acquire("upload-a", 300, now=now, connection=conn) == pytest.approx(20)
+
+    # The call only used 200 tokens: the 300 over-estimated ones come back.
+    rate_limiter.settle("upload-a", 500, 200, connection=conn)
+    assert rate_limiter.try_acquire("upload-a", 300, now=now, connection=conn) == 0
+
+    # A request over the whole budget goes out once the bucket is full, leaving a debt.
+    assert rate_limiter.try_acquire("upload-a", 1_000, now=now + 60, connection=conn) == 0
+    wait = rate_limiter.try_acquire("upload-a", 100, now=now + 60, connection=conn)
+    assert wait == pytest.approx(50)  # 400 of debt plus the 100 asked for, at 10 tokens/s
+
+
+def test_active_uploads_share_the_limit(limiter):
+    rate_limiter, conn = limiter
+    now = 1_000.0
+
+    assert rate_limiter.try_acquire("upload-b", 10, now=now, connection=conn) == 0
+    assert rate_limiter.try_acquire("upload-a", 10, now=now, connection=conn) == 0
+    assert rate_limiter.try_acquire("upload-a", 10, now=now, connection=conn) == 0
+    # Upload A used its half of the 4 RPM although the global bucket still has room...
+    assert rate_limiter.try_acquire("upload-a", 10, now=now, connection=conn) > 0
+    # ...which is left for upload B.
+    assert rate_limiter.try_acquire("upload-b", 10, now=now, connection=conn) == 0
+
+    # Once B has been idle past the activity window, A gets the whole limit again.
+    later = now + limiter_module.ACTIVE_UPLOAD_TTL_SECONDS + 60
+    for _ in range(4):
+        assert rate_limiter.try_acquire("upload-a", 10, now=later, connection=conn) == 0
+
+
+def test_acquire_is_a_no_op_without_async_queue(limiter, monkeypatch):
+    rate_limiter, _conn = limiter
+    monkeypatch.setattr(limiter_module, "is_async_queue_enabled", lambda: False)
+    monkeypatch.setattr(
+        limiter_module, "_get_redis_connection", lambda: pytest.fail("Redis must not be used")
+    )
+    assert rate_limiter.acquire("upload-a", 10) == 0
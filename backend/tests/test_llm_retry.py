@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import openai
+import pytest
+
+from app.core.config import settings
+from app.pipelines import processing
+from app.services.llm_rate_limiter import LLMRateLimitTimeout
+from app.services.llm_retry import (
+    LLMCircuitBreaker,
+    is_transient_error,
+    retry_after_seconds,
+    retry_delay_seconds,
+)
+
+
+def _status_error(status_code: int, headers: dict | None = None) -> openai.APIStatusError:
+    response = httpx.Response(
+        status_code,
+        headers=headers or {},
+        request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"),
+    )
+    return openai.APIStatusError("error", response=response, body=None)
+
+
+def test_transient_errors():
+    assert is_transient_error(_status_error(429))
+    assert is_transient_error(_status_error(503))
+    assert not is_transient_error(_status_error(400))
+    assert not is_transient_error(ValueError("bad json"))
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(_status_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(_status_error(429, {"retry-after": "7"})) == 7
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    from_date = retry_after_seconds(_status_error(429, {"retry-after": format_datetime(retry_at)}))
+    assert 25 < from_date <= 30
+    assert retry_after_seconds(_status_error(429)) is None
+
+
+def test_retry_delay_backs_off_and_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "LLM_RETRY_MAX_DELAY_SECONDS", 10.0)
+    error = _status_error(503)
+
+    for attempt, ceiling in [(1, 1.0), (2, 2.0), (3, 4.0), (6, 10.0)]:
+        delays = [retry_delay_seconds(attempt, error) for _ in range(50)]
+        assert all(0 <= delay <= ceiling for delay in delays)
+
+    assert retry_delay_seconds(1, _status_error(429, {"retry-after": "5"})) == 5
+    assert retry_delay_seconds(1, _status_error(429, {"retry-after": "120"})) == 10
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    monkeypatch.setattr(settings, "ASYNC_QUEUE_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 3)
+    monkeypatch.setattr(settings, "LLM_BREAKER_OPEN_SECONDS", 60)
+    return LLMCircuitBreaker()
+
+
+def test_breaker_opens_after_consecutive_failures(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.open_for() == 0
+
+    breaker.record_failure()
+    assert 59 < breaker.open_for() <= 60
+
+
+def test_breaker_is_half_open_after_cool_down(breaker, monkeypatch):
+    for _ in range(3):
+        breaker.record_failure()
+    monkeypatch.setattr(breaker, "_open_until", 0.0)  # cool-down elapsed
+    assert breaker.open_for() == 0
+
+    breaker.record_failure()
+    assert breaker.open_for() > 0
+
+    monkeypatch.setattr(breaker, "_open_until", 0.0)
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.open_for() == 0
+
+
+def test_only_transient_errors_are_backed_off(monkeypatch):
+    monkeypatch.setattr(settings, "ASYNC_QUEUE_ENABLED", False)
+    monkeypatch.setattr(settings, "LLM_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "LLM_RETRY_BASE_DELAY_SECONDS", 1.0)
+    monkeypatch.setattr(settings, "LLM_BREAKER_FAILURE_THRESHOLD", 100)
+    monkeypatch.setattr(processing, "llm_circuit_breaker", LLMCircuitBreaker())
+    sleeps: list[float] = []
+    monkeypatch.setattr(processing.time, "sleep", sleeps.append)
+
+    def fail(error: Exception):
+        def call():
+            raise error
+
+        return call
+
+    # A bad response is retried right away.
+    outcome = processing._attempt_with_retries(fail(ValueError("bad json")))
+    assert len(outcome.attempts) == 3
+    assert sleeps == []
+    assert all(attempt.backoff_ms is None for attempt in outcome.attempts)
+
+    # The rate limiter already waited its maximum: no second attempt.
+    outcome = processing._attempt_with_retries(fail(LLMRateLimitTimeout("no capacity")))
+    assert len(outcome.attempts) == 1
+    assert sleeps == []
+
+    outcome = processing._attempt_with_retries(fail(_status_error(503)))
+    assert len(outcome.attempts) == 3
+    assert len(sleeps) == 2
@@ -0,0 +1,67 @@
+import random
+
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from app.pipelines import processing
+from app.pipelines.extraction import extract_text_from_pdf, iter_pdf_pages
+
+
+def _write_pdf(path, page_texts: list[str]) -> None:
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for text in page_texts:
+        page = writer.add_blank_page(width=612, height=792)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+    writer.write(str(path))
+
+
+def test_iter_pdf_pages_in_order_across_processes(tmp_path):
+    texts = [f"Page {idx}" for idx in range(11)]
+    path = tmp_path / "book.pdf"
+    _write_pdf(path, texts)
+
+    assert list(iter_pdf_pages(str(path), max_workers=3, pages_per_task=2)) == texts
+    assert list(iter_pdf_pages(str(path), max_workers=1)) == texts
+    assert extract_text_from_pdf(str(path)) == "".join(f"{text}\n" for text in texts)
+
+    # Stopping early does not wait for the rest of the book.
+    pages = iter_pdf_pages(str(path), max_workers=3, pages_per_task=2)
+    assert next(pages) == "Page 0"
+    pages.close()
+
+
+def test_segments_do_not_depend_on_page_boundaries(monkeypatch):
+    monkeypatch.setattr(processing, "E2_SEGMENT_MAX_CHARS", 120)
+    monkeypatch.setattr(processing, "E2_SEGMENT_MIN_CHARS", 40)
+    monkeypatch.setattr(processing, "E2_SEGMENT_MAX_COUNT", 50)
+
+    rng = random.Random(7)
+    paragraphs = [" ".join(f"w{p}x{w}" for w in range(rng.randint(1, 30))) for p in range(40)]
+    text = "\n\n".join(paragraphs) + "\n \n" + "Z" * 300
+    lines = text.split("\n")
+
+    whole = list(processing._iter_segments([text]))
+    by_line = list(processing._iter_segments(lines))
+    assert by_line == whole
+    assert all(len(segment) <= 120 for segment in whole)
+    assert whole[-3:] == ["Z" * 120, "Z" * 120, "Z" * 60]
+    assert "".join("".join(whole).split()) == "".join(text.split())
+
+    # Short text is a single segment; the count is capped.
+    assert list(processing._iter_segments(["Short", "text"])) == ["Short\ntext"]
+    monkeypatch.setattr(processing, "E2_SEGMENT_MAX_COUNT", 2)
+    assert list(processing._iter_segments(lines)) == whole[:2]
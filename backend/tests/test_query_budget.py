@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.db import SessionLocal
+from app.core.query_budget import QueryBudgetExceeded, query_budget
+
+
+def test_query_budget_runs_in_raise_mode_under_tests():
+    assert settings.QUERY_BUDGET_MODE == "raise"
+
+
+def test_query_budget_counts_statements_including_nested_blocks():
+    db = SessionLocal()
+    try:
+        with query_budget("test.outer", max_statements=10) as outer:
+            db.execute(text("SELECT 1"))
+            with query_budget("test.inner", max_statements=10) as inner:
+                db.execute(text("SELECT 1"))
+                db.execute(text("SELECT 1"))
+        db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+    assert inner.statements == 2
+    assert outer.statements == 3
+    assert outer.seconds >= inner.seconds >= 0
+
+
+def test_query_budget_raises_when_exceeded():
+    db = SessionLocal()
+    try:
+        with pytest.raises(QueryBudgetExceeded, match="test.tight"):
+            with query_budget("test.tight", max_statements=1):
+                db.execute(text("SELECT 1"))
+                db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+
+
+def test_query_budget_logs_instead_of_raising_outside_tests(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "QUERY_BUDGET_MODE", "log")
+
+    @query_budget("test.decorated", max_statements=0)
+    def run() -> int:
+        db = SessionLocal()
+        try:
+            return db.execute(text("SELECT 1")).scalar_one()
+        finally:
+            db.close()
+
+    with caplog.at_level("WARNING", logger="app.core.query_budget"):
+        assert run() == 1
+    assert "Query budget exceeded for test.decorated" in caplog.text
+
+
+def test_query_budget_only_logs_time_over_budget_in_raise_mode(caplog):
+    db = SessionLocal()
+    try:
+        with caplog.at_level("WARNING", logger="app.core.query_budget"):
+            with query_budget("test.slow", max_statements=5, max_seconds=0):
+                db.execute(text("SELECT 1"))
+    finally:
+        db.close()
+    assert "Query budget exceeded for test.slow" in caplog.text
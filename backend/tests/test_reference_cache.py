@@ -0,0 +1,111 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.db import SessionLocal
+from app.core.security import get_password_hash
+from app.main import app
+from app.models.microconcept import MicroConcept
+from app.models.role import Role
+from app.models.subject import Subject
+from app.models.term import AcademicYear, Term
+from app.models.tutor import Tutor
+from app.models.user import User
+from app.services.reference_cache import ReferenceCache, reference_cache
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db_session() -> Session:
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _create_scope(db: Session) -> tuple[User, Subject, Term]:
+    role = db.query(Role).filter(func.lower(Role.name) == "tutor").first()
+    if not role:
+        role = Role(name="tutor")
+        db.add(role)
+        db.flush()
+    uid = uuid.uuid4()
+    user = User(
+        id=uid,
+        email=f"tutor_refcache_{uid}@test.com",
+        hashed_password=get_password_hash("pw"),
+        is_active=True,
+        role_id=role.id,
+    )
+    db.add(user)
+    db.flush()
+    db.add(Tutor(user_id=user.id, display_name="Ref Cache Tutor"))
+    year = AcademicYear(
+        name=f"2025-2026-refcache-{uid}",
+        start_date="2025-09-01",
+        end_date="2026-06-30",
+    )
+    db.add(year)
+    db.flush()
+    term = Term(academic_year_id=year.id, code="T1", name="Term 1")
+    subject = Subject(name=f"Subject RefCache {uid}", tutor_id=user.id)
+    db.add_all([term, subject])
+    db.commit()
+    return user, subject, term
+
+
+def _add_microconcepts(db: Session, subject: Subject, term: Term, n: int) -> list[MicroConcept]:
+    mcs = [MicroConcept(subject_id=subject.id, term_id=term.id, name=f"MC {i}") for i in range(n)]
+    db.add_all(mcs)
+    db.commit()
+    return mcs
+
+
+def test_reference_cache_serves_hits_until_invalidated(db_session: Session):
+    _user, subject, term = _create_scope(db_session)
+    (mc,) = _add_microconcepts(db_session, subject, term, 1)
+    cache = ReferenceCache(max_entries=100, stamp_check_seconds=60)
+
+    assert cache.microconcept_names(db_session, [mc.id]) == {mc.id: "MC 0"}
+
+    mc.name = "MC renamed"
+    db_session.commit()
+    assert cache.microconcept_names(db_session, [mc.id]) == {mc.id: "MC 0"}
+
+    version = cache.version("microconcept")
+    cache.invalidate("microconcept")
+    assert cache.version("microconcept") == version + 1
+    assert cache.microconcept_names(db_session, [mc.id]) == {mc.id: "MC renamed"}
+
+
+def test_reference_cache_is_size_bounded(db_session: Session):
+    _user, subject, term = _create_scope(db_session)
+    mcs = _add_microconcepts(db_session, subject, term, 5)
+    cache = ReferenceCache(max_entries=3, stamp_check_seconds=60)
+
+    found = cache.microconcepts(db_session, [mc.id for mc in mcs])
+    assert len(found) == 5
+    assert len(cache._entries["microconcept"]) == 3
+
+
+def test_microconcept_router_write_invalidates_shared_cache(db_session: Session):
+    user, subject, term = _create_scope(db_session)
+    (mc,) = _add_microconcepts(db_session, subject, term, 1)
+    assert reference_cache.microconcept_names(db_session, [mc.id])[mc.id] == "MC 0"
+
+    token_res = client.post(
+        "/api/v1/login/access-token", json={"email": user.email, "password": "pw"}
+    )
+    assert token_res.status_code == 200
+    headers = {"Authorization": f"Bearer {token_res.json()['access_token']}"}
+
+    patch_res = client.patch(
+        f"/api/v1/microconcepts/{mc.id}", json={"name": "MC editado"}, headers=headers
+    )
+    assert patch_res.status_code == 200
+    assert reference_cache.microconcept_names(db_session, [mc.id])[mc.id] == "MC editado"
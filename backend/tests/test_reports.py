@@ -250,3 +250,263 @@ def test_generate_and_get_latest_report(db_session: Session):
     )
     assert feedback_section is not None
     assert "No hay feedback registrado" not in feedback_section["content"]
+
+
+def test_generate_cohort_report(db_session: Session):
+    uid = uuid.uuid4()
+
+    role_student = db_session.query(Role).filter_by(name="Student").first()
+    if not role_student:
+        role_student = Role(name="Student")
+        db_session.add(role_student)
+
+    role_tutor = db_session.query(Role).filter_by(name="Tutor").first()
+    if not role_tutor:
+        role_tutor = Role(name="Tutor")
+        db_session.add(role_tutor)
+
+    db_session.commit()
+
+    password = "pw"
+    tutor_user = User(
+        id=uuid.uuid4(),
+        email=f"ct_{uid}@example.com",
+        hashed_password=get_password_hash(password),
+        is_active=True,
+        role_id=role_tutor.id,
+    )
+    student_users = [
+        User(
+            id=uuid.uuid4(),
+            email=f"cs{i}_{uid}@example.com",
+            hashed_password="x",
+            is_active=True,
+            role_id=role_student.id,
+        )
+        for i in range(3)
+    ]
+    db_session.add_all([tutor_user, *student_users])
+    db_session.flush()
+
+    year = AcademicYear(
+        name=f"2025-2026-cohort-{uid}",
+        start_date=date(2025, 9, 1),
+        end_date=date(2026, 6, 30),
+    )
+    db_session.add(year)
+    db_session.flush()
+
+    term = Term(academic_year_id=year.id, code="T1", name="Term 1")
+    subject = Subject(name=f"Math Cohort {uid}")
+    tutor = Tutor(user_id=tutor_user.id, display_name="Tutor Cohort")
+    db_session.add_all([term, subject, tutor])
+    db_session.flush()
+
+    students = [Student(user_id=u.id, subject_id=subject.id) for u in student_users]
+    db_session.add_all(students)
+    db_session.flush()
+
+    mc_a = MicroConcept(subject_id=subject.id, term_id=term.id, name="Fracciones")
+    mc_b = MicroConcept(subject_id=subject.id, term_id=term.id, name="Decimales")
+    db_session.add_all([mc_a, mc_b])
+    db_session.flush()
+
+    now = datetime.utcnow()
+    statuses = [("at_risk", 0.2), ("at_risk", 0.3), ("dominant", 0.9)]
+    for student, (mc_status, score) in zip(students, statuses):
+        db_session.add_all(
+            [
+                MasteryState(
+                    student_id=student.id,
+                    microconcept_id=mc_a.id,
+                    mastery_score=score,
+                    status=mc_status,
+                    recommended_next_review_at=now - timedelta(days=1),
+                    updated_at=now,
+                ),
+                MasteryState(
+                    student_id=student.id,
+                    microconcept_id=mc_b.id,
+                    mastery_score=0.6,
+                    status="in_progress",
+                    recommended_next_review_at=now + timedelta(days=3),
+                    updated_at=now,
+                ),
+            ]
+        )
+        db_session.add(
+            RealGrade(
+                student_id=student.id,
+                subject_id=subject.id,
+                term_id=term.id,
+                assessment_date=date(2025, 11, 15),
+                grade_value=6.0,
+                grading_scale="0-10",
+                created_by_tutor_id=tutor.id,
+            )
+        )
+    db_session.commit()
+
+    token_res = client.post(
+        "/api/v1/login/access-token",
+        json={"email": tutor_user.email, "password": password},
+    )
+    assert token_res.status_code == 200
+    headers = {"Authorization": f"Bearer {token_res.json()['access_token']}"}
+
+    generate_res = client.post(
+        "/api/v1/reports/cohort/generate",
+        params={"subject_id": str(subject.id), "term_id": str(term.id)},
+        headers=headers,
+    )
+    assert generate_res.status_code == 201
+    payload = generate_res.json()
+    assert payload["report_type"] == "cohort"
+    assert payload["student_id"] is None
+    sections = {s["section_type"]: s for s in payload["sections"]}
+
+    distribution = {e["name"]: e for e in sections["mastery_distribution"]["data"]["microconcepts"]}
+    assert distribution["Fracciones"]["at_risk"] == 2
+    assert distribution["Fracciones"]["dominant"] == 1
+    assert distribution["Fracciones"]["review_due"] == 3
+    assert distribution["Decimales"]["in_progress"] == 3
+
+    heatmap = sections["at_risk_heatmap"]["data"]["cells"]
+    assert set(heatmap) == {str(mc_a.id)}
+    assert len(heatmap[str(mc_a.id)]) == 2
+
+    by_student = sections["review_schedule"]["data"]["by_student"]
+    assert all(v == {"due": 1, "upcoming": 1} for v in by_student.values())
+    assert len(by_student) == 3
+
+    trends = sections["real_grades"]["data"]["trends"]
+    assert trends == [
+        {
+            "month": "2025-11",
+            "grading_scale": "0-10",
+            "grades": 3,
+            "students": 3,
+            "average": 6.0,
+            "min": 6.0,
+            "max": 6.0,
+        }
+    ]
+    assert payload["metrics_snapshot"]["students"] == 3
+
+    latest_res = client.get(
+        "/api/v1/reports/cohort/latest",
+        params={"subject_id": str(subject.id), "term_id": str(term.id)},
+        headers=headers,
+    )
+    assert latest_res.status_code == 200
+    assert latest_res.json()["id"] == payload["id"]
+
+    list_res = client.get(
+        "/api/v1/reports",
+        params={"subject_id": str(subject.id), "report_type": "cohort"},
+        headers=headers,
+    )
+    assert list_res.status_code == 200
+    assert [r["id"] for r in list_res.json()] == [payload["id"]]
+
+
+def test_report_sections_are_content_addressed(db_session: Session, monkeypatch):
+    from app.core.config import settings
+    from app.models.report import ReportSectionPayload, TutorReport
+    from app.services.cohort_report_service import cohort_report_service
+    from app.services.report_storage import section_payload_hash, store_section_payload
+
+    uid = uuid.uuid4()
+    role_tutor = db_session.query(Role).filter_by(name="Tutor").first()
+    if not role_tutor:
+        role_tutor = Role(name="Tutor")
+        db_session.add(role_tutor)
+        db_session.flush()
+    tutor_user = User(
+        id=uuid.uuid4(),
+        email=f"dedup_{uid}@example.com",
+        hashed_password="x",
+        is_active=True,
+        role_id=role_tutor.id,
+    )
+    db_session.add(tutor_user)
+    db_session.flush()
+    tutor = Tutor(user_id=tutor_user.id, display_name="Tutor Dedup")
+    year = AcademicYear(
+        name=f"2025-2026-dedup-{uid}",
+        start_date=date(2025, 9, 1),
+        end_date=date(2026, 6, 30),
+    )
+    subject = Subject(name=f"Dedup {uid}")
+    db_session.add_all([tutor, year, subject])
+    db_session.flush()
+    term = Term(academic_year_id=year.id, code="T1", name="Term 1")
+    db_session.add(term)
+    db_session.commit()
+
+    first = cohort_report_service.generate_cohort_report(
+        db_session, tutor_id=tutor.id, subject_id=subject.id, term_id=term.id
+    )
+    second = cohort_report_service.generate_cohort_report(
+        db_session, tutor_id=tutor.id, subject_id=subject.id, term_id=term.id
+    )
+
+    first_hashes = [s.payload_hash for s in first.sections]
+    second_hashes = [s.payload_hash for s in second.sections]
+    assert first_hashes[1:] == second_hashes[1:]
+    assert all(first_hashes[1:])
+
+    executive = first.sections[0]
+    assert executive.section_type == "executive_summary"
+    assert executive.payload_hash is None
+    assert executive.content_inline is None
+    assert executive.content == first.summary
+    assert executive.data == {"metrics": first.metrics_snapshot}
+
+    db_session.expire_all()
+    reloaded = db_session.get(TutorReport, second.id)
+    assert [s.content for s in reloaded.sections] == [s.content for s in first.sections]
+
+    monkeypatch.setattr(settings, "REPORT_SECTION_COMPRESS_MIN_BYTES", 64)
+    data = {"rows": [{"student": str(uid), "value": i} for i in range(50)]}
+    content_hash = store_section_payload(db_session, content="big", data=data)
+    db_session.commit()
+    assert content_hash == section_payload_hash("big", data)
+    payload = db_session.get(ReportSectionPayload, content_hash)
+    assert payload.data is None
+    assert payload.data_compressed is not None
+    assert payload.decoded_data() == data
+
+
+def test_purge_skips_payloads_held_by_a_report_being_written(db_session: Session):
+    from app.core.db import SessionLocal
+    from app.models.report import ReportSectionPayload
+    from app.services.report_storage import (
+        _hold_section_payloads,
+        purge_orphan_section_payloads,
+        store_section_payload,
+    )
+
+    content = f"orphan {uuid.uuid4()}"
+    content_hash = store_section_payload(db_session, content=content, data=None)
+    db_session.commit()
+
+    writer = SessionLocal()
+    try:
+        # A report generation found the payload existing and holds it until it commits.
+        _hold_section_payloads(writer, {content_hash: (content, None)})
+        purge_orphan_section_payloads(db_session, batch_size=2)
+        assert db_session.get(ReportSectionPayload, content_hash) is not None
+        writer.rollback()
+
+        purge_orphan_section_payloads(db_session, batch_size=2)
+        db_session.expire_all()
+        assert db_session.get(ReportSectionPayload, content_hash) is None
+
+        # Purged between being found and being held: stored again.
+        _hold_section_payloads(writer, {content_hash: (content, None)})
+        writer.commit()
+    finally:
+        writer.close()
+    db_session.expire_all()
+    assert db_session.get(ReportSectionPayload, content_hash).content == content
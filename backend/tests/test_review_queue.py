@@ -0,0 +1,168 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.db import SessionLocal
+from app.core.security import get_password_hash
+from app.main import app
+from app.models.metric import MasteryState
+from app.models.microconcept import MicroConcept
+from app.models.role import Role
+from app.models.student import Student
+from app.models.subject import Subject
+from app.models.term import Term
+from app.models.tutor import Tutor
+from app.models.user import User
+from app.services.review_queue import review_queue
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db_session():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _login(email: str, password: str) -> dict[str, str]:
+    res = client.post(
+        "/api/v1/login/access-token",
+        json={"email": email, "password": password},
+    )
+    assert res.status_code == 200
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def _setup_class(db, now: datetime):
+    """Two students of a new subject with reviews scheduled around ``now``."""
+    role_student = db.query(Role).filter_by(name="student").first()
+    role_tutor = db.query(Role).filter_by(name="tutor").first()
+    uid = uuid.uuid4()
+
+    tutor_user = User(
+        id=uuid.uuid4(),
+        email=f"t_review_{uid}@example.com",
+        hashed_password=get_password_hash("pw"),
+        is_active=True,
+        role_id=role_tutor.id,
+    )
+    student_users = [
+        User(
+            id=uuid.uuid4(),
+            email=f"s_review_{idx}_{uid}@example.com",
+            hashed_password=get_password_hash("pw"),
+            is_active=True,
+            role_id=role_student.id,
+        )
+        for idx in range(2)
+    ]
+    db.add_all([tutor_user, *student_users])
+    db.flush()
+
+    subject = Subject(name=f"Subject Review {uid}", tutor_id=tutor_user.id)
+    db.add_all([Tutor(user_id=tutor_user.id, display_name="Tutor Review"), subject])
+    db.flush()
+    term = db.query(Term).filter_by(code="T1").first()
+
+    students = [Student(user_id=user.id, subject_id=subject.id) for user in student_users]
+    microconcepts = [
+        MicroConcept(
+            subject_id=subject.id,
+            term_id=term.id,
+            code=f"MC-REVIEW-{idx}",
+            name=f"Review {idx}",
+            active=True,
+        )
+        for idx in range(4)
+    ]
+    db.add_all([*students, *microconcepts])
+    db.flush()
+
+    # Per student: overdue, due in 3 days, due in 30 days and unscheduled.
+    schedule = [
+        (now - timedelta(days=2), "dominant"),
+        (now + timedelta(days=3), "in_progress"),
+        (now + timedelta(days=30), "dominant"),
+        (None, "at_risk"),
+    ]
+    for offset, student in enumerate(students):
+        for mc, (next_review, status) in zip(microconcepts, schedule, strict=True):
+            db.add(
+                MasteryState(
+                    student_id=student.id,
+                    microconcept_id=mc.id,
+                    mastery_score=0.9 if status == "dominant" else 0.5,
+                    status=status,
+                    recommended_next_review_at=(
+                        next_review - timedelta(hours=offset) if next_review else None
+                    ),
+                    updated_at=now,
+                )
+            )
+    db.commit()
+    return tutor_user, students, subject, term, microconcepts
+
+
+def test_review_queue_due_upcoming_and_next(db_session):
+    now = datetime.utcnow()
+    _tutor_user, students, subject, term, microconcepts = _setup_class(db_session, now)
+    scope = {"subject_id": subject.id, "term_id": term.id}
+
+    due = review_queue.due(db_session, student_ids=[students[0].id], now=now, **scope)
+    assert [e.microconcept_id for e in due] == [microconcepts[0].id]
+
+    upcoming = review_queue.upcoming(
+        db_session, student_ids=[students[0].id], now=now, days=7, **scope
+    )
+    assert [e.microconcept_id for e in upcoming] == [microconcepts[1].id]
+
+    # Whole class, in review order: the second student's reviews are scheduled an hour earlier.
+    class_due = review_queue.due(db_session, student_ids=[s.id for s in students], now=now, **scope)
+    assert [e.student_id for e in class_due] == [students[1].id, students[0].id]
+
+    in_progress_due = review_queue.due(
+        db_session, student_ids=[students[0].id], now=now, statuses=["in_progress"], **scope
+    )
+    assert in_progress_due == []
+
+    next_three = review_queue.next_due(db_session, student_ids=[students[0].id], k=3, **scope)
+    assert [e.microconcept_id for e in next_three] == [mc.id for mc in microconcepts[:3]]
+
+
+def test_class_reviews_due_today_endpoint(db_session):
+    now = datetime.utcnow()
+    tutor_user, students, subject, term, microconcepts = _setup_class(db_session, now)
+
+    headers = _login(tutor_user.email, "pw")
+    res = client.get(
+        f"/api/v1/metrics/subjects/{subject.id}/reviews/due-today",
+        params={"term_id": str(term.id)},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    data = res.json()
+    assert {row["student_id"] for row in data} == {str(s.id) for s in students}
+    for row in data:
+        assert [r["microconcept_id"] for r in row["reviews"]] == [str(microconcepts[0].id)]
+        assert row["reviews"][0]["status"] == "dominant"
+
+    other_tutor = _login("tutor@decies.com", "decies")
+    forbidden = client.get(
+        f"/api/v1/metrics/subjects/{subject.id}/reviews/due-today",
+        params={"term_id": str(term.id)},
+        headers=other_tutor,
+    )
+    assert forbidden.status_code == 403
+
+    student_headers = _login("student@decies.com", "decies")
+    res = client.get(
+        f"/api/v1/metrics/subjects/{subject.id}/reviews/due-today",
+        params={"term_id": str(term.id)},
+        headers=student_headers,
+    )
+    assert res.status_code == 403
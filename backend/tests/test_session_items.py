@@ -0,0 +1,251 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.db import SessionLocal, engine
+from app.core.security import get_password_hash
+from app.main import app
+from app.models.activity import ActivitySession, ActivitySessionItem, ActivityType
+from app.models.content import ContentUpload, ContentUploadType
+from app.models.item import Item, ItemType
+from app.models.microconcept import MicroConcept
+from app.models.role import Role
+from app.models.student import Student
+from app.models.subject import Subject
+from app.models.term import Term
+from app.models.tutor import Tutor
+from app.models.user import User
+from app.services.session_items import session_items_cache
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db_session():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _login(email: str, password: str) -> dict[str, str]:
+    res = client.post(
+        "/api/v1/login/access-token",
+        json={"email": email, "password": password},
+    )
+    assert res.status_code == 200
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+
+def _start_session_with_items(
+    db,
+    item_count: int = 5,
+    statements: list[str] | None = None,
+    session_item_count: int | None = None,
+):
+    role_student = db.query(Role).filter_by(name="student").first()
+    role_tutor = db.query(Role).filter_by(name="tutor").first()
+    uid = uuid.uuid4()
+
+    tutor_user = User(
+        id=uuid.uuid4(),
+        email=f"t_items_{uid}@example.com",
+        hashed_password=get_password_hash("pw"),
+        is_active=True,
+        role_id=role_tutor.id,
+    )
+    student_user = User(
+        id=uuid.uuid4(),
+        email=f"s_items_{uid}@example.com",
+        hashed_password=get_password_hash("pw"),
+        is_active=True,
+        role_id=role_student.id,
+    )
+    db.add_all([tutor_user, student_user])
+    db.flush()
+
+    tutor = Tutor(user_id=tutor_user.id, display_name="Tutor Items")
+    subject = Subject(name=f"Subject Items {uid}", tutor_id=tutor_user.id)
+    db.add_all([tutor, subject])
+    db.flush()
+    term = db.query(Term).filter_by(code="T1").first()
+
+    student = Student(user_id=student_user.id, subject_id=subject.id)
+    upload = ContentUpload(
+        id=uuid.uuid4(),
+        file_name="items.pdf",
+        storage_uri="/test/items.pdf",
+        mime_type="application/pdf",
+        upload_type=ContentUploadType.pdf,
+        tutor_id=tutor.id,
+        subject_id=subject.id,
+        term_id=term.id,
+        page_count=1,
+    )
+    microconcept = MicroConcept(
+        subject_id=subject.id, term_id=term.id, code="MC-ITEMS", name="Items", active=True
+    )
+    db.add_all([student, upload, microconcept])
+    db.flush()
+
+    db.add_all(
+        [
+            Item(
+                id=uuid.uuid4(),
+                content_upload_id=upload.id,
+                microconcept_id=microconcept.id,
+                type=ItemType.MCQ,
+                stem=f"Items {idx}",
+                options=["A", "B"],
+                correct_answer="A",
+                difficulty=1,
+                is_active=True,
+            )
+            for idx in range(item_count)
+        ]
+    )
+    db.commit()
+
+    quiz = db.query(ActivityType).filter_by(code="QUIZ").first()
+    student_headers = _login(student_user.email, "pw")
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    if statements is not None:
+        event.listen(engine, "before_cursor_execute", record)
+    res = client.post(
+        "/api/v1/activities/sessions",
+        json={
+            "student_id": str(student.id),
+            "activity_type_id": str(quiz.id),
+            "subject_id": str(subject.id),
+            "term_id": str(term.id),
+            "topic_id": None,
+            "item_count": item_count if session_item_count is None else session_item_count,
+            "content_upload_id": str(upload.id),
+            "device_type": "web",
+        },
+        headers=student_headers,
+    )
+    if statements is not None:
+        event.remove(engine, "before_cursor_execute", record)
+    assert res.status_code == 200
+    return res.json()["id"], student_headers, _login(tutor_user.email, "pw"), upload
+
+
+def test_session_items_etag_and_cursor(db_session):
+    session_id, student_headers, tutor_headers, _upload = _start_session_with_items(db_session)
+    url = f"/api/v1/activities/sessions/{session_id}/items"
+
+    full = client.get(url, headers=student_headers)
+    assert full.status_code == 200
+    assert len(full.json()) == 5
+    etag = full.headers["ETag"]
+
+    # Reloads revalidate for free; the tutor gets the same representation.
+    assert client.get(url, headers={**student_headers, "If-None-Match": etag}).status_code == 304
+    assert client.get(url, headers={**tutor_headers, "If-None-Match": etag}).status_code == 304
+
+    # Rebuilding the payload from the database (another worker) yields the same ETag.
+    session_items_cache.clear()
+    rebuilt = client.get(url, headers=student_headers)
+    assert rebuilt.headers["ETag"] == etag
+    assert rebuilt.json() == full.json()
+
+    pages: list[dict] = []
+    params: dict[str, int] = {"limit": 2}
+    while True:
+        page = client.get(url, params=params, headers=student_headers)
+        assert page.status_code == 200
+        assert page.headers["ETag"] != etag
+        pages.extend(page.json())
+        if "X-Next-Cursor" not in page.headers:
+            break
+        params = {"limit": 2, "after": int(page.headers["X-Next-Cursor"])}
+    assert pages == full.json()
+
+    other_student = _login("student@decies.com", "decies")
+    assert client.get(url, headers=other_student).status_code == 403
+    missing = client.get(f"/api/v1/activities/sessions/{uuid.uuid4()}/items", headers=tutor_headers)
+    assert missing.status_code == 404
+
+
+def test_session_items_drop_deactivated_items(db_session):
+    session_id, student_headers, tutor_headers, upload = _start_session_with_items(db_session)
+    url = f"/api/v1/activities/sessions/{session_id}/items"
+
+    first = client.get(url, headers=student_headers)
+    etag = first.headers["ETag"]
+    deactivated = first.json()[0]["id"]
+
+    toggle = client.patch(
+        f"/api/v1/content/uploads/{upload.id}/items/{deactivated}",
+        json={"is_active": False},
+        headers=tutor_headers,
+    )
+    assert toggle.status_code == 200
+
+    after = client.get(url, headers={**student_headers, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    assert [i["id"] for i in after.json()] == [i["id"] for i in first.json()[1:]]
+
+
+def test_session_items_follow_the_database_not_this_process(db_session):
+    session_id, student_headers, tutor_headers, _upload = _start_session_with_items(db_session)
+    url = f"/api/v1/activities/sessions/{session_id}/items"
+    first = client.get(url, headers=student_headers)
+    etag = first.headers["ETag"]
+
+    # Another process deactivates an item: nothing is invalidated here.
+    deactivated = uuid.UUID(first.json()[-1]["id"])
+    db_session.query(Item).filter(Item.id == deactivated).update({Item.is_active: False})
+    db_session.commit()
+    after = client.get(url, headers={**student_headers, "If-None-Match": etag})
+    assert after.status_code == 200
+    assert [i["id"] for i in after.json()] == [i["id"] for i in first.json()[:-1]]
+
+    # The subject moves to another tutor: the cached owner no longer grants access.
+    role_tutor = db_session.query(Role).filter_by(name="tutor").first()
+    new_tutor = User(
+        id=uuid.uuid4(),
+        email=f"t_items_new_{uuid.uuid4()}@example.com",
+        hashed_password=get_password_hash("pw"),
+        is_active=True,
+        role_id=role_tutor.id,
+    )
+    db_session.add(new_tutor)
+    db_session.flush()
+    session = db_session.get(ActivitySession, uuid.UUID(session_id))
+    db_session.get(Subject, session.subject_id).tutor_id = new_tutor.id
+    db_session.commit()
+    assert client.get(url, headers=tutor_headers).status_code == 403
+    assert client.get(url, headers=_login(new_tutor.email, "pw")).status_code == 200
+
+
+def test_create_session_inserts_items_in_one_statement(db_session):
+    statements: list[str] = []
+    session_id, *_ = _start_session_with_items(db_session, item_count=60, statements=statements)
+
+    item_inserts = [s for s in statements if s.startswith("INSERT INTO activity_session_items")]
+    assert len(item_inserts) == 1
+    # The session is returned from the inserted values, not re-read.
+    assert not any(s.startswith("SELECT") and "FROM activity_sessions" in s for s in statements)
+    rows = db_session.query(ActivitySessionItem).filter_by(session_id=uuid.UUID(session_id))
+    assert sorted(row.order_index for row in rows) == list(range(60))
+
+
+def test_create_session_without_selected_items(db_session):
+    statements: list[str] = []
+    session_id, student_headers, *_ = _start_session_with_items(
+        db_session, statements=statements, session_item_count=0
+    )
+
+    assert not any(s.startswith("INSERT INTO activity_session_items") for s in statements)
+    res = client.get(f"/api/v1/activities/sessions/{session_id}/items", headers=student_headers)
+    assert res.status_code == 200
+    assert res.json() == []
@@ -0,0 +1,254 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.db import SessionLocal
+from app.core.security import get_password_hash
+from app.main import app
+from app.models.activity import ActivitySessionItem, ActivityType, SessionPlan
+from app.models.content import ContentUpload, ContentUploadType
+from app.models.item import Item, ItemType
+from app.models.microconcept import MicroConcept
+from app.models.role import Role
+from app.models.student import Student
+from app.models.subject import Subject
+from app.models.term import Term
+from app.models.tutor import Tutor
+from app.models.user import User
+from app.services.item_pool import item_pool_index
+from app.services.session_plan_service import session_plan_service
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db_session():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _setup_student_with_items(db):
+    role_student = db.query(Role).filter_by(name="student").first()
+    role_tutor = db.query(Role).filter_by(name="tutor").first()
+    uid = uuid.uuid4()
+    password = "pw"
+
+    tutor_user = User(
+        id=uuid.uuid4(),
+        email=f"t_plan_{uid}@example.com",
+        hashed_password=get_password_hash(password),
+        is_active=True,
+        role_id=role_tutor.id,
+    )
+    student_user = User(
+        id=uuid.uuid4(),
+        email=f"s_plan_{uid}@example.com",
+        hashed_password=get_password_hash(password),
+        is_active=True,
+        role_id=role_student.id,
+    )
+    db.add_all([tutor_user, student_user])
+    db.flush()
+
+    tutor = Tutor(user_id=tutor_user.id, display_name="Tutor Plan")
+    subject = Subject(name=f"Subject Plan {uid}", tutor_id=tutor_user.id)
+    db.add_all([tutor, subject])
+    db.flush()
+    term = db.query(Term).filter_by(code="T1").first()
+
+    student = Student(user_id=student_user.id, subject_id=subject.id)
+    upload = ContentUpload(
+        id=uuid.uuid4(),
+        file_name="plan.pdf",
+        storage_uri="/test/plan.pdf",
+        mime_type="application/pdf",
+        upload_type=ContentUploadType.pdf,
+        tutor_id=tutor.id,
+        subject_id=subject.id,
+        term_id=term.id,
+        page_count=1,
+    )
+    db.add_all([student, upload])
+    db.flush()
+
+    microconcepts = [
+        MicroConcept(
+            subject_id=subject.id,
+            term_id=term.id,
+            code=f"MC-PLAN-{idx}",
+            name=f"Plan {idx}",
+            active=True,
+        )
+        for idx in range(3)
+    ]
+    db.add_all(microconcepts)
+    db.flush()
+
+    items = [
+        Item(
+            id=uuid.uuid4(),
+            content_upload_id=upload.id,
+            microconcept_id=microconcepts[idx % 3].id,
+            type=ItemType.MCQ,
+            stem=f"Plan {idx}",
+            options=["A", "B"],
+            correct_answer="A",
+            difficulty=1,
+            is_active=True,
+        )
+        for idx in range(6)
+    ]
+    db.add_all(items)
+    db.commit()
+
+    token_res = client.post(
+        "/api/v1/login/access-token",
+        json={"email": student_user.email, "password": password},
+    )
+    assert token_res.status_code == 200
+    headers = {"Authorization": f"Bearer {token_res.json()['access_token']}"}
+    return headers, student, subject, term, items
+
+
+def _start_session(headers, *, student, subject, term, activity_type, item_count=4):
+    res = client.post(
+        "/api/v1/activities/sessions",
+        json={
+            "student_id": str(student.id),
+            "activity_type_id": str(activity_type.id),
+            "subject_id": str(subject.id),
+            "term_id": str(term.id),
+            "topic_id": None,
+            "item_count": item_count,
+            "device_type": "web",
+        },
+        headers=headers,
+    )
+    assert res.status_code == 200
+    return uuid.UUID(res.json()["id"])
+
+
+def _session_item_ids(db, session_id):
+    return [
+        row.item_id
+        for row in db.query(ActivitySessionItem)
+        .filter(ActivitySessionItem.session_id == session_id)
+        .order_by(ActivitySessionItem.order_index)
+    ]
+
+
+def test_end_session_precomputes_next_session_plan(db_session):
+    headers, student, subject, term, items = _setup_student_with_items(db_session)
+    quiz = db_session.query(ActivityType).filter_by(code="QUIZ").first()
+
+    first_id = _start_session(
+        headers, student=student, subject=subject, term=term, activity_type=quiz
+    )
+    end_res = client.post(f"/api/v1/activities/sessions/{first_id}/end", headers=headers)
+    assert end_res.status_code == 200
+
+    plan = (
+        db_session.query(SessionPlan)
+        .filter_by(student_id=student.id, subject_id=subject.id, activity_type_id=quiz.id)
+        .one()
+    )
+    assert plan.candidate_count == len(items)
+    assert sorted(plan.item_ids) == sorted(str(i.id) for i in items)
+
+    # The next session is the head of the plan, identical to what live selection produces.
+    planned_id = _start_session(
+        headers, student=student, subject=subject, term=term, activity_type=quiz
+    )
+    planned_items = _session_item_ids(db_session, planned_id)
+    assert planned_items == [uuid.UUID(i) for i in plan.item_ids[:4]]
+
+    session_plan_service.invalidate(
+        db_session, student_id=student.id, subject_id=subject.id, term_id=term.id
+    )
+    db_session.commit()
+    live_id = _start_session(
+        headers, student=student, subject=subject, term=term, activity_type=quiz
+    )
+    assert _session_item_ids(db_session, live_id) == planned_items
+
+
+def test_session_plan_is_stale_after_expiry_or_pool_change(db_session):
+    _headers, student, subject, term, _items = _setup_student_with_items(db_session)
+    quiz = db_session.query(ActivityType).filter_by(code="QUIZ").first()
+    now = datetime.utcnow()
+
+    session_plan_service.build_plans(db_session, student.id, subject.id, term.id, now=now)
+    db_session.commit()
+
+    def materialize(at: datetime, item_count: int = 4):
+        return session_plan_service.materialize(
+            db_session,
+            student_id=student.id,
+            subject_id=subject.id,
+            term_id=term.id,
+            activity_type_id=quiz.id,
+            item_count=item_count,
+            now=at,
+        )
+
+    assert len(materialize(now)) == 4
+    # More items than candidates: the plan holds the full ordering, so it still applies.
+    assert len(materialize(now, item_count=20)) == 6
+    assert materialize(now + timedelta(days=30)) is None
+
+    item_pool_index.invalidate(subject_id=subject.id, term_id=term.id)
+    assert materialize(now) is None
+
+
+def test_session_plan_with_inactive_item_falls_back_to_live_selection(db_session):
+    _headers, student, subject, term, _items = _setup_student_with_items(db_session)
+    quiz = db_session.query(ActivityType).filter_by(code="QUIZ").first()
+    now = datetime.utcnow()
+
+    session_plan_service.build_plans(db_session, student.id, subject.id, term.id, now=now)
+    db_session.commit()
+    plan = (
+        db_session.query(SessionPlan)
+        .filter_by(student_id=student.id, subject_id=subject.id, activity_type_id=quiz.id)
+        .one()
+    )
+
+    # Deactivated without the pool generation moving on (e.g. another process, no Redis).
+    db_session.get(Item, uuid.UUID(plan.item_ids[0])).is_active = False
+    db_session.commit()
+
+    assert (
+        session_plan_service.materialize(
+            db_session,
+            student_id=student.id,
+            subject_id=subject.id,
+            term_id=term.id,
+            activity_type_id=quiz.id,
+            item_count=4,
+            now=now,
+        )
+        is None
+    )
+
+
+def test_end_session_logs_plan_build_failures(db_session, monkeypatch, caplog):
+    headers, student, subject, term, _items = _setup_student_with_items(db_session)
+    quiz = db_session.query(ActivityType).filter_by(code="QUIZ").first()
+    session_id = _start_session(
+        headers, student=student, subject=subject, term=term, activity_type=quiz
+    )
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("plans unavailable")
+
+    monkeypatch.setattr(session_plan_service, "build_plans", fail)
+    with caplog.at_level("ERROR", logger="app.services.metric_service"):
+        res = client.post(f"/api/v1/activities/sessions/{session_id}/end", headers=headers)
+    assert res.status_code == 200
+    (record,) = [r for r in caplog.records if "precomputing session plans" in r.message]
+    assert record.exc_info is not None
@@ -0,0 +1,253 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import tasks
+from app.core.db import SessionLocal
+from app.core.security import get_password_hash
+from app.models.activity import ActivitySession, ActivityType, LearningEvent
+from app.models.content import ContentUpload, ContentUploadType
+from app.models.idempotency import IdempotencyKey
+from app.models.item import Item, ItemType
+from app.models.role import Role
+from app.models.student import Student
+from app.models.subject import Subject
+from app.models.term import Term
+from app.models.tutor import Tutor
+from app.models.user import User
+from app.services.idempotency import idempotency_service
+from app.services.session_sweeper import SessionScope, session_sweeper
+
+
+@pytest.fixture
+def db_session():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _setup_sessions(db, now: datetime):
+    role_student = db.query(Role).filter_by(name="student").first()
+    role_tutor = db.query(Role).filter_by(name="tutor").first()
+    uid = uuid.uuid4()
+
+    tutor_user = User(
+        id=uuid.uuid4(),
+        email=f"t_sweep_{uid}@example.com",
+        hashed_password=get_password_hash("pw"),
+        is_active=True,
+        role_id=role_tutor.id,
+    )
+    student_user = User(
+        id=uuid.uuid4(),
+        email=f"s_sweep_{uid}@example.com",
+        hashed_password=get_password_hash("pw"),
+        is_active=True,
+        role_id=role_student.id,
+    )
+    db.add_all([tutor_user, student_user])
+    db.flush()
+
+    tutor = Tutor(user_id=tutor_user.id, display_name="Tutor Sweep")
+    subject = Subject(name=f"Subject Sweep {uid}", tutor_id=tutor_user.id)
+    db.add_all([tutor, subject])
+    db.flush()
+    term = db.query(Term).filter_by(code="T1").first()
+    quiz = db.query(ActivityType).filter_by(code="QUIZ").first()
+
+    student = Student(user_id=student_user.id, subject_id=subject.id)
+    upload = ContentUpload(
+        id=uuid.uuid4(),
+        file_name="sweep.pdf",
+        storage_uri="/test/sweep.pdf",
+        mime_type="application/pdf",
+        upload_type=ContentUploadType.pdf,
+        tutor_id=tutor.id,
+        subject_id=subject.id,
+        term_id=term.id,
+        page_count=1,
+    )
+    db.add_all([student, upload])
+    db.flush()
+    item = Item(
+        id=uuid.uuid4(),
+        content_upload_id=upload.id,
+        type=ItemType.MCQ,
+        stem="Sweep",
+        options=["A", "B"],
+        correct_answer="A",
+        difficulty=1,
+        is_active=True,
+    )
+    db.add(item)
+
+    def session(started_at: datetime, status: str = "in_progress") -> ActivitySession:
+        row = ActivitySession(
+            id=uuid.uuid4(),
+            student_id=student.id,
+            activity_type_id=quiz.id,
+            subject_id=subject.id,
+            term_id=term.id,
+            started_at=started_at,
+            status=status,
+        )
+        db.add(row)
+        return row
+
+    sessions = {
+        "stale": session(now - timedelta(hours=5)),
+        "stale_answered": session(now - timedelta(hours=6)),
+        "active": session(now - timedelta(hours=4)),
+        "fresh": session(now - timedelta(minutes=10)),
+        "completed": session(now - timedelta(days=2), status="completed"),
+    }
+    db.flush()
+
+    def event(session_row: ActivitySession, created_at: datetime) -> LearningEvent:
+        return LearningEvent(
+            student_id=student.id,
+            session_id=session_row.id,
+            subject_id=subject.id,
+            term_id=term.id,
+            activity_type_id=quiz.id,
+            item_id=item.id,
+            timestamp_start=created_at,
+            timestamp_end=created_at,
+            duration_ms=1000,
+            is_correct=True,
+            created_at=created_at,
+        )
+
+    last_answer = now - timedelta(hours=5, minutes=30)
+    db.add_all(
+        [
+            event(sessions["stale_answered"], last_answer),
+            event(sessions["active"], now - timedelta(minutes=5)),
+        ]
+    )
+    db.commit()
+    return SessionScope(student.id, subject.id, term.id), sessions, last_answer
+
+
+def test_sweep_abandons_stale_sessions_in_batches(db_session):
+    now = datetime.utcnow()
+    scope, sessions, last_answer = _setup_sessions(db_session, now)
+
+    scopes = session_sweeper.sweep(db_session, now=now, abandon_after_seconds=3600, batch_size=1)
+    assert scope in scopes
+
+    db_session.expire_all()
+    status = {name: db_session.get(ActivitySession, row.id) for name, row in sessions.items()}
+    assert status["stale"].status == "abandoned"
+    assert status["stale"].ended_at == status["stale"].started_at
+    assert status["stale_answered"].status == "abandoned"
+    assert status["stale_answered"].ended_at == last_answer
+    assert status["active"].status == "in_progress"
+    assert status["fresh"].status == "in_progress"
+    assert status["completed"].status == "completed"
+
+    # Nothing left to sweep for this student.
+    assert scope not in session_sweeper.sweep(db_session, now=now, abandon_after_seconds=3600)
+
+
+def test_sweep_job_recalculates_each_scope_once(db_session, monkeypatch):
+    now = datetime.utcnow()
+    scope, _sessions, _last_answer = _setup_sessions(db_session, now)
+
+    refreshed: list[tuple] = []
+    monkeypatch.setattr(tasks.settings, "ASYNC_QUEUE_ENABLED", False)
+    monkeypatch.setattr(
+        tasks.metric_service, "refresh_after_session", lambda _db, *scope: refreshed.append(scope)
+    )
+    monkeypatch.setattr(tasks.settings, "SESSION_ABANDON_AFTER_SECONDS", 3600)
+    monkeypatch.setattr(tasks.settings, "SESSION_SWEEP_BATCH_SIZE", 1)
+
+    assert tasks.sweep_abandoned_sessions_job() >= 1
+    assert refreshed.count((scope.student_id, scope.subject_id, scope.term_id)) == 1
+
+
+def test_sweep_job_keeps_rescheduling_through_a_worker(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    from rq import Queue, SimpleWorker
+    from rq.job import Job
+    from rq.registry import ScheduledJobRegistry
+
+    from app.core import queue as queue_module
+
+    conn = fakeredis.FakeRedis()
+    monkeypatch.setattr(queue_module, "_get_redis_connection", lambda: conn)
+    monkeypatch.setattr(tasks.settings, "ASYNC_QUEUE_ENABLED", True)
+    monkeypatch.setattr(tasks.session_sweeper, "sweep", lambda db: set())
+    monkeypatch.setattr(tasks.idempotency_service, "purge_expired", lambda db: 0)
+    monkeypatch.setattr(tasks, "purge_orphan_section_payloads", lambda db: 0)
+    queue = Queue(tasks.settings.RQ_QUEUE_NAME, connection=conn)
+    scheduled = ScheduledJobRegistry(queue=queue)
+
+    def run_when_due(job_id: str) -> str:
+        # What the RQ scheduler does once the job is due, then a worker run.
+        scheduled.remove(job_id)
+        queue.enqueue_job(Job.fetch(job_id, connection=conn))
+        SimpleWorker([queue], connection=conn).work(burst=True)
+        (next_id,) = scheduled.get_job_ids()
+        return next_id
+
+    first = queue_module.schedule_session_sweep(delay_seconds=0)
+    assert first is not None
+    # Another worker starting up does not schedule a second cycle.
+    assert queue_module.schedule_session_sweep(delay_seconds=0) is None
+
+    second = run_when_due(first)
+    assert second != first
+    assert conn.get(queue_module.SESSION_SWEEP_LOCK_KEY).decode() == second
+
+    # The first job's result expires before the next run is due: the cycle goes on.
+    conn.delete(Job.key_for(first))
+    third = run_when_due(second)
+    assert third not in (first, second)
+    assert conn.get(queue_module.SESSION_SWEEP_LOCK_KEY).decode() == third
+
+
+def test_in_process_sweeper_only_runs_without_the_queue(monkeypatch):
+    monkeypatch.setattr(tasks.settings, "SESSION_SWEEP_IN_API", True)
+    monkeypatch.setattr(tasks.settings, "ASYNC_QUEUE_ENABLED", True)
+    assert tasks.start_in_process_sweeper() is None
+
+
+def test_in_process_sweeper_is_opt_in(monkeypatch):
+    monkeypatch.setattr(tasks.settings, "ASYNC_QUEUE_ENABLED", False)
+    assert tasks.settings.SESSION_SWEEP_IN_API is False
+    assert tasks.start_in_process_sweeper() is None
+
+
+def test_purge_expired_idempotency_keys_in_batches(db_session):
+    role_student = db_session.query(Role).filter_by(name="student").first()
+    user = User(
+        id=uuid.uuid4(),
+        email=f"s_idem_{uuid.uuid4()}@example.com",
+        hashed_password=get_password_hash("pw"),
+        is_active=True,
+        role_id=role_student.id,
+    )
+    db_session.add(user)
+    db_session.flush()
+    now = datetime.utcnow()
+    keys = [
+        IdempotencyKey(
+            user_id=user.id,
+            endpoint="activity.end_session",
+            key=f"key-{offset}",
+            request_hash="0" * 64,
+            response={},
+            expires_at=now + timedelta(seconds=offset),
+        )
+        for offset in (-60, -30, 3600)
+    ]
+    db_session.add_all(keys)
+    db_session.commit()
+
+    assert idempotency_service.purge_expired(db_session, now=now, batch_size=1) >= 2
+    remaining = db_session.query(IdempotencyKey.key).filter_by(user_id=user.id).all()
+    assert [row.key for row in remaining] == ["key-3600"]